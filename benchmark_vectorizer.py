@@ -0,0 +1,273 @@
+"""Micro-Benchmarks für die lokal laufenden Hot Paths von vectorizer_ai.
+
+Gemessen werden GPL-Lesen und Palette-Erstellung, die Größenberechnung, das LANCZOS-Upscaling,
+die PNG-Kodierung des Upload-Bildes und die Canvas-Anzeige (DisplayPyramid) mit synthetischen,
+reproduzierbaren Bildern (1k/4k/8k = längste Kante in Pixeln, Seitenverhältnis 4:3).
+
+Start:
+    python benchmark_vectorizer.py                      # alle Größen, Vergleich mit der Baseline
+    python benchmark_vectorizer.py --sizes 1k --filter palette
+    python benchmark_vectorizer.py --save-baseline      # aktuelle Messung als Baseline speichern
+
+Verglichen wird die schnellste Messung (Minimum, am wenigsten von anderen Prozessen gestört);
+liegt sie mehr als --threshold über der Baseline, endet das Skript mit Exit-Code 1.
+Baselines sind rechnerabhängig: Weicht die Umgebung ab, werden die Zahlen nur angezeigt und
+nicht bewertet (mit --strict trotzdem).
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+from PIL import Image, ImageDraw, ImageFilter
+
+import vectorizer_ai as vai
+
+SIZES = {'1k': 1000, '4k': 4000, '8k': 8000}
+DEFAULT_BASELINE = os.path.join(vai.SCRIPT_DIR, 'benchmarks', 'baseline.json')
+DEFAULT_GPL = os.path.join(vai.SCRIPT_DIR, 'malango_colors.gpl')
+# Mindestdauer einer Messung; schnelle Funktionen werden entsprechend oft hintereinander aufgerufen
+MIN_SAMPLE_S = 0.2
+# Canvas-Größe für die Anzeige-Benchmarks (typisches Fenster mit zwei Canvas)
+CANVAS_SIZE = (580, 640)
+
+
+def make_test_image(long_side, seed=0):
+    """Erzeugt ein reproduzierbares Motiv (Verlauf, Flächen, weiche Kanten) wie ein typisches Auftragsbild."""
+    width, height = long_side, long_side * 3 // 4
+    rng = random.Random(seed * 100003 + long_side)
+    gradient = Image.linear_gradient('L').resize((width, height))
+    img = Image.merge('RGB', (gradient, gradient.transpose(Image.Transpose.FLIP_LEFT_RIGHT),
+                              Image.new('L', (width, height), 180)))
+    draw = ImageDraw.Draw(img)
+    for _ in range(60):
+        x, y = rng.randrange(width), rng.randrange(height)
+        radius = rng.randrange(long_side // 40, long_side // 6)
+        color = tuple(rng.randrange(256) for _ in range(3))
+        if rng.random() < 0.5:
+            draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=color)
+        else:
+            draw.rectangle((x - radius, y - radius // 2, x + radius, y + radius // 2), fill=color)
+    return img.filter(ImageFilter.GaussianBlur(max(1, long_side // 1000)))
+
+
+def make_test_gpl(path, colors=1000, seed=0):
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("GIMP Palette\nName: Benchmark\nColumns: 16\n#\n")
+        for index in range(colors):
+            f.write(f"{rng.randrange(256):3d} {rng.randrange(256):3d} {rng.randrange(256):3d}\tFarbe {index}\n")
+
+
+class Fixtures:
+    """Testdateien im Temp-Ordner; Bilder werden erst bei Bedarf erzeugt."""
+
+    def __init__(self, folder, gpl_path):
+        self.folder = folder
+        self.gpl_path = gpl_path
+        self._images = {}
+
+    def image_path(self, long_side):
+        if long_side not in self._images:
+            path = os.path.join(self.folder, f'input_{long_side}.png')
+            make_test_image(long_side).save(path, dpi=(96, 96), compress_level=1)
+            self._images[long_side] = path
+        return self._images[long_side]
+
+    def image(self, long_side):
+        with Image.open(self.image_path(long_side)) as img:
+            return img.convert('RGB')
+
+
+def build_benchmarks(fixtures, sizes):
+    """Liefert (name, setup) – setup() bereitet die Daten vor und gibt die zu messende Funktion zurück."""
+    settings = dict(vai.DEFAULT_SETTINGS, width_cm='30', height_cm='22.5', input_dpi='300')
+    benchmarks = [
+        ('gpl_read', lambda: (lambda: vai.read_gpl_file(fixtures.gpl_path))),
+        ('palette_compile', lambda: (lambda: vai.compile_palette(fixtures.gpl_path, 549))),
+        ('palette_cached', lambda: (lambda: vai.create_palette_from_gpl(fixtures.gpl_path, 549))),
+        ('sizing', lambda: (lambda: vai.compute_upscale_target(
+            1000, 750, vai.parse_job_parameters(settings)))),
+    ]
+
+    for label in sizes:
+        long_side = SIZES[label]
+
+        def upscale(long_side=long_side):
+            # Upscaling wie in vectorize_image: halbe Kantenlänge -> Zielgröße mit LANCZOS
+            img = fixtures.image(long_side // 2)
+            target = (long_side, long_side * 3 // 4)
+            return lambda: img.resize(target, vai.resample_method)
+
+        def png_save(long_side=long_side):
+            img = fixtures.image(long_side)
+            return lambda: img.save(BytesIO(), format='PNG', dpi=(300, 300))
+
+        def png_stream(long_side=long_side):
+            img = fixtures.image(long_side)
+            return lambda: vai.upscale_tiled(img, img.size, BytesIO(), dpi=(300, 300))
+
+        def upload_encode(long_side=long_side):
+            path = fixtures.image_path(long_side // 2)
+            target = (long_side, long_side * 3 // 4)
+            return lambda: vai.encode_upload_image(path, target, 300, BytesIO())
+
+        def display_build(long_side=long_side):
+            path = fixtures.image_path(long_side)
+            return lambda: vai.DisplayPyramid(vai.open_reduced_image(path, vai.DISPLAY_MAX_SIZE))
+
+        def display_resize(long_side=long_side, fast=False):
+            pyramid = vai.DisplayPyramid(fixtures.image(long_side))
+            return lambda: pyramid.render(CANVAS_SIZE, fast=fast)
+
+        benchmarks += [
+            (f'upscale_lanczos_{label}', upscale),
+            (f'png_save_{label}', png_save),
+            (f'png_stream_{label}', png_stream),
+            (f'upload_encode_{label}', upload_encode),
+            (f'display_build_{label}', display_build),
+            (f'display_resize_{label}', display_resize),
+            (f'display_resize_fast_{label}', lambda display_resize=display_resize: display_resize(fast=True)),
+        ]
+    return benchmarks
+
+
+def measure(func, repeat):
+    """Führt `func` zum Aufwärmen einmal aus und misst dann `repeat`-mal (Zeiten pro Aufruf).
+
+    Pro Messung wird `func` so oft aufgerufen, dass sie mindestens MIN_SAMPLE_S dauert.
+    """
+    started = time.perf_counter()
+    func()
+    number = max(1, math.ceil(MIN_SAMPLE_S / max(time.perf_counter() - started, 1e-9)))
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - started) / number)
+    return {'median_s': statistics.median(times), 'min_s': min(times), 'repeat': repeat, 'number': number}
+
+
+def environment():
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'pillow': Image.__version__,
+        'numpy': numpy_version,
+    }
+
+
+def load_baseline(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def format_ms(seconds):
+    if seconds is None:
+        return '-'
+    return f"{seconds * 1000:.3f}" if seconds < 0.001 else f"{seconds * 1000:.1f}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-Benchmarks der lokalen Hot Paths von vectorizer_ai.")
+    parser.add_argument('--sizes', default='1k,4k,8k', help="Bildgrößen, kommagetrennt (1k, 4k, 8k)")
+    parser.add_argument('--filter', default='', help="Nur Benchmarks, deren Name diesen Text enthält")
+    parser.add_argument('--repeat', type=int, default=5, help="Messungen pro Benchmark")
+    parser.add_argument('--gpl', default=None, help="GPL-Datei (Standard: malango_colors.gpl, sonst synthetisch)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline-Datei (JSON)")
+    parser.add_argument('--save-baseline', action='store_true', help="Ergebnisse in die Baseline übernehmen")
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help="Erlaubte Verschlechterung gegenüber der Baseline (0.15 = 15 %%)")
+    parser.add_argument('--strict', action='store_true',
+                        help="Regressionen auch bewerten, wenn die Baseline aus einer anderen Umgebung stammt")
+    parser.add_argument('--output', default=None, help="Ergebnisse zusätzlich als JSON speichern")
+    args = parser.parse_args(argv)
+
+    sizes = [size.strip() for size in args.sizes.split(',') if size.strip()]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        parser.error(f"Unbekannte Größe(n): {', '.join(unknown)} (erlaubt: {', '.join(SIZES)})")
+
+    # Log-Ausgaben der gemessenen Funktionen würden die Zeiten verfälschen
+    logging.disable(logging.WARNING)
+
+    baseline = load_baseline(args.baseline)
+    env = environment()
+    foreign_baseline = baseline is not None and baseline.get('environment') != env
+    if foreign_baseline:
+        print(f"Hinweis: Baseline {args.baseline} stammt aus einer anderen Umgebung; "
+              + ("Regressionen werden trotzdem bewertet (--strict)." if args.strict
+                 else "Zahlen nur zur Information, keine Bewertung (--strict zum Bewerten)."))
+    baseline_results = (baseline or {}).get('benchmarks', {})
+
+    results = {}
+    regressions = []
+    with tempfile.TemporaryDirectory(prefix='vectorizer_bench_') as folder:
+        gpl_path = args.gpl or DEFAULT_GPL
+        if not os.path.exists(gpl_path):
+            gpl_path = os.path.join(folder, 'benchmark.gpl')
+            make_test_gpl(gpl_path)
+        fixtures = Fixtures(folder, gpl_path)
+
+        print(f"{'Benchmark':<28} {'Median ms':>11} {'Min ms':>11} {'Baseline min':>12} {'Änderung':>9}")
+        for name, setup in build_benchmarks(fixtures, sizes):
+            if args.filter and args.filter not in name:
+                continue
+            result = measure(setup(), args.repeat)
+            results[name] = result
+            reference = baseline_results.get(name, {}).get('min_s')
+            change = ''
+            if reference:
+                ratio = result['min_s'] / reference - 1
+                change = f"{ratio:+.1%}"
+                if ratio > args.threshold:
+                    regressions.append((name, ratio))
+                    change += ' !'
+            print(f"{name:<28} {format_ms(result['median_s']):>11} {format_ms(result['min_s']):>11} "
+                  f"{format_ms(reference):>12} {change:>9}", flush=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'environment': env, 'benchmarks': results}, f, indent=2)
+
+    if args.save_baseline:
+        merged = dict(baseline_results) if baseline is not None and baseline.get('environment') == env else {}
+        merged.update(results)
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'environment': env, 'saved': time.strftime('%Y-%m-%d %H:%M:%S'), 'benchmarks': merged},
+                      f, indent=2, sort_keys=True)
+        print(f"Baseline gespeichert: {args.baseline}")
+        return 0
+
+    if regressions and (args.strict or not foreign_baseline):
+        print(f"{len(regressions)} Regression(en) über {args.threshold:.0%}: "
+              + ', '.join(f"{name} ({ratio:+.1%})" for name, ratio in regressions))
+        return 1
+    if baseline is None:
+        print(f"Keine Baseline unter {args.baseline}; mit --save-baseline anlegen.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
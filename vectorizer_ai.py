@@ -1,691 +1,2258 @@
-import requests
-import tkinter as tk
-from tkinter import filedialog, ttk, messagebox
+import time
+# Startzeitpunkt vor allen weiteren Importen (für den Startzeit-Bericht)
+STARTUP_STARTED = time.perf_counter()
+
 import configparser
 import os
-from PIL import Image, ImageTk
+from PIL import Image
 import threading
 import logging
 from io import BytesIO
+import argparse
+import collections
+import concurrent.futures
+import contextlib
+import email.utils
+import functools
+import glob
+import hashlib
+import importlib
+import importlib.util
+import io
+import itertools
+import json
+import multiprocessing
+import queue
+import random
+import re
+import shutil
+import sqlite3
+import struct
+import sys
+import tempfile
+import uuid
+import zlib
+import xml.etree.ElementTree as ElementTree
+
+
+
+class LazyModule:
+    """Stellvertreter für ein Modul, das erst beim ersten Attributzugriff importiert wird (threadsicher)."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, attr):
+        module = self._module
+        if module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+                module = self._module
+        return getattr(module, attr)
+
+    def __repr__(self):
+        return f"<LazyModule {self._name!r}{' (geladen)' if self._module is not None else ''}>"
+
+
+def lazy_import(name, optional=False):
+    """Bindet ein Modul ein, das erst beim ersten Attributzugriff tatsächlich geladen wird.
+
+    Fehlt ein optionales Modul, wird None zurückgegeben, sodass `modul is None`-Prüfungen
+    wie bei optionalen Importen funktionieren, ohne den Programmstart zu verlangsamen.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    if importlib.util.find_spec(name) is None:
+        if optional:
+            return None
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    return LazyModule(name)
 
-# Versuch, cairosvg zu importieren
-try:
-    import cairosvg
-except ImportError:
-    cairosvg = None
+
+# Schwere Module erst bei Bedarf laden: Batch-Worker und Upscale-Prozesse brauchen weder
+# requests noch cairosvg, und der GUI-Start wartet nicht auf numpy.
+requests = lazy_import('requests')
+# Optional, für die Anzeige von SVG-Dateien
+cairosvg = lazy_import('cairosvg', optional=True)
+# Optional, für Palette-Reduktion und Offline-Vorschau
+np = lazy_import('numpy', optional=True)
 
 try:
     from PIL import Resampling
     resample_method = Resampling.LANCZOS
+    fast_resample_method = Resampling.BILINEAR
 except ImportError:
     resample_method = Image.LANCZOS
-
-class VectorizerApp(tk.Tk):
-    def __init__(self):
-        super().__init__()
-        self.title("Vectorizer AI Tool")
-        self.geometry("1200x800")
-        self.config_file = 'config.ini'
-        self.config = configparser.ConfigParser()
-
-        # Logging konfigurieren
-        logging.basicConfig(
-            level=logging.DEBUG,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler("vectorizer_app.log", encoding='utf-8'),
-                logging.StreamHandler()
-            ]
+    fast_resample_method = Image.BILINEAR
+
+API_BASE_URL = 'https://de.vectorizer.ai/api/v1'
+
+# Maximale Dimension für Upscaling (um Timeouts zu vermeiden)
+MAX_DIMENSION = 8000
+# Erst ab diesem Faktor wird lokal hochskaliert
+UPSCALE_THRESHOLD = 1.1
+
+# Standardwerte der Einstellungen (Schlüssel wie in config.ini)
+DEFAULT_SETTINGS = {
+    'api_key': '',
+    'api_secret': '',
+    'input_base_folder': '',
+    'output_folder': '',
+    'palette': '',
+    'mode': 'preview',
+    'output.file_format': 'png',
+    'gpl_file_path': '',
+    'line_fit_tolerance': '0.1',
+    'anti_aliasing_mode': 'anti_aliased',
+    'input_dpi': '96',
+    'output_dpi': '96',
+    'processing.max_colors': '36',
+    'processing.shapes.min_area_px': '50',
+    'skin_tone_count': '549',
+    # HTTP-Verbindung zur API
+    'api_base_url': API_BASE_URL,
+    'http_pool_size': '8',
+    'connect_timeout': '10',
+    'read_timeout': '300',
+    # Lokaler Ergebnis-Cache (0 MB = deaktiviert, leerer Ordner = cache/results im Skript-Verzeichnis)
+    'result_cache_folder': '',
+    'result_cache_max_mb': '1024',
+    # Hochskalierte Uploads bis zu dieser Größe im RAM halten, darüber in einer Datei im lokalen Temp-Ordner
+    # (nur ohne Prozess-Pool; die Worker des Pools schreiben immer in eine Datei im lokalen Temp-Ordner)
+    'upload_spool_max_mb': '64',
+    'local_temp_folder': '',
+    # Ratenbegrenzung und Wiederholungen für API-Aufrufe (api_rate_limit 0 = unbegrenzt)
+    'api_rate_limit': '5',
+    'api_rate_burst': '5',
+    'max_retries': '5',
+    'backoff_base_s': '1',
+    'backoff_max_s': '60',
+    'job_deadline_s': '900',
+    # Preview-Ergebnisse serverseitig aufbewahren, damit Production ohne erneuten Upload geladen werden kann
+    # (Tage; leer = policy.retention_days nicht senden, es gilt die Voreinstellung der API)
+    'retention_days': '',
+    'preview_token_file': '',
+    # Palette pro Bild auf plausible Treffer reduzieren (benötigt numpy); Abstand im RGB-Raum und
+    # Mindestanteil (Prozent der Pixel), ab dem eine Bildfarbe berücksichtigt wird
+    'palette_prune': 'false',
+    'palette_prune_margin': '30',
+    'palette_prune_min_share': '0.05',
+    # Ab dieser Zielgröße (Megapixel) wird streifenweise hochskaliert, um den Speicherbedarf zu begrenzen
+    'tiled_upscale_min_mpx': '16',
+    'upscale_tile_rows': '256',
+    # Prozesse für Upscaling/PNG-Kodierung (0 = automatisch, Anzahl CPU-Kerne bis höchstens 4; 1 = im aktuellen Thread)
+    'upscale_processes': '0',
+    # Cache für hochskalierte Upload-Bilder (0 MB = deaktiviert, leerer Ordner = cache/upscaled im Skript-Verzeichnis)
+    'upscale_cache_folder': '',
+    'upscale_cache_max_mb': '2048',
+    # Index der Auftragsordner (leer = cache/folder_index.sqlite); spätestens nach folder_index_max_age_s neu einlesen
+    'folder_index_file': '',
+    'folder_index_max_age_s': '300',
+    # Überwachungsmodus: Abfrageintervall des Input Basisordners in Sekunden; alle watch_full_scan_s
+    # Sekunden wird input.png in allen Ordnern geprüft (an Ort und Stelle überschriebene Dateien)
+    'watch_interval_s': '2',
+    'watch_full_scan_s': '300',
+    # Persistente Job-Liste für Batch/Überwachung (leer = cache/jobs.sqlite)
+    'job_store_file': '',
+    # GUI: nächste Auftragsnummern im Hintergrund vorladen (Anzahl, Speicherobergrenze der Vorschaubilder)
+    'prefetch_depth': '3',
+    'prefetch_max_mb': '256',
+    # Zeiten pro Stufe jedes Jobs als JSON-Zeilen (leer = cache/job_timings.jsonl)
+    'timing_log_file': '',
+}
+
+# Einstellungen ohne eigenes GUI-Feld; werden nur über config.ini gepflegt und beim Speichern übernommen
+ADVANCED_SETTING_KEYS = ['api_base_url', 'http_pool_size', 'connect_timeout', 'read_timeout',
+                         'result_cache_folder', 'result_cache_max_mb', 'upload_spool_max_mb', 'local_temp_folder',
+                         'api_rate_limit', 'api_rate_burst', 'max_retries', 'backoff_base_s', 'backoff_max_s',
+                         'job_deadline_s', 'retention_days', 'preview_token_file',
+                         'palette_prune', 'palette_prune_margin', 'palette_prune_min_share',
+                         'tiled_upscale_min_mpx', 'upscale_tile_rows',
+                         'upscale_processes', 'upscale_cache_folder', 'upscale_cache_max_mb',
+                         'folder_index_file', 'folder_index_max_age_s', 'watch_interval_s', 'watch_full_scan_s',
+                         'job_store_file', 'prefetch_depth', 'prefetch_max_mb',
+                         'timing_log_file']
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__)) if '__file__' in globals() else os.getcwd()
+
+
+class ApiError(Exception):
+    """Fehlerhafte oder unerwartete Antwort der Vectorizer.ai API."""
+
+
+class MultipartUpload:
+    """Gestreamter multipart/form-data Body aus Formularfeldern und einer Datei.
+
+    Der Body wird nicht im Speicher zusammengesetzt: requests liest ihn blockweise über read()
+    und sendet ihn mit fester Content-Length. seek(0) setzt den Body für Wiederholungen zurück.
+    `progress` wird nach jedem gelesenen Block mit (gesendete_bytes, gesamt_bytes) aufgerufen.
+    """
+
+    def __init__(self, fields, file_field, fileobj, filename, file_content_type='application/octet-stream',
+                 progress=None):
+        self.boundary = uuid.uuid4().hex
+        head = b''.join(
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode('utf-8')
+            for name, value in fields.items())
+        head += (f'--{self.boundary}\r\nContent-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+                 f'Content-Type: {file_content_type}\r\n\r\n').encode('utf-8')
+        tail = f'\r\n--{self.boundary}--\r\n'.encode('utf-8')
+
+        self._file = fileobj
+        self._file_start = fileobj.tell()
+        fileobj.seek(0, os.SEEK_END)
+        file_size = fileobj.tell() - self._file_start
+        fileobj.seek(self._file_start)
+
+        self._parts = [BytesIO(head), fileobj, BytesIO(tail)]
+        self.len = len(head) + file_size + len(tail)
+        self._index = 0
+        self._position = 0
+        self._progress = progress
+
+    @property
+    def content_type(self):
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def __len__(self):
+        return self.len
+
+    def __iter__(self):
+        return iter(lambda: self.read(64 * 1024), b'')
+
+    def read(self, size=-1):
+        chunks = []
+        remaining = self.len - self._position if size is None or size < 0 else size
+        while remaining > 0 and self._index < len(self._parts):
+            chunk = self._parts[self._index].read(remaining)
+            if not chunk:
+                self._index += 1
+                continue
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        data = b''.join(chunks)
+        self._position += len(data)
+        if self._progress is not None and data:
+            self._progress(self._position, self.len)
+        return data
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if offset != 0 or whence != os.SEEK_SET:
+            raise io.UnsupportedOperation("MultipartUpload kann nur an den Anfang zurückgesetzt werden")
+        self._parts[0].seek(0)
+        self._file.seek(self._file_start)
+        self._parts[2].seek(0)
+        self._index = 0
+        self._position = 0
+        return 0
+
+
+class RetryScheduler:
+    """Ratenbegrenzung und Wiederholungen für API-Aufrufe.
+
+    Ein Token-Bucket begrenzt die Anzahl gestarteter Anfragen pro Sekunde über alle Threads.
+    Antworten mit 429 oder 5xx sowie Verbindungsfehler werden mit exponentiellem Backoff und
+    Jitter wiederholt; ein Retry-After-Header hat Vorrang und pausiert bei 429 den ganzen Bucket.
+    Ein Lese-Timeout wird nur bei idempotenten Aufrufen wiederholt: Die Anfrage ist dann bereits
+    vollständig beim Server angekommen und wurde ggf. schon berechnet und abgerechnet.
+    Jeder Aufruf kann eine Deadline (time.monotonic()) haben, nach der nicht mehr wiederholt wird.
+    """
+
+    RETRY_STATUS = {429, 500, 502, 503, 504}
+
+    def __init__(self, rate=5.0, burst=5, max_retries=5, backoff_base=1.0, backoff_max=60.0):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._cond = threading.Condition()
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        # Zähler
+        self.waiting = 0
+        self.in_flight = 0
+        self.attempts = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.server_errors = 0
+        self.connection_errors = 0
+        self.gave_up = 0
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(
+            rate=float(settings.get('api_rate_limit') or 0),
+            burst=int(settings.get('api_rate_burst') or 1),
+            max_retries=int(settings.get('max_retries') or 0),
+            backoff_base=float(settings.get('backoff_base_s') or 1),
+            backoff_max=float(settings.get('backoff_max_s') or 60),
         )
-        logging.info("VectorizerApp gestartet.")
-
-        # Variablen
-        self.api_key = tk.StringVar()
-        self.api_secret = tk.StringVar()
-        self.image_path = tk.StringVar()
-        self.palette = tk.StringVar()
-        self.mode = tk.StringVar(value='preview')  # Standardmodus von 'test' zu 'preview' geändert
-        self.output_format = tk.StringVar(value='png')  # Voreinstellung auf 'PNG'
-        self.gpl_file_path = tk.StringVar()
-        self.width_cm = tk.StringVar()
-        self.height_cm = tk.StringVar()
-        self.input_dpi = tk.StringVar(value='96')  # Standardwert für Input DPI
-        self.output_dpi = tk.StringVar(value='96')  # Standardwert für Output DPI
-        self.input_base_folder = tk.StringVar()
-        self.output_folder = tk.StringVar()
-        self.folder_number = tk.StringVar()
-        self.display_image = None
-        self.result_image = None
-        self.script_dir = os.path.dirname(os.path.abspath(__file__)) if '__file__' in globals() else os.getcwd()
-        self.progress_label = None
-        # Speichere ursprüngliche Bildgröße für Skalierung
-        self.original_image_width_px = None
-        self.original_image_height_px = None
-        self.original_image_dpi = None
-
-        # Variablen für Detailgrad, Glättung und maximale Farben in der Hauptoberfläche
-        self.line_fit_tolerance = tk.StringVar()
-        self.anti_aliasing_mode = tk.StringVar()
-        self.max_colors = tk.StringVar(value='36')  # Standardwert auf 36 gesetzt
-        self.min_area_px = tk.StringVar(value='50')  # Standardwert auf 50 gesetzt
-        self.skin_tone_count = tk.StringVar(value='549')  # Anzahl der Skin Tones am Anfang der Palette (Standard: bis CH)
-
-        self.load_settings()
-        self.create_gui()
-
-        # Trace für Mode-Änderungen hinzufügen
-        self.mode.trace_add('write', self.on_mode_change)
-
-    def create_gui(self):
-        main_frame = ttk.Frame(self)
-        main_frame.pack(fill='both', expand=True)
-
-        # Obere Frames für Bedienelemente
-        top_frame = ttk.Frame(main_frame)
-        top_frame.pack(side='top', fill='x')
-
-        # Bedienelemente links
-        controls_frame = ttk.Frame(top_frame)
-        controls_frame.pack(side='left', fill='x', expand=True, padx=5, pady=5)
-
-        self.progress_label = ttk.Label(top_frame, text="")
-        self.progress_label.pack(side='left', padx=10)
-
-        # Untere Frames für Bilder
-        bottom_frame = ttk.Frame(main_frame)
-        bottom_frame.pack(side='top', fill='both', expand=True)
-
-        # Eingabe- und Ausgabebilder nebeneinander
-        original_frame = ttk.Frame(bottom_frame)
-        original_frame.pack(side='left', fill='both', expand=True, padx=5, pady=5)
-
-        original_label = ttk.Label(original_frame, text="Originalbild:")
-        original_label.pack(anchor='w')
-
-        self.original_canvas = tk.Canvas(original_frame, bg='grey')
-        self.original_canvas.pack(fill='both', expand=True)
-
-        result_frame = ttk.Frame(bottom_frame)
-        result_frame.pack(side='left', fill='both', expand=True, padx=5, pady=5)
-
-        result_label = ttk.Label(result_frame, text="Vektorisierte Ausgabe:")
-        result_label.pack(anchor='w')
-
-        self.result_canvas = tk.Canvas(result_frame, bg='grey')
-        self.result_canvas.pack(fill='both', expand=True)
-
-        # Bedienelemente erstellen
-        self.create_controls(controls_frame)
-
-        # Bildanpassung bei Größenänderung
-        self.original_canvas.bind("<Configure>", lambda event: self.resize_image(event, original=True))
-        self.result_canvas.bind("<Configure>", lambda event: self.resize_image(event, original=False))
-
-    def create_controls(self, parent):
-        # Bildauswahl
-        frame_manual = ttk.LabelFrame(parent, text="Bildauswahl")
-        frame_manual.pack(padx=5, pady=5, fill='x')
-
-        lbl_image = ttk.Label(frame_manual, text="Bilddatei:")
-        lbl_image.grid(row=0, column=0, padx=5, pady=5, sticky='w')
-
-        entry_image = ttk.Entry(frame_manual, textvariable=self.image_path)
-        entry_image.grid(row=0, column=1, padx=5, pady=5, sticky='ew')
-
-        btn_browse = ttk.Button(frame_manual, text="Durchsuchen", command=self.browse_image)
-        btn_browse.grid(row=0, column=2, padx=5, pady=5)
-
-        frame_manual.columnconfigure(1, weight=1)
-
-        # Ordnernummer
-        frame_number = ttk.LabelFrame(parent, text="Bild aus Ordner laden")
-        frame_number.pack(padx=5, pady=5, fill='x')
-
-        lbl_number = ttk.Label(frame_number, text="Ordnernummer:")
-        lbl_number.grid(row=0, column=0, padx=5, pady=5, sticky='w')
-
-        entry_number = ttk.Entry(frame_number, textvariable=self.folder_number)
-        entry_number.grid(row=0, column=1, padx=5, pady=5, sticky='w')
-        entry_number.bind("<Return>", lambda event: self.load_image_by_number())
-
-        btn_load = ttk.Button(frame_number, text="Laden", command=self.load_image_by_number)
-        btn_load.grid(row=0, column=2, padx=5, pady=5)
-
-        # Parameter
-        frame_parameters = ttk.LabelFrame(parent, text="Parameter")
-        frame_parameters.pack(padx=5, pady=5, fill='x')
-
-        # Maßeingabe
-        lbl_width = ttk.Label(frame_parameters, text="Breite (cm):")
-        lbl_width.grid(row=0, column=0, padx=5, pady=5, sticky='w')
-
-        entry_width = ttk.Entry(frame_parameters, textvariable=self.width_cm)
-        entry_width.grid(row=0, column=1, padx=5, pady=5, sticky='ew')
-
-        lbl_height = ttk.Label(frame_parameters, text="Höhe (cm):")
-        lbl_height.grid(row=1, column=0, padx=5, pady=5, sticky='w')
-
-        entry_height = ttk.Entry(frame_parameters, textvariable=self.height_cm)
-        entry_height.grid(row=1, column=1, padx=5, pady=5, sticky='ew')
-
-        # Output Format
-        lbl_output_format = ttk.Label(frame_parameters, text="Ausgabeformat:")
-        lbl_output_format.grid(row=2, column=0, padx=5, pady=5, sticky='w')
-
-        frame_output_format = ttk.Frame(frame_parameters)
-        frame_output_format.grid(row=2, column=1, padx=5, pady=5, sticky='w')
-
-        formats = [("PNG", "png"), ("SVG", "svg")]
-        self.rb_output_formats = {}  # Dictionary zur Speicherung der Radiobutton-Referenzen
-        for text, value in formats:
-            rb_format = ttk.Radiobutton(frame_output_format, text=text, variable=self.output_format, value=value)
-            rb_format.pack(side='left', padx=5)
-            self.rb_output_formats[value] = rb_format  # Speichern der Referenz
-
-        # Mode Selection
-        lbl_mode = ttk.Label(frame_parameters, text="Modus:")
-        lbl_mode.grid(row=3, column=0, padx=5, pady=5, sticky='w')
-
-        frame_mode = ttk.Frame(frame_parameters)
-        frame_mode.grid(row=3, column=1, padx=5, pady=5, sticky='w')
-
-        modes = [("Preview", "preview"), ("Production", "production")]  # "Test" Modus entfernt
-        for text, value in modes:
-            rb_mode = ttk.Radiobutton(frame_mode, text=text, variable=self.mode, value=value)
-            rb_mode.pack(side='left', padx=5)
-
-        # Detailgrad
-        lbl_line_fit_tolerance = ttk.Label(frame_parameters, text="Detailgrad (line_fit_tolerance):")
-        lbl_line_fit_tolerance.grid(row=4, column=0, padx=5, pady=5, sticky='w')
-
-        entry_line_fit_tolerance = ttk.Entry(frame_parameters, textvariable=self.line_fit_tolerance)
-        entry_line_fit_tolerance.grid(row=4, column=1, padx=5, pady=5, sticky='ew')
-
-        # Glättung (Anti-Aliasing)
-        lbl_anti_aliasing_mode = ttk.Label(frame_parameters, text="Glättung (anti_aliasing_mode):")
-        lbl_anti_aliasing_mode.grid(row=5, column=0, padx=5, pady=5, sticky='w')
-
-        combo_anti_aliasing_mode = ttk.Combobox(frame_parameters, textvariable=self.anti_aliasing_mode, values=['anti_aliased', 'aliased'])
-        combo_anti_aliasing_mode.grid(row=5, column=1, padx=5, pady=5, sticky='ew')
-        combo_anti_aliasing_mode.current(0)  # Standardwert: 'anti_aliased'
-
-        # Mindestfläche hinzufügen
-        lbl_min_area = ttk.Label(frame_parameters, text="Mindestfläche (px):")
-        lbl_min_area.grid(row=6, column=0, padx=5, pady=5, sticky='w')
-
-        entry_min_area = ttk.Entry(frame_parameters, textvariable=self.min_area_px)
-        entry_min_area.grid(row=6, column=1, padx=5, pady=5, sticky='ew')
-        # Die folgende Zeile entfernen, da der Wert bereits im __init__ gesetzt wird
-        # entry_min_area.insert(0, '50')
-
-        # Maximale Farben
-        lbl_max_colors = ttk.Label(frame_parameters, text="Maximale Farben:")
-        lbl_max_colors.grid(row=7, column=0, padx=5, pady=5, sticky='w')
-
-        entry_max_colors = ttk.Entry(frame_parameters, textvariable=self.max_colors)
-        entry_max_colors.grid(row=7, column=1, padx=5, pady=5, sticky='ew')
-
-        # Skin Tone Count (Anzahl der Skin Tones am Anfang der Palette)
-        lbl_skin_tone = ttk.Label(frame_parameters, text="Skin Tones (Anzahl am Anfang):")
-        lbl_skin_tone.grid(row=8, column=0, padx=5, pady=5, sticky='w')
-
-        entry_skin_tone = ttk.Entry(frame_parameters, textvariable=self.skin_tone_count)
-        entry_skin_tone.grid(row=8, column=1, padx=5, pady=5, sticky='ew')
-
-        frame_parameters.columnconfigure(1, weight=1)
-
-        # Buttons in einer Zeile
-        button_frame = ttk.Frame(parent)
-        button_frame.pack(padx=5, pady=10, fill='x')
-
-        btn_start = ttk.Button(button_frame, text="Vektorisieren", command=self.start_vectorization_thread)
-        btn_start.pack(side='left', padx=5, pady=5)
-
-        btn_settings = ttk.Button(button_frame, text="Einstellungen", command=self.open_settings_window)
-        btn_settings.pack(side='left', padx=5, pady=5)
-
-        btn_open_images = ttk.Button(button_frame, text="Bilder in neuem Fenster öffnen", command=self.open_images_in_new_window)
-        btn_open_images.pack(side='left', padx=5, pady=5)
 
-    def browse_image(self):
-        file_path = filedialog.askopenfilename(filetypes=[("Bilddateien", "*.bmp;*.gif;*.jpeg;*.jpg;*.png;*.tiff;*.svg")])
-        if file_path:
-            self.image_path.set(file_path)
-            self.display_image_on_canvas(file_path, original=True)
-            self.calculate_image_dimensions(file_path)
-
-    def calculate_image_dimensions(self, image_path):
+    def _acquire(self, deadline):
+        with self._cond:
+            self.waiting += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self.rate > 0:
+                        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+                    self._last_refill = now
+                    wait = self._paused_until - now
+                    if wait <= 0:
+                        if self.rate <= 0 or self._tokens >= 1:
+                            if self.rate > 0:
+                                self._tokens -= 1
+                            self.in_flight += 1
+                            self.attempts += 1
+                            return
+                        wait = (1 - self._tokens) / self.rate
+                    if deadline is not None and now + wait > deadline:
+                        self.gave_up += 1
+                        raise ApiError("Zeitlimit für den Job überschritten (Warteschlange der API-Aufrufe).")
+                    self._cond.wait(wait)
+            finally:
+                self.waiting -= 1
+
+    def _release(self):
+        with self._cond:
+            self.in_flight -= 1
+
+    def pause(self, seconds):
+        """Hält alle wartenden Aufrufe für `seconds` Sekunden an (z.B. nach einem 429)."""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    @staticmethod
+    def parse_retry_after(value):
+        """Retry-After als Sekunden (Zahl oder HTTP-Datum) oder None."""
+        if not value:
+            return None
         try:
-            with Image.open(image_path) as img:
-                dpi = img.info.get('dpi', (96, 96))
-                # Ursprüngliche Bildgröße in Pixeln speichern
-                self.original_image_width_px = img.width
-                self.original_image_height_px = img.height
-                self.original_image_dpi = dpi[0] if isinstance(dpi, tuple) else dpi
-                
-                width_inch = img.width / dpi[0]
-                height_inch = img.height / dpi[1]
-                width_cm = round(width_inch * 2.54, 2)
-                height_cm = round(height_inch * 2.54, 2)
-                self.width_cm.set(str(width_cm))
-                self.height_cm.set(str(height_cm))
-                logging.debug(f"Berechnete Maße: {width_cm} cm x {height_cm} cm")
-                logging.debug(f"Ursprüngliche Bildgröße: {img.width}px x {img.height}px @ {dpi[0]} DPI")
-        except Exception as e:
-            logging.error(f"Fehler beim Berechnen der Bildmaße: {e}")
-
-    def display_image_on_canvas(self, image_path, original=True, canvas=None, photo_holder=None):
+            return max(0.0, float(value))
+        except ValueError:
+            pass
         try:
-            if image_path.lower().endswith('.svg'):
-                if cairosvg is None:
-                    messagebox.showwarning("Warnung", "Die Anzeige von SVG-Dateien erfordert das 'cairosvg' Modul.")
-                    logging.warning("SVG-Datei angezeigt, aber 'cairosvg' ist nicht installiert.")
-                    return
+            retry_at = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, retry_at.timestamp() - time.time())
+
+    def backoff(self, attempt):
+        """Exponentieller Backoff mit vollem Jitter."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def run(self, send, deadline=None, on_wait=None, idempotent=False):
+        """Führt `send()` mit Ratenbegrenzung und Wiederholungen aus und gibt die letzte Antwort zurück.
+
+        Ohne `idempotent` wird ein Lese-Timeout nicht wiederholt, sondern sofort weitergeworfen.
+
+        Nach ausgeschöpften Wiederholungen wird die letzte (Fehler-)Antwort zurückgegeben bzw. der
+        letzte Verbindungsfehler geworfen. `on_wait(sekunden)` wird nach jeder Wartezeit aufgerufen
+        (Token-Bucket inkl. Retry-After-Pause vor jedem Versuch, Backoff danach), zuletzt also
+        unmittelbar vor send().
+        """
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            self._acquire(deadline)
+            if on_wait is not None:
+                on_wait(time.perf_counter() - started)
+            response = error = None
+            try:
+                response = send()
+            except requests.ConnectionError as e:
+                # Inkl. ConnectTimeout: Die Anfrage hat den Server nicht erreicht
+                error = e
+            except requests.Timeout as e:
+                if not idempotent:
+                    logging.error(f"Zeitüberschreitung beim Warten auf die API-Antwort, keine Wiederholung "
+                                  f"(Anfrage wurde ggf. bereits berechnet): {e}")
+                    raise
+                error = e
+            finally:
+                self._release()
+
+            if response is not None and response.status_code not in self.RETRY_STATUS:
+                return response
+
+            retry_after = None
+            with self._cond:
+                if error is not None:
+                    self.connection_errors += 1
+                    reason = f"Verbindungsfehler: {error}"
+                elif response.status_code == 429:
+                    self.rate_limited += 1
+                    reason = "Ratenlimit (429)"
                 else:
-                    try:
-                        # Verbesserte Behandlung von UNC-Pfaden
-                        normalized_path = os.path.normpath(image_path)
-                        if normalized_path.startswith('\\\\'):
-                            # UNC-Pfad korrekt formatieren
-                            file_url = 'file:' + normalized_path.replace('\\', '/')
-                        else:
-                            # Lokaler Pfad
-                            file_url = 'file:///' + normalized_path.replace('\\', '/')
-                        
-                        logging.debug(f"Versuche SVG zu laden von: {file_url}")
-                        png_data = cairosvg.svg2png(url=file_url)
-                        img = Image.open(BytesIO(png_data))
-                    except Exception as e:
-                        logging.error(f"Fehler beim Konvertieren der SVG-Datei: {e}")
-                        # Versuche alternative Methode mit direktem Lesen
-                        try:
-                            with open(image_path, 'rb') as svg_file:
-                                svg_content = svg_file.read()
-                                png_data = cairosvg.svg2png(bytestring=svg_content)
-                                img = Image.open(BytesIO(png_data))
-                                logging.info("SVG erfolgreich mit alternativer Methode geladen")
-                        except Exception as e2:
-                            logging.error(f"Auch alternative Methode fehlgeschlagen: {e2}")
-                            messagebox.showerror("Fehler", f"Fehler beim Konvertieren der SVG-Datei:\n{e2}")
-                            return
-            else:
-                img = Image.open(image_path)
-
-            if not canvas:
-                canvas = self.original_canvas if original else self.result_canvas
-            canvas_width = canvas.winfo_width()
-            canvas_height = canvas.winfo_height()
-            if canvas_width <= 1 or canvas_height <= 1:
-                self.update_idletasks()
-                canvas_width = canvas.winfo_width()
-                canvas_height = canvas.winfo_height()
-            img_ratio = img.width / img.height
-            canvas_ratio = canvas_width / canvas_height
-            if img_ratio > canvas_ratio:
-                new_width = canvas_width
-                new_height = int(new_width / img_ratio)
-            else:
-                new_height = canvas_height
-                new_width = int(new_height * img_ratio)
+                    self.server_errors += 1
+                    reason = f"Serverfehler ({response.status_code})"
+            if response is not None:
+                retry_after = self.parse_retry_after(response.headers.get('Retry-After'))
+            delay = retry_after if retry_after is not None else self.backoff(attempt)
+
+            if attempt >= self.max_retries or (deadline is not None and time.monotonic() + delay > deadline):
+                with self._cond:
+                    self.gave_up += 1
+                logging.error(f"API-Aufruf aufgegeben nach {attempt + 1} Versuchen: {reason}")
+                if error is not None:
+                    raise error
+                return response
+
+            if response is not None:
+                response.close()
+                if response.status_code == 429:
+                    self.pause(delay)
+            with self._cond:
+                self.retries += 1
+            attempt += 1
+            logging.warning(f"{reason} - Wiederholung {attempt}/{self.max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+            if on_wait is not None:
+                on_wait(delay)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'waiting': self.waiting,
+                'in_flight': self.in_flight,
+                'attempts': self.attempts,
+                'retries': self.retries,
+                'rate_limited': self.rate_limited,
+                'server_errors': self.server_errors,
+                'connection_errors': self.connection_errors,
+                'gave_up': self.gave_up,
+            }
+
+
+class VectorizerClient:
+    """Client für die Vectorizer.ai API mit gepoolter Keep-Alive-Session.
+
+    Wiederholte und parallele Aufrufe verwenden bestehende TCP/TLS-Verbindungen weiter,
+    statt für jedes Bild einen neuen Handshake zu machen. Die Session ist threadsicher
+    genug für parallele POSTs, solange der Pool groß genug ist (pool_size >= Anzahl Worker).
+    """
+
+    def __init__(self, api_key, api_secret, base_url=API_BASE_URL, pool_size=8,
+                 connect_timeout=10.0, read_timeout=300.0, scheduler=None):
+        self.base_url = base_url.rstrip('/')
+        self.scheduler = scheduler or RetryScheduler()
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        self.session.auth = (api_key, api_secret)
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(
+            settings['api_key'],
+            settings['api_secret'],
+            base_url=settings.get('api_base_url') or API_BASE_URL,
+            pool_size=max(1, int(settings.get('http_pool_size') or 8)),
+            connect_timeout=float(settings.get('connect_timeout') or 10),
+            read_timeout=float(settings.get('read_timeout') or 300),
+            scheduler=RetryScheduler.from_settings(settings),
+        )
 
-            # Sicherstellen, dass die neuen Dimensionen größer als 0 sind
-            if new_width <= 0 or new_height <= 0:
-                logging.error("Fehler beim Anzeigen des Bildes: Berechnete Bildgröße ist ungültig.")
+    def prewarm(self, connections=1):
+        """Baut vorab Verbindungen zur API auf (TCP + TLS), damit der erste Job keinen Handshake zahlt."""
+        connections = max(1, min(connections, self.pool_size))
+
+        def open_connection():
+            try:
+                self.session.head(self.base_url + '/', timeout=self.timeout).close()
+                return True
+            except requests.RequestException as e:
+                logging.warning(f"Vorab-Verbindung zur API fehlgeschlagen: {e}")
+                return False
+
+        started = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=connections) as executor:
+            opened = sum(executor.map(lambda _: open_connection(), range(connections)))
+        logging.info(f"{opened}/{connections} API-Verbindungen vorgewärmt in {time.perf_counter() - started:.2f}s")
+        return opened
+
+    def vectorize(self, image_file, data, filename='image.png', deadline=None, progress=None, on_wait=None):
+        """Sendet ein Bild (Dateiobjekt) an /vectorize und gibt die (gestreamte) Antwort zurück.
+
+        Läuft über den RetryScheduler; für jede Wiederholung wird das Bild erneut von vorne gesendet.
+        `progress` wird wie bei MultipartUpload mit dem Upload-Fortschritt aufgerufen, `on_wait` wie
+        bei RetryScheduler.run().
+        """
+        start = image_file.tell()
+
+        def send():
+            image_file.seek(start)
+            body = MultipartUpload(data, 'image', image_file, filename, progress=progress)
+            return self.session.post(
+                self.base_url + '/vectorize',
+                data=body,
+                headers={'Content-Type': body.content_type},
+                timeout=self.timeout,
+                stream=True
+            )
+
+        return self.scheduler.run(send, deadline, on_wait)
+
+    def download(self, image_token, receipt, output_data, deadline=None, on_wait=None):
+        """Lädt das Production-Ergebnis eines aufbewahrten Bildes über /download (ohne Upload)."""
+        fields = dict(output_data)
+        fields['image.token'] = image_token
+        if receipt:
+            fields['receipt'] = receipt
+
+        def send():
+            return self.session.post(
+                self.base_url + '/download',
+                data=fields,
+                timeout=self.timeout,
+                stream=True
+            )
+
+        # Erneutes Laden eines aufbewahrten Ergebnisses ist ohne zusätzliche Kosten wiederholbar
+        return self.scheduler.run(send, deadline, on_wait, idempotent=True)
+
+    def close(self):
+        self.session.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(settings):
+    """Gibt einen gemeinsam genutzten VectorizerClient für Zugangsdaten und Verbindungseinstellungen zurück."""
+    key = tuple(settings.get(name, '') for name in (
+        'api_key', 'api_secret', 'api_base_url', 'http_pool_size', 'connect_timeout', 'read_timeout',
+        'api_rate_limit', 'api_rate_burst', 'max_retries', 'backoff_base_s', 'backoff_max_s'))
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = VectorizerClient.from_settings(settings)
+        return client
+
+
+def hash_file(fileobj):
+    """SHA-256 (hex) über den Inhalt eines Dateiobjekts ab der aktuellen Position; spult danach zurück."""
+    digest = hashlib.sha256()
+    start = fileobj.tell()
+    for chunk in iter(lambda: fileobj.read(1024 * 1024), b''):
+        digest.update(chunk)
+    fileobj.seek(start)
+    return digest.hexdigest()
+
+
+def normalize_api_data(data):
+    """Normalisiert einen Data-Payload für Schlüsselbildung (Strings ohne Leerraum, Palette kleingeschrieben)."""
+    normalized = {k: str(v).strip() for k, v in data.items()}
+    if normalized.get('processing.palette'):
+        colors = [c.strip().lower() for c in normalized['processing.palette'].split(';') if c.strip()]
+        normalized['processing.palette'] = '; '.join(colors)
+    return normalized
+
+
+def payload_key(image_digest, data):
+    """Schlüssel aus Bild-Hash und normalisiertem Data-Payload."""
+    digest = hashlib.sha256(image_digest.encode('ascii'))
+    digest.update(b'\0')
+    digest.update(json.dumps(normalize_api_data(data), sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Inhaltsadressierter Datei-Cache für API-Ergebnisse mit LRU-Verdrängung nach Größe.
+
+    Der Schlüssel ist ein SHA-256 über die hochgeladenen Bildbytes und den normalisierten
+    Data-Payload (inkl. processing.palette); für hochskalierte Uploads siehe upscale_key().
+    Einträge liegen als <schlüssel>.svg/.png im
+    Cache-Ordner; die Zugriffsreihenfolge wird über die mtime der Dateien persistiert.
+    """
+
+    EXTENSIONS = {'image/svg+xml': '.svg', 'image/png': '.png'}
+
+    def __init__(self, folder, max_bytes):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()  # schlüssel -> (pfad, größe), älteste zuerst
+        self._total_bytes = 0
+        os.makedirs(folder, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        entries = []
+        for entry in os.scandir(self.folder):
+            key, ext = os.path.splitext(entry.name)
+            if entry.is_file() and ext == '.tmp':
+                # Reste abgebrochener Downloads
+                os.remove(entry.path)
+            elif entry.is_file() and ext in self.EXTENSIONS.values():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, key, entry.path, stat.st_size))
+        for _, key, path, size in sorted(entries):
+            self._entries[key] = (path, size)
+            self._total_bytes += size
+        logging.debug(f"Ergebnis-Cache geladen: {len(self._entries)} Einträge, {self._total_bytes / 1e6:.1f} MB")
+
+    @staticmethod
+    def make_key(image_digest, data):
+        """Schlüssel aus dem Hash der Bildbytes (hash_file()) und dem Data-Payload."""
+        return payload_key(image_digest, data)
+
+    def open(self, key):
+        """Öffnet einen Eintrag. Gibt (dateiobjekt, content_type) zurück oder None, wenn er fehlt."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+        path = entry[0]
+        try:
+            cached_file = open(path, 'rb')
+            os.utime(path)
+        except OSError as e:
+            logging.warning(f"Cache-Eintrag nicht lesbar ({path}): {e}")
+            with self._lock:
+                if self._entries.pop(key, None):
+                    self._total_bytes -= entry[1]
+                self.misses += 1
+            return None
+        content_type = next(ct for ct, ext in self.EXTENSIONS.items() if path.endswith(ext))
+        with self._lock:
+            self.hits += 1
+        return cached_file, content_type
+
+    def create_temp_file(self):
+        """Legt eine temporäre Datei im Cache-Ordner an, die später per commit() übernommen wird."""
+        fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=self.folder)
+        return os.fdopen(fd, 'wb'), temp_path
+
+    def commit(self, key, temp_path, content_type):
+        """Übernimmt eine mit create_temp_file() geschriebene Datei als Eintrag."""
+        ext = self.EXTENSIONS.get(content_type.split(';')[0].strip().lower())
+        try:
+            size = os.path.getsize(temp_path)
+            if ext is None or size > self.max_bytes:
+                os.remove(temp_path)
                 return
-
-            img = img.resize((new_width, new_height), resample_method)
-            photo = ImageTk.PhotoImage(img)
-            if photo_holder is not None:
-                if original:
-                    photo_holder.original_photo = photo
-                else:
-                    photo_holder.result_photo = photo
-            else:
-                if original:
-                    self.display_image = photo
-                else:
-                    self.result_image = photo
-            canvas.delete("all")
-            canvas.create_image(canvas_width / 2, canvas_height / 2, image=photo)
-            canvas.image = photo  # Referenz speichern
-        except Exception as e:
-            messagebox.showerror("Fehler", f"Fehler beim Anzeigen des Bildes:\n{e}")
-            logging.error(f"Fehler beim Anzeigen des Bildes: {e}")
-
-    def resize_image(self, event, original=True, canvas=None):
-        image_path = self.image_path.get() if original else getattr(self, 'output_path', '')
-        if image_path and os.path.exists(image_path):
-            self.display_image_on_canvas(image_path, original=original, canvas=canvas)
-
-    def load_image_by_number(self):
-        folder_number = self.folder_number.get().strip()
-        input_base = self.input_base_folder.get().strip()
-        if not folder_number:
-            messagebox.showerror("Fehler", "Bitte geben Sie eine Ordnernummer ein.")
-            logging.error("Keine Ordnernummer eingegeben.")
-            return
-        if not input_base:
-            messagebox.showerror("Fehler", "Bitte legen Sie den Input Basisordner in den Einstellungen fest.")
-            logging.error("Input Basisordner nicht festgelegt.")
+            path = os.path.join(self.folder, key + ext)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logging.warning(f"Konnte Ergebnis nicht im Cache speichern: {e}")
             return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self._total_bytes -= old[1]
+            self._entries[key] = (path, size)
+            self._total_bytes += size
+            self.stores += 1
+            evicted = []
+            while self._total_bytes > self.max_bytes and self._entries:
+                _, (old_path, old_size) = self._entries.popitem(last=False)
+                self._total_bytes -= old_size
+                self.evictions += 1
+                evicted.append(old_path)
+        for old_path in evicted:
+            try:
+                os.remove(old_path)
+            except OSError as e:
+                logging.warning(f"Konnte Cache-Eintrag nicht löschen ({old_path}): {e}")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'stores': self.stores,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+            }
+
+
+class PreviewTokenStore:
+    """Merkt sich Image-Token und Receipt von Preview-Aufrufen (JSON-Datei).
+
+    Der Schlüssel besteht aus dem Hash der hochgeladenen Bildbytes und allen processing.*-Parametern,
+    denn nur diese legen das serverseitige Ergebnis fest; Ausgabeoptionen können beim Download
+    noch geändert werden.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._tokens = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self._tokens = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.warning(f"Preview-Tokens konnten nicht gelesen werden ({path}): {e}")
+        self._drop_expired()
+
+    @staticmethod
+    def make_key(image_digest, data):
+        return payload_key(image_digest, {k: v for k, v in data.items() if k.startswith('processing.')})
+
+    def _drop_expired(self):
+        now = time.time()
+        self._tokens = {k: v for k, v in self._tokens.items() if v.get('expires', 0) > now}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._tokens, f)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logging.warning(f"Preview-Tokens konnten nicht gespeichert werden ({self.path}): {e}")
+
+    def get(self, key):
+        with self._lock:
+            self._drop_expired()
+            return self._tokens.get(key)
+
+    def put(self, key, image_token, receipt, retention_days):
+        with self._lock:
+            self._tokens[key] = {
+                'image_token': image_token,
+                'receipt': receipt,
+                # Etwas Sicherheitsabstand zum serverseitigen Ablauf
+                'expires': time.time() + retention_days * 86400 - 600,
+            }
+            self._save()
+
+    def discard(self, key):
+        with self._lock:
+            if self._tokens.pop(key, None) is not None:
+                self._save()
+
+
+_token_stores = {}
+_token_stores_lock = threading.Lock()
+
+
+def get_token_store(settings):
+    """Gibt den gemeinsam genutzten PreviewTokenStore zurück."""
+    path = settings.get('preview_token_file') or os.path.join(SCRIPT_DIR, 'cache', 'preview_tokens.json')
+    with _token_stores_lock:
+        store = _token_stores.get(path)
+        if store is None:
+            store = _token_stores[path] = PreviewTokenStore(path)
+        return store
+
+
+_result_caches = {}
+_result_caches_lock = threading.Lock()
+
+
+def _get_shared_cache(folder, max_mb, label):
+    """Gibt den gemeinsam genutzten ResultCache für `folder` zurück oder None, wenn er deaktiviert ist."""
+    try:
+        max_bytes = int(float(max_mb or 0) * 1024 * 1024)
+    except ValueError:
+        logging.warning(f"Ungültige Cache-Größe: {max_mb}, {label} deaktiviert")
+        return None
+    if max_bytes <= 0:
+        return None
+    with _result_caches_lock:
+        cache = _result_caches.get(folder)
+        if cache is None:
+            try:
+                cache = _result_caches[folder] = ResultCache(folder, max_bytes)
+            except OSError as e:
+                logging.warning(f"{label} nicht verfügbar ({folder}): {e}")
+                return None
+        cache.max_bytes = max_bytes
+        return cache
+
+
+def get_result_cache(settings):
+    """Gibt den gemeinsam genutzten ResultCache zurück oder None, wenn der Cache deaktiviert ist."""
+    folder = settings.get('result_cache_folder') or os.path.join(SCRIPT_DIR, 'cache', 'results')
+    return _get_shared_cache(folder, settings.get('result_cache_max_mb'), "Ergebnis-Cache")
+
+
+def get_upscale_cache(settings):
+    """Gibt den Cache für hochskalierte Upload-Bilder zurück oder None, wenn er deaktiviert ist."""
+    folder = settings.get('upscale_cache_folder') or os.path.join(SCRIPT_DIR, 'cache', 'upscaled')
+    return _get_shared_cache(folder, settings.get('upscale_cache_max_mb'), "Upscaling-Cache")
+
+
+def upscale_key(source_digest, target_size, input_dpi, tiled):
+    """Schlüssel für ein hochskaliertes Upload-Bild: Quell-Hash, Zielgröße, Resampling-Filter, DPI und Kodierweg."""
+    key = {
+        'source': source_digest,
+        'size': list(target_size),
+        'resample': int(resample_method),
+        'dpi': input_dpi,
+        'tiled': bool(tiled),
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+# extra= für Log-Einträge, die bereits per print() auf dem Terminal stehen: nur in die Logdatei
+LOG_FILE_ONLY = {'file_only': True}
+
+
+def setup_logging():
+    console = logging.StreamHandler()
+    console.addFilter(lambda record: not getattr(record, 'file_only', False))
+    logging.basicConfig(
+        level=logging.DEBUG,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler("vectorizer_app.log", encoding='utf-8'),
+            console
+        ]
+    )
+
+
+def load_settings_from_config(config_file='config.ini'):
+    """Liest config.ini und gibt ein flaches Dict (Schlüssel wie DEFAULT_SETTINGS) zurück."""
+    settings = dict(DEFAULT_SETTINGS)
+    config = configparser.ConfigParser()
+    if os.path.exists(config_file):
+        config.read(config_file)
+        for section in ('API', 'Settings'):
+            if section in config:
+                settings.update(config[section])
+    return settings
+
+
+def read_gpl_file(file_path):
+    """Liest eine GIMP Palette (.gpl) Datei und gibt eine Liste von (hex_color, name) Tupeln zurück."""
+    palette = []
+    try:
+        if not os.path.exists(file_path):
+            logging.error(f"GPL-Datei nicht gefunden: {file_path}")
+            return None
 
-        # Amazon-Bestellnummern verarbeiten
-        folder_number_processed = folder_number.split('-')[0]  # Ignoriere alles nach dem ersten '-'
-        logging.debug(f"Verarbeitete Ordnernummer: {folder_number_processed}")
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            lines = f.readlines()
+
+        for line_num, line in enumerate(lines, 1):
+            line = line.strip()
+            # Überspringe Kommentare und leere Zeilen
+            if not line or line.startswith('#'):
+                continue
+            # Überspringe Header-Zeilen
+            if line.startswith('GIMP Palette') or line.startswith('Name:') or line.startswith('Columns:'):
+                continue
+
+            # Versuchen, die ersten drei Teile in Zahlen umzuwandeln
+            parts = line.split(None, 3)
+            if len(parts) >= 3:
+                try:
+                    r, g, b = parts[:3]
+                    r = int(r)
+                    g = int(g)
+                    b = int(b)
+
+                    # Validiere RGB-Werte (0-255)
+                    if not (0 <= r <= 255 and 0 <= g <= 255 and 0 <= b <= 255):
+                        logging.warning(f"Zeile {line_num}: RGB-Werte außerhalb des gültigen Bereichs (0-255): {r}, {g}, {b}")
+                        continue
 
-        try:
-            matching_folders = [f for f in os.listdir(input_base)
-                                if os.path.isdir(os.path.join(input_base, f)) and f.startswith(folder_number_processed)]
-        except Exception as e:
-            messagebox.showerror("Fehler", f"Fehler beim Durchsuchen des Input Basisordners:\n{e}")
-            logging.error(f"Fehler beim Durchsuchen des Input Basisordners: {e}")
-            return
-        if not matching_folders:
-            messagebox.showerror("Fehler", f"Kein Unterordner mit der Nummer {folder_number_processed} gefunden.")
-            logging.error(f"Kein Unterordner mit der Nummer {folder_number_processed} gefunden.")
-            return
+                    color_hex = '#{:02x}{:02x}{:02x}'.format(r, g, b).lower()
+                    color_name = parts[3].strip() if len(parts) > 3 else ''
+                    palette.append((color_hex, color_name))
+                except ValueError as ve:
+                    logging.warning(f"Zeile {line_num} übersprungen (keine gültigen Farbdaten): {line} - {ve}")
+                    continue
 
-        # Wenn mehrere Ordner gefunden wurden, Auswahl anzeigen
-        if len(matching_folders) > 1:
-            selected_folder = self.select_folder_dialog(matching_folders)
-            if not selected_folder:
-                logging.info("Keine Ordnerauswahl getroffen.")
-                return
+        if not palette:
+            logging.warning(f"Keine Farben in GPL-Datei gefunden: {file_path}")
         else:
-            selected_folder = matching_folders[0]
-
-        target_folder = os.path.join(input_base, selected_folder)
-        input_image_path = os.path.join(target_folder, 'input.png')
-        if not os.path.exists(input_image_path):
-            messagebox.showerror("Fehler", f"Die Datei 'input.png' wurde im Ordner {target_folder} nicht gefunden.")
-            logging.error(f"Die Datei 'input.png' wurde im Ordner {target_folder} nicht gefunden.")
-            return
-        self.image_path.set(input_image_path)
-        self.display_image_on_canvas(input_image_path, original=True)
-        self.calculate_image_dimensions(input_image_path)
-
-    def select_folder_dialog(self, folders):
-        selection_window = tk.Toplevel(self)
-        selection_window.title("Ordner auswählen")
-        selection_window.geometry("400x300")
-        ttk.Label(selection_window, text="Mehrere Ordner gefunden. Bitte wählen Sie einen Ordner aus:").pack(pady=10)
-
-        folder_var = tk.StringVar(value=folders[0])
-
-        listbox = tk.Listbox(selection_window, listvariable=tk.StringVar(value=folders), height=10)
-        listbox.pack(fill='both', expand=True, padx=10, pady=10)
-        listbox.selection_set(0)
-
-        def select_and_close():
-            index = listbox.curselection()
-            if index:
-                folder_var.set(folders[index[0]])
-                selection_window.destroy()
+            logging.info(f"GPL-Datei erfolgreich gelesen: {len(palette)} Farben aus {file_path}")
+
+        return palette
+    except FileNotFoundError:
+        logging.error(f"GPL-Datei nicht gefunden: {file_path}")
+        return None
+    except PermissionError:
+        logging.error(f"Keine Berechtigung zum Lesen der GPL-Datei: {file_path}")
+        return None
+    except Exception as e:
+        logging.error(f"Fehler beim Lesen der GPL-Datei {file_path}: {e}")
+        return None
+
+
+# Kompilierte GPL-Palette in Sende-Reihenfolge:
+# hex_colors - Tupel der Hex-Werte, rgb - kompakte Bytes (3 pro Farbe, gleiche Reihenfolge),
+# payload - fertiger Wert für processing.palette, skin_tone_count - Anzahl ans Ende verschobener Skin Tones
+CompiledPalette = collections.namedtuple('CompiledPalette', 'hex_colors rgb payload skin_tone_count')
+
+
+def compile_palette(gpl_path, skin_tone_count):
+    """Liest eine GPL-Datei und erstellt die Palette mit optionaler Reorganisation (Skin Tones ans Ende)."""
+    palette = read_gpl_file(gpl_path)
+    if not palette:
+        logging.warning(f"Keine Farben aus GPL-Datei gelesen: {gpl_path}")
+        return None
+
+    # Nur die Hex-Werte verwenden und validieren
+    hex_colors = []
+    for color_tuple in palette:
+        if color_tuple and len(color_tuple) > 0:
+            hex_color = color_tuple[0].strip()
+            # Validiere Hex-Format (#rrggbb oder #rrggbbaa)
+            if hex_color.startswith('#') and len(hex_color) in [7, 9]:
+                hex_colors.append(hex_color.lower())
             else:
-                messagebox.showwarning("Warnung", "Bitte wählen Sie einen Ordner aus.")
-
-        btn_select = ttk.Button(selection_window, text="Auswählen", command=select_and_close)
-        btn_select.pack(pady=10)
-
-        self.wait_window(selection_window)
-        selected_folder = folder_var.get()
-        return selected_folder
+                logging.warning(f"Ungültiges Hex-Format übersprungen: {hex_color}")
+    if not hex_colors:
+        logging.error(f"Keine gültigen Hex-Farben in GPL-Datei gefunden: {gpl_path}")
+        return None
+
+    # Reorganisiere Palette: Skin Tones ans Ende verschieben
+    moved = 0
+    try:
+        skin_tone_count = int(skin_tone_count) if skin_tone_count else 0
+        if skin_tone_count > 0 and skin_tone_count < len(hex_colors):
+            # Erste N Farben sind Skin Tones -> ans Ende verschieben
+            skin_tones = hex_colors[:skin_tone_count]
+            other_colors = hex_colors[skin_tone_count:]
+            # Neue Reihenfolge: Andere Farben zuerst, dann Skin Tones
+            hex_colors = other_colors + skin_tones
+            moved = skin_tone_count
+            logging.info(f"Palette reorganisiert: {skin_tone_count} Skin Tones ans Ende verschoben (von {len(hex_colors)} Farben)")
+        elif skin_tone_count > 0:
+            logging.warning(f"Skin Tone Count ({skin_tone_count}) >= Gesamtanzahl ({len(hex_colors)}), keine Reorganisation")
+    except ValueError:
+        logging.warning(f"Ungültiger Skin Tone Count Wert: {skin_tone_count}, verwende Original-Reihenfolge")
+
+    rgb = b''.join(bytes.fromhex(hex_color[1:7]) for hex_color in hex_colors)
+    logging.debug(f"Palette aus GPL erstellt: {len(hex_colors)} Farben")
+    return CompiledPalette(tuple(hex_colors), rgb, '; '.join(hex_colors), moved)
+
+
+_palette_cache = {}
+_palette_cache_lock = threading.Lock()
+
+
+def get_compiled_palette(gpl_path, skin_tone_count):
+    """Gibt die kompilierte Palette aus dem Cache zurück; neu geparst wird nur bei geänderter Datei.
+
+    Schlüssel: absoluter Pfad, mtime, Dateigröße und Skin-Tone-Anzahl.
+    """
+    try:
+        stat = os.stat(gpl_path)
+    except OSError as e:
+        logging.error(f"GPL-Datei nicht gefunden: {gpl_path} ({e})")
+        return None
+    path = os.path.abspath(gpl_path)
+    key = (path, stat.st_mtime_ns, stat.st_size, str(skin_tone_count).strip())
+    with _palette_cache_lock:
+        compiled = _palette_cache.get(key)
+    if compiled is not None:
+        return compiled
+
+    compiled = compile_palette(gpl_path, skin_tone_count)
+    if compiled is not None:
+        with _palette_cache_lock:
+            # Veraltete Einträge derselben Datei verwerfen
+            for old_key in [k for k in _palette_cache if k[0] == path and k[1:3] != key[1:3]]:
+                del _palette_cache[old_key]
+            _palette_cache[key] = compiled
+    return compiled
+
+
+def create_palette_from_gpl(gpl_path, skin_tone_count):
+    """Erstellt eine Palette-String aus einer GPL-Datei mit optionaler Reorganisation (Skin Tones ans Ende)."""
+    compiled = get_compiled_palette(gpl_path, skin_tone_count)
+    return compiled.payload if compiled is not None else None
+
+
+def calculate_dimensions_cm(image_path):
+    """Liest Pixelgröße und DPI eines Bildes und gibt (breite_cm, höhe_cm, breite_px, höhe_px, dpi) zurück."""
+    # Image.open liest nur den Header; die Pixel werden hier nie dekodiert
+    with Image.open(image_path) as img:
+        dpi = img.info.get('dpi', (96, 96))
+        width_cm = round(img.width / dpi[0] * 2.54, 2)
+        height_cm = round(img.height / dpi[1] * 2.54, 2)
+        return width_cm, height_cm, img.width, img.height, dpi[0] if isinstance(dpi, tuple) else dpi
+
+
+def _fit_size(size, max_size):
+    """Größe mit gleichem Seitenverhältnis, deren längste Seite höchstens `max_size` ist."""
+    scale = min(1.0, max_size / max(size))
+    return max(1, round(size[0] * scale)), max(1, round(size[1] * scale))
+
+
+def open_reduced_image(image_path, max_size):
+    """Dekodiert ein Bild nur so genau wie nötig für eine Anzeige mit `max_size` px an der längsten Seite.
+
+    JPEG wird per draft() direkt in 1/2, 1/4 oder 1/8 der Auflösung dekodiert, bei TIFF-Pyramiden
+    wird die kleinste ausreichende verkleinerte Seite gelesen. Andere Formate werden voll dekodiert
+    und per reduce() um einen ganzzahligen Faktor verkleinert. Das Ergebnis ist mindestens so groß
+    wie das Ziel (sofern das Original es ist) und bereits geladen.
+    """
+    with Image.open(image_path) as img:
+        target = _fit_size(img.size, max_size)
+        if img.format == 'TIFF' and getattr(img, 'n_frames', 1) > 1:
+            full_width, full_height = img.size
+            best_frame, best_width = 0, full_width
+            for frame in range(1, img.n_frames):
+                img.seek(frame)
+                # Nur verkleinerte Fassungen desselben Bildes (NewSubfileType Bit 0) mit gleichem Seitenverhältnis
+                reduced = int(img.tag_v2.get(254, 0)) & 1
+                same_ratio = abs(img.width * full_height - img.height * full_width) <= max(full_width, full_height)
+                if reduced and same_ratio and target[0] <= img.width < best_width and target[1] <= img.height:
+                    best_frame, best_width = frame, img.width
+            img.seek(best_frame)
+        img.draft(None, target)
+        img.load()
+        factor = min(img.width // target[0], img.height // target[1])
+        if factor < 2:
+            return img
+        if img.mode in ('P', '1'):
+            img = img.convert('RGBA' if 'transparency' in img.info else 'RGB')
+        return img.reduce(factor)
+
+
+class FolderIndex:
+    """Persistenter Index (SQLite) der Auftragsordner im Input Basisordner.
+
+    Der Basisordner wird nur neu gelistet, wenn sich seine mtime geändert hat (neue oder gelöschte
+    Unterordner) oder der letzte Durchlauf älter als `max_age_s` ist; dabei werden nur neue und
+    verschwundene Ordner übernommen (ein os.scandir, kein isdir pro Eintrag). Abfragen nach
+    Nummern-Präfix laufen über den Primärschlüssel. Metadaten von input.png (Größe, DPI) werden
+    pro Ordner bei Bedarf gelesen und über mtime/Dateigröße zwischengespeichert.
+    """
+
+    def __init__(self, db_path, max_age_s=300):
+        self.db_path = db_path
+        self.max_age_s = max_age_s
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS bases (base TEXT PRIMARY KEY, mtime REAL, scanned REAL)')
+        self._db.execute('CREATE TABLE IF NOT EXISTS folders (base TEXT, name TEXT, input_mtime REAL, '
+                         'input_size INTEGER, dimensions TEXT, PRIMARY KEY (base, name)) WITHOUT ROWID')
+
+    @staticmethod
+    def _base_key(input_base):
+        return os.path.normcase(os.path.abspath(input_base))
+
+    def refresh(self, input_base, force=False):
+        """Gleicht den Index mit dem Basisordner ab, falls nötig. Gibt True zurück, wenn gelistet wurde."""
+        base = self._base_key(input_base)
+        base_mtime = os.stat(input_base).st_mtime
+        with self._lock:
+            row = self._db.execute('SELECT mtime, scanned FROM bases WHERE base = ?', (base,)).fetchone()
+            if not force and row is not None and row[0] == base_mtime and time.time() - row[1] < self.max_age_s:
+                return False
+            started = time.perf_counter()
+            with os.scandir(input_base) as entries:
+                names = {entry.name for entry in entries if entry.is_dir()}
+            known = {name for (name,) in self._db.execute('SELECT name FROM folders WHERE base = ?', (base,))}
+            added, removed = names - known, known - names
+            self._db.execute('BEGIN')
+            try:
+                self._db.executemany('INSERT INTO folders (base, name) VALUES (?, ?)', ((base, n) for n in added))
+                self._db.executemany('DELETE FROM folders WHERE base = ? AND name = ?', ((base, n) for n in removed))
+                self._db.execute('INSERT OR REPLACE INTO bases (base, mtime, scanned) VALUES (?, ?, ?)',
+                                 (base, base_mtime, time.time()))
+                self._db.execute('COMMIT')
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+        logging.debug(f"Ordnerindex aktualisiert: {len(names)} Ordner, +{len(added)}/-{len(removed)} "
+                      f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return True
+
+    def find(self, input_base, prefix):
+        """Alle Unterordner, deren Name mit `prefix` beginnt (sortiert)."""
+        self.refresh(input_base)
+        base = self._base_key(input_base)
+        with self._lock:
+            if not prefix:
+                rows = self._db.execute('SELECT name FROM folders WHERE base = ? ORDER BY name', (base,))
+            else:
+                # Bereichsabfrage statt LIKE, damit der Primärschlüssel genutzt wird
+                upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+                rows = self._db.execute('SELECT name FROM folders WHERE base = ? AND name >= ? AND name < ? '
+                                        'ORDER BY name', (base, prefix, upper))
+            return [name for (name,) in rows]
+
+    def input_info(self, input_base, folder, filename='input.png'):
+        """Maße von input.png in `folder` wie calculate_dimensions_cm() oder None, wenn die Datei fehlt."""
+        image_path = os.path.join(input_base, folder, filename)
+        try:
+            stat = os.stat(image_path)
+        except FileNotFoundError:
+            return None
+        base = self._base_key(input_base)
+        with self._lock:
+            row = self._db.execute('SELECT input_mtime, input_size, dimensions FROM folders '
+                                   'WHERE base = ? AND name = ?', (base, folder)).fetchone()
+        if row is not None and row[0] == stat.st_mtime and row[1] == stat.st_size and row[2]:
+            return tuple(json.loads(row[2]))
+        dimensions = calculate_dimensions_cm(image_path)
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO folders (base, name, input_mtime, input_size, dimensions) '
+                             'VALUES (?, ?, ?, ?, ?)',
+                             (base, folder, stat.st_mtime, stat.st_size, json.dumps([*dimensions[:4], float(dimensions[4])])))
+        return dimensions
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_folder_indexes = {}
+_folder_indexes_lock = threading.Lock()
+
+
+def get_folder_index(settings):
+    """Gibt den gemeinsam genutzten FolderIndex zurück oder None, wenn SQLite nicht nutzbar ist."""
+    path = settings.get('folder_index_file') or os.path.join(SCRIPT_DIR, 'cache', 'folder_index.sqlite')
+    with _folder_indexes_lock:
+        index = _folder_indexes.get(path)
+        if index is None:
+            try:
+                index = _folder_indexes[path] = FolderIndex(path, float(settings.get('folder_index_max_age_s') or 0))
+            except (sqlite3.Error, OSError, ValueError) as e:
+                logging.warning(f"Ordnerindex nicht verfügbar ({path}): {e}")
+                return None
+        return index
+
+
+# Zustände eines Jobs; unterbrochene Jobs (Absturz, Neustart) stehen noch in einem der ersten drei
+JOB_UNFINISHED_STATES = ('queued', 'upscaling', 'uploading')
+# Zustände, in denen ein Prozess gerade am Job arbeitet; solche Einträge gelten erst nach `lease_s`
+# Sekunden ohne Zustandswechsel als verwaist (GUI, Batch und Überwachung teilen sich die Job-Liste)
+JOB_RUNNING_STATES = ('upscaling', 'uploading')
+JOB_LEASE_S = 3600
+JOB_STAGE_STATES = {'upscale': 'upscaling', 'upload': 'uploading', 'api': 'uploading', 'download': 'uploading'}
+# Einstellungen, die das Ergebnis bestimmen: gehen in den Job-Schlüssel ein und werden für die Wiederaufnahme gespeichert
+JOB_SETTING_KEYS = ['mode', 'output.file_format', 'output_folder', 'palette', 'gpl_file_path', 'line_fit_tolerance',
+                    'anti_aliasing_mode', 'input_dpi', 'output_dpi', 'processing.max_colors',
+                    'processing.shapes.min_area_px', 'skin_tone_count', 'palette_prune', 'palette_prune_margin',
+                    'width_cm', 'height_cm']
+
+
+class JobStore:
+    """Persistente Job-Liste (SQLite im WAL-Modus), damit Batches einen Absturz oder Neustart überstehen.
+
+    Der Schlüssel eines Jobs ergibt sich aus Auftragsname, Größe/mtime von input.png und den
+    ergebnisrelevanten Einstellungen (JOB_SETTING_KEYS); derselbe Auftrag mit denselben Parametern
+    wird also nicht doppelt vektorisiert. Zustände: queued, upscaling, uploading, done, failed.
+    `origin` hält fest, wer den Job angelegt hat ('gui', 'batch' oder 'watch'). Jobs, die ein anderer
+    Prozess gerade bearbeitet (JOB_RUNNING_STATES, zuletzt vor weniger als `lease_s` Sekunden
+    aktualisiert), werden weder neu eingereiht noch fortgesetzt.
+    """
+
+    def __init__(self, db_path, lease_s=JOB_LEASE_S):
+        self.db_path = db_path
+        self.lease_s = lease_s
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        # Im WAL-Modus bleibt die Datenbank auch bei NORMAL nach einem Absturz konsistent
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS jobs (key TEXT PRIMARY KEY, name TEXT, image_path TEXT, '
+                         'params TEXT, state TEXT, attempts INTEGER DEFAULT 0, output_path TEXT, error TEXT, '
+                         'created REAL, updated REAL)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state)')
+        # Job-Listen älterer Versionen um die Herkunft ergänzen (unbekannt = NULL, wird nie automatisch fortgesetzt)
+        columns = {row[1] for row in self._db.execute('PRAGMA table_info(jobs)')}
+        if 'origin' not in columns:
+            self._db.execute('ALTER TABLE jobs ADD COLUMN origin TEXT')
+
+    @staticmethod
+    def job_params(settings):
+        return {k: str(settings[k]) for k in JOB_SETTING_KEYS if settings.get(k) not in (None, '')}
+
+    @classmethod
+    def make_key(cls, name, image_path, settings):
+        stat = os.stat(image_path)
+        key = {'name': name, 'size': stat.st_size, 'mtime': stat.st_mtime, 'params': cls.job_params(settings)}
+        return hashlib.sha256(json.dumps(key, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def add(self, key, name, image_path, settings, origin='batch'):
+        """Trägt einen Job ein. Gibt den bisherigen Zustand zurück ('done' = nichts zu tun) bzw. 'queued'.
+
+        Fehlgeschlagene Jobs werden wieder eingereiht und übernehmen `origin`. Bearbeitet ein anderer
+        Prozess den Job gerade, bleibt der Eintrag unverändert und es wird 'running' zurückgegeben.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._db.execute('SELECT state, updated FROM jobs WHERE key = ?', (key,)).fetchone()
+            if row is not None and row[0] == 'done':
+                return 'done'
+            if row is not None and row[0] in JOB_RUNNING_STATES and now - (row[1] or 0) < self.lease_s:
+                return 'running'
+            if row is None:
+                self._db.execute('INSERT INTO jobs (key, name, image_path, params, state, origin, created, updated) '
+                                 'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                 (key, name, image_path, json.dumps(self.job_params(settings)), 'queued', origin,
+                                  now, now))
+                return 'queued'
+            self._db.execute("UPDATE jobs SET state = 'queued', origin = ?, updated = ? WHERE key = ?",
+                             (origin, now, key))
+            return row[0]
+
+    def update(self, key, state, output_path=None, error=None):
+        with self._lock:
+            self._db.execute('UPDATE jobs SET state = ?, updated = ?, output_path = COALESCE(?, output_path), '
+                             'error = ?, attempts = attempts + ? WHERE key = ?',
+                             (state, time.time(), output_path, error, 1 if state in ('done', 'failed') else 0, key))
+
+    def unfinished(self, include_failed=False, origins=None):
+        """Unterbrochene (und optional fehlgeschlagene) Jobs als Liste von (schlüssel, name, bildpfad, parameter).
+
+        Mit `origins` nur Jobs dieser Herkunft (z. B. ('batch', 'watch')). Jobs, die ein anderer Prozess
+        gerade bearbeitet, fehlen.
+        """
+        states = JOB_UNFINISHED_STATES + (('failed',) if include_failed else ())
+        query = (f"SELECT key, name, image_path, params FROM jobs WHERE state IN ({', '.join('?' * len(states))}) "
+                 f"AND NOT (state IN ({', '.join('?' * len(JOB_RUNNING_STATES))}) AND updated > ?)")
+        arguments = list(states) + list(JOB_RUNNING_STATES) + [time.time() - self.lease_s]
+        if origins is not None:
+            query += f" AND origin IN ({', '.join('?' * len(origins))})"
+            arguments += origins
+        with self._lock:
+            rows = self._db.execute(query + ' ORDER BY created', arguments).fetchall()
+        return [(key, name, image_path, json.loads(params)) for key, name, image_path, params in rows]
+
+    def counts(self):
+        with self._lock:
+            return dict(self._db.execute('SELECT state, COUNT(*) FROM jobs GROUP BY state').fetchall())
+
+
+def job_progress(store, job_key, forward=None):
+    """progress-Callback für vectorize_file(), der Zustandswechsel in den JobStore schreibt
+    (nicht jeden Upload-Block) und alle Meldungen an `forward` weiterreicht."""
+    current_state = [None]
+
+    def progress(stage, percent=None, bytes_done=None, bytes_total=None):
+        if forward is not None:
+            forward(stage, percent, bytes_done, bytes_total)
+        state = JOB_STAGE_STATES.get(stage)
+        if store is not None and job_key is not None and state is not None and state != current_state[0]:
+            current_state[0] = state
+            store.update(job_key, state)
+
+    return progress
+
+
+_job_stores = {}
+_job_stores_lock = threading.Lock()
+
+
+def get_job_store(settings):
+    """Gibt den gemeinsam genutzten JobStore zurück oder None, wenn SQLite nicht nutzbar ist."""
+    path = settings.get('job_store_file') or os.path.join(SCRIPT_DIR, 'cache', 'jobs.sqlite')
+    with _job_stores_lock:
+        store = _job_stores.get(path)
+        if store is None:
+            # Ein laufender Job meldet sich spätestens nach Deadline und Lese-Timeout wieder
+            lease_s = ((float(settings.get('job_deadline_s') or 0) or JOB_LEASE_S)
+                       + float(settings.get('read_timeout') or 300))
+            try:
+                store = _job_stores[path] = JobStore(path, lease_s)
+            except (sqlite3.Error, OSError) as e:
+                logging.warning(f"Job-Liste nicht verfügbar ({path}): {e}")
+                return None
+        return store
 
-    def start_vectorization_thread(self):
-        thread = threading.Thread(target=self.vectorize_image)
-        thread.start()
 
-    def vectorize_image(self):
-        self.progress_label.config(text="Vektorisierung läuft...")
-        image_path = self.image_path.get()
-        api_key = self.api_key.get()
-        api_secret = self.api_secret.get()
-        output_format = self.output_format.get()
-        mode = self.mode.get()
+def find_order_folders(input_base, folder_number, settings=None):
+    """Sucht Unterordner im Input Basisordner, deren Name mit der Ordnernummer beginnt.
 
-        # Neue Eingabewerte für Breite, Höhe und DPI
+    Amazon-Bestellnummern (alles nach dem ersten '-') werden ignoriert.
+    Mit `settings` wird der Ordnerindex (get_folder_index) verwendet, sonst der Ordner direkt gelistet.
+    """
+    folder_number_processed = folder_number.split('-')[0]  # Ignoriere alles nach dem ersten '-'
+    logging.debug(f"Verarbeitete Ordnernummer: {folder_number_processed}")
+    index = get_folder_index(settings) if settings is not None else None
+    if index is not None:
         try:
-            width_cm = float(self.width_cm.get())
-            height_cm = float(self.height_cm.get())
-            input_dpi = float(self.input_dpi.get())
-            output_dpi = float(self.output_dpi.get())
-            base_min_area_px = float(self.min_area_px.get())  # Basis-Mindestfläche abrufen
-
-            # Validierung für Basiswert (nur für den Eingabewert, nicht für skalierten Wert)
-            if base_min_area_px < 0.125:
-                raise ValueError("Die Mindestfläche muss mindestens 0.125 px betragen.")
-            if base_min_area_px > 100:
-                logging.warning(f"Basis-Mindestfläche ({base_min_area_px}) ist größer als 100. Der Wert wird verwendet, kann aber bei großen Bildern sehr groß werden.")
-
-            # Ursprüngliche Bildgröße in Pixeln ermitteln
-            if self.original_image_width_px is None or self.original_image_height_px is None:
-                # Falls nicht gespeichert, versuche es aus dem Bild zu lesen
-                try:
-                    with Image.open(image_path) as img:
-                        self.original_image_width_px = img.width
-                        self.original_image_height_px = img.height
-                        dpi_info = img.info.get('dpi', (input_dpi, input_dpi))
-                        self.original_image_dpi = dpi_info[0] if isinstance(dpi_info, tuple) else dpi_info
-                        logging.info(f"Bildgröße beim Vektorisieren ermittelt: {img.width}px x {img.height}px")
-                except Exception as e:
-                    logging.warning(f"Konnte ursprüngliche Bildgröße nicht ermitteln: {e}. Verwende Eingabewerte als Basis.")
-                    # Fallback: Verwende die eingegebenen cm-Werte mit input_dpi
-                    self.original_image_width_px = (width_cm / 2.54) * input_dpi
-                    self.original_image_height_px = (height_cm / 2.54) * input_dpi
-                    self.original_image_dpi = input_dpi
-
-            # Neue Bildgröße in Pixeln berechnen
-            new_width_px = (width_cm / 2.54) * output_dpi
-            new_height_px = (height_cm / 2.54) * output_dpi
-
-            # Skalierungsfaktor basierend auf der größeren Dimension berechnen
-            # Verwende den Durchschnitt beider Dimensionen für eine ausgewogenere Skalierung
-            original_area = self.original_image_width_px * self.original_image_height_px
-            new_area = new_width_px * new_height_px
-            
-            if original_area > 0:
-                # Skalierungsfaktor basierend auf Flächenverhältnis (quadratisch)
-                area_scale_factor = (new_area / original_area) ** 0.5
-                # Alternativ: linearer Skalierungsfaktor basierend auf größerer Dimension
-                scale_factor_width = new_width_px / self.original_image_width_px if self.original_image_width_px > 0 else 1.0
-                scale_factor_height = new_height_px / self.original_image_height_px if self.original_image_height_px > 0 else 1.0
-                linear_scale_factor = max(scale_factor_width, scale_factor_height)
-                # Verwende den Durchschnitt beider Methoden für ausgewogenere Ergebnisse
-                scale_factor = (area_scale_factor + linear_scale_factor) / 2.0
-            else:
-                scale_factor = 1.0
-                logging.warning("Ursprüngliche Bildfläche ist 0, verwende Skalierungsfaktor 1.0")
-
-            # min_area_px Logik:
-            # Wir senden den Basiswert (begrenzt auf 100).
-            # Durch das automatische Upscaling (siehe unten) wirkt dieser Wert bei großen Bildern
-            # automatisch "feiner" relativ zum Motiv, da die Details physisch größer werden.
-            if base_min_area_px > 100:
-                logging.warning(f"Basis-Mindestfläche ({base_min_area_px}) ist größer als 100. Der Wert wird auf 100 gesetzt.")
-                min_area_px = 100.0
+            return index.find(input_base, folder_number_processed)
+        except sqlite3.Error as e:
+            logging.warning(f"Ordnerindex-Abfrage fehlgeschlagen, liste Ordner direkt: {e}")
+    return [f for f in os.listdir(input_base)
+            if os.path.isdir(os.path.join(input_base, f)) and f.startswith(folder_number_processed)]
+
+
+def parse_job_parameters(settings):
+    """Liest die numerischen Parameter aus den Einstellungen. Wirft ValueError bei ungültigen Werten."""
+    width_cm = float(settings['width_cm'])
+    height_cm = float(settings['height_cm'])
+    input_dpi = float(settings['input_dpi'])
+    output_dpi = float(settings['output_dpi'])
+    base_min_area_px = float(settings['processing.shapes.min_area_px'])  # Basis-Mindestfläche abrufen
+
+    # Validierung für Basiswert (nur für den Eingabewert, nicht für skalierten Wert)
+    if base_min_area_px < 0.125:
+        raise ValueError("Die Mindestfläche muss mindestens 0.125 px betragen.")
+
+    # min_area_px Logik:
+    # Wir senden den Basiswert (begrenzt auf 100).
+    # Durch das automatische Upscaling wirkt dieser Wert bei großen Bildern
+    # automatisch "feiner" relativ zum Motiv, da die Details physisch größer werden.
+    if base_min_area_px > 100:
+        logging.warning(f"Basis-Mindestfläche ({base_min_area_px}) ist größer als 100. Der Wert wird auf 100 gesetzt.")
+        min_area_px = 100.0
+    else:
+        min_area_px = max(0.125, base_min_area_px)
+
+    return {
+        'width_cm': width_cm,
+        'height_cm': height_cm,
+        'input_dpi': input_dpi,
+        'output_dpi': output_dpi,
+        'min_area_px': min_area_px,
+    }
+
+
+def read_original_size(image_path, params):
+    """Ermittelt die ursprüngliche Bildgröße (breite_px, höhe_px, dpi) für die Skalierung."""
+    input_dpi = params['input_dpi']
+    try:
+        with Image.open(image_path) as img:
+            dpi_info = img.info.get('dpi', (input_dpi, input_dpi))
+            logging.info(f"Bildgröße beim Vektorisieren ermittelt: {img.width}px x {img.height}px")
+            return img.width, img.height, dpi_info[0] if isinstance(dpi_info, tuple) else dpi_info
+    except Exception as e:
+        logging.warning(f"Konnte ursprüngliche Bildgröße nicht ermitteln: {e}. Verwende Eingabewerte als Basis.")
+        # Fallback: Verwende die eingegebenen cm-Werte mit input_dpi
+        return (params['width_cm'] / 2.54) * input_dpi, (params['height_cm'] / 2.54) * input_dpi, input_dpi
+
+
+def compute_upscale_target(original_width_px, original_height_px, params):
+    """Berechnet die Upload-Größe. Gibt (ziel_breite_px, ziel_höhe_px, hochskalieren) zurück."""
+    # Ziel-Dimensionen in Pixeln berechnen (für Upscaling)
+    # WICHTIG: Seitenverhältnis des Originals beibehalten, um Verzerrung zu vermeiden!
+    req_width_px = int((params['width_cm'] / 2.54) * params['input_dpi'])
+    req_height_px = int((params['height_cm'] / 2.54) * params['input_dpi'])
+
+    target_width_px = req_width_px
+    target_height_px = req_height_px
+    scale_factor = 1.0
+
+    if original_width_px and original_height_px > 0:
+        # Wir nutzen den GRÖSSEREN Faktor, damit das Bild mindestens die gewünschten Maße hat (Cover-Strategie).
+        # Um Verzerrung zu vermeiden, nutzen wir denselben Faktor für beide Seiten.
+        scale_factor = max(req_width_px / original_width_px, req_height_px / original_height_px)
+
+        # Neuberechnung der Zielpixel ohne Verzerrung
+        target_width_px = int(original_width_px * scale_factor)
+        target_height_px = int(original_height_px * scale_factor)
+
+        logging.info(f"Zielgröße korrigiert (Seitenverhältnis): {target_width_px}x{target_height_px} (Faktor: {scale_factor:.2f})")
+
+    # Nur skalieren, wenn Originalgröße bekannt und Faktor > UPSCALE_THRESHOLD
+    if not (original_width_px and scale_factor > UPSCALE_THRESHOLD):
+        return target_width_px, target_height_px, False
+
+    if target_width_px > MAX_DIMENSION or target_height_px > MAX_DIMENSION:
+        scale_down = MAX_DIMENSION / max(target_width_px, target_height_px)
+        target_width_px = int(target_width_px * scale_down)
+        target_height_px = int(target_height_px * scale_down)
+        logging.warning(f"Zielgröße für Upload limitiert auf {MAX_DIMENSION}px")
+
+    return target_width_px, target_height_px, True
+
+
+class PngStreamWriter:
+    """Schreibt ein PNG zeilenweise, ohne das ganze Bild im Speicher zu halten.
+
+    Unterstützt die Modi 'L' und 'RGB'. Mit numpy wird der PNG-Filter 'Up' verwendet
+    (deutlich kleinere Dateien bei Fotos), sonst ungefiltert.
+    """
+
+    COLOR_TYPES = {'L': (0, 1), 'RGB': (2, 3)}
+
+    def __init__(self, fileobj, width, height, mode='RGB', dpi=None, compress_level=6):
+        self.fileobj = fileobj
+        self.width = width
+        self.height = height
+        color_type, self.channels = self.COLOR_TYPES[mode]
+        self.rows_written = 0
+        self._compressor = zlib.compressobj(compress_level)
+        self._pending = []
+        self._pending_size = 0
+        self._previous_row = None
+        fileobj.write(PNG_SIGNATURE)
+        self._write_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, color_type, 0, 0, 0))
+        if dpi:
+            # Pixel pro Meter wie bei PIL
+            self._write_chunk(b'pHYs', struct.pack('>IIB', int(dpi[0] / 0.0254 + 0.5), int(dpi[1] / 0.0254 + 0.5), 1))
+
+    def _write_chunk(self, tag, data):
+        self.fileobj.write(struct.pack('>I', len(data)))
+        self.fileobj.write(tag)
+        self.fileobj.write(data)
+        self.fileobj.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(tag)) & 0xffffffff))
+
+    def _flush_idat(self, force=False):
+        if self._pending_size >= 256 * 1024 or (force and self._pending):
+            self._write_chunk(b'IDAT', b''.join(self._pending))
+            self._pending = []
+            self._pending_size = 0
+
+    def _compress(self, data):
+        compressed = self._compressor.compress(data)
+        if compressed:
+            self._pending.append(compressed)
+            self._pending_size += len(compressed)
+            self._flush_idat()
+
+    def write_image(self, img):
+        """Hängt alle Zeilen eines PIL-Bildstreifens (volle Breite) an."""
+        stride = self.width * self.channels
+        raw = img.tobytes()
+        if np is not None:
+            rows = np.frombuffer(raw, dtype=np.uint8).reshape(-1, stride)
+            previous = np.vstack([self._previous_row if self._previous_row is not None
+                                  else np.zeros((1, stride), dtype=np.uint8), rows[:-1]])
+            filtered = np.empty((len(rows), stride + 1), dtype=np.uint8)
+            filtered[:, 0] = 2  # Filter 'Up'
+            filtered[:, 1:] = rows - previous  # uint8-Arithmetik rechnet modulo 256
+            self._previous_row = rows[-1:].copy()
+            self._compress(filtered.tobytes())
+            self.rows_written += len(rows)
+        else:
+            for start in range(0, len(raw), stride):
+                self._compress(b'\x00' + raw[start:start + stride])
+                self.rows_written += 1
+
+    def close(self):
+        if self.rows_written != self.height:
+            raise ValueError(f"PNG unvollständig: {self.rows_written} von {self.height} Zeilen geschrieben")
+        self._pending.append(self._compressor.flush())
+        self._pending_size += len(self._pending[-1])
+        self._flush_idat(force=True)
+        self._write_chunk(b'IEND', b'')
+
+
+def upscale_tiled(img, target_size, fileobj, dpi=None, tile_rows=256, timings=None):
+    """Skaliert `img` streifenweise mit LANCZOS hoch und schreibt das Ergebnis als PNG nach `fileobj`.
+
+    Jeder Streifen wird mit resize(box=...) aus dem Quellbild berechnet; Pillow nutzt dabei die
+    Quellpixel außerhalb der Box als Filterrand (überlappende Ränder), daher entspricht das Ergebnis
+    dem einmaligen resize() bis auf Rundungsunterschiede von höchstens 1 pro Kanal.
+    Der Spitzenspeicher ist durch die Streifengröße begrenzt, nicht durch die Zielgröße.
+    Mit `timings` (Dict) werden die Sekunden für 'upscale' und 'encode' aufsummiert.
+    """
+    timings = {} if timings is None else timings
+    if img.mode not in PngStreamWriter.COLOR_TYPES:
+        img = img.convert('RGB')
+    target_width, target_height = target_size
+    source_width, source_height = img.size
+    scale_y = source_height / target_height
+    writer = PngStreamWriter(fileobj, target_width, target_height, img.mode, dpi)
+    for top in range(0, target_height, tile_rows):
+        bottom = min(target_height, top + tile_rows)
+        started = time.perf_counter()
+        strip = img.resize((target_width, bottom - top), resample_method,
+                           box=(0, top * scale_y, source_width, bottom * scale_y))
+        resized = time.perf_counter()
+        writer.write_image(strip)
+        timings['upscale'] = timings.get('upscale', 0.0) + resized - started
+        timings['encode'] = timings.get('encode', 0.0) + time.perf_counter() - resized
+    started = time.perf_counter()
+    writer.close()
+    timings['encode'] = timings.get('encode', 0.0) + time.perf_counter() - started
+
+
+def encode_upload_image(image_path, target_size, input_dpi, fileobj, tiled_min_px=0, tile_rows=256, timings=None):
+    """Dekodiert, konvertiert und skaliert das Bild (LANCZOS) und schreibt es als PNG nach `fileobj`.
+
+    Mit `timings` (Dict) werden die Sekunden der Stufen 'decode', 'upscale' und 'encode' eingetragen.
+    """
+    timings = {} if timings is None else timings
+    started = time.perf_counter()
+    with Image.open(image_path) as img:
+        img.load()
+        # Konvertiere zu RGB falls nötig
+        if img.mode in ['P', 'RGBA']:
+            img = img.convert('RGB')
+        timings['decode'] = time.perf_counter() - started
+
+        if tiled_min_px > 0 and target_size[0] * target_size[1] >= tiled_min_px:
+            # Große Ziele streifenweise, damit nie das ganze Zielbild im Speicher liegt
+            logging.info(f"Streifenweises Upscaling ({tile_rows} Zeilen pro Streifen)")
+            upscale_tiled(img, target_size, fileobj, dpi=(input_dpi, input_dpi), tile_rows=tile_rows, timings=timings)
+        else:
+            # Hochwertiges Resampling (LANCZOS)
+            started = time.perf_counter()
+            img_resized = img.resize(target_size, resample_method)
+            timings['upscale'] = time.perf_counter() - started
+
+            # DPI im Header setzen
+            started = time.perf_counter()
+            img_resized.save(fileobj, format='PNG', dpi=(input_dpi, input_dpi))
+            timings['encode'] = time.perf_counter() - started
+
+
+def _encode_upload_image_file(image_path, target_size, input_dpi, output_path, tiled_min_px, tile_rows):
+    """Läuft im Worker-Prozess: kodiert das Upload-Bild direkt in die Datei `output_path`.
+
+    Gibt die Stufenzeiten aus encode_upload_image() zurück. Das PNG wird weder gepickelt noch
+    zwischengepuffert; der aufrufende Prozess öffnet die Datei als Upload-Puffer.
+    """
+    timings = {}
+    with open(output_path, 'wb') as output_file:
+        encode_upload_image(image_path, target_size, input_dpi, output_file, tiled_min_px, tile_rows, timings)
+    return timings
+
+
+def open_temporary_file(path):
+    """Öffnet `path` zum Lesen; die Datei wird beim Schließen gelöscht (unter POSIX sofort entkoppelt)."""
+    fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0) | getattr(os, 'O_TEMPORARY', 0))
+    if not hasattr(os, 'O_TEMPORARY'):
+        os.remove(path)
+    return os.fdopen(fd, 'rb')
+
+
+def encode_upload_image_pooled(pool, image_path, target_size, input_dpi, tiled_min_px, tile_rows, temp_dir=None):
+    """Kodiert das Upload-Bild im Prozess-Pool in eine Temp-Datei unter `temp_dir`.
+
+    Gibt (dateiobjekt, zeiten) zurück; die Datei verschwindet beim Schließen des Dateiobjekts.
+    """
+    fd, temp_path = tempfile.mkstemp(prefix='upload_', suffix='.png', dir=temp_dir)
+    os.close(fd)
+    try:
+        timings = pool.submit(_encode_upload_image_file, os.path.abspath(image_path), target_size, input_dpi,
+                              temp_path, tiled_min_px, tile_rows).result()
+        return open_temporary_file(temp_path), timings
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+# Obergrenze für upscale_processes = 0: jeder Worker hält ein ganzes Bild im Speicher
+UPSCALE_PROCESSES_AUTO_MAX = 4
+
+_upscale_pool = None
+_upscale_pool_lock = threading.Lock()
+
+
+def get_upscale_pool(settings):
+    """Gemeinsamer Prozess-Pool für Upscaling und PNG-Kodierung (None = im aktuellen Thread arbeiten)."""
+    global _upscale_pool
+    processes = int(settings.get('upscale_processes') or 0) or min(UPSCALE_PROCESSES_AUTO_MAX, os.cpu_count() or 1)
+    if processes <= 1:
+        return None
+    with _upscale_pool_lock:
+        if _upscale_pool is None:
+            # spawn statt fork: Der Hauptprozess hat bereits Threads und offene Verbindungen
+            _upscale_pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=processes, mp_context=multiprocessing.get_context('spawn'))
+            logging.info(f"Upscaling-Prozesspool gestartet: {processes} Prozesse")
+        return _upscale_pool
+
+
+def _reset_upscale_pool(pool):
+    global _upscale_pool
+    with _upscale_pool_lock:
+        if _upscale_pool is pool:
+            _upscale_pool = None
+    pool.shutdown(wait=False)
+
+
+def store_upscaled(cache, key, buffer):
+    """Legt ein kodiertes Upload-Bild im Upscaling-Cache ab; `buffer` steht danach wieder am Anfang."""
+    cache_file, temp_path = cache.create_temp_file()
+    try:
+        with cache_file:
+            shutil.copyfileobj(buffer, cache_file, DOWNLOAD_CHUNK_SIZE)
+    except OSError as e:
+        logging.warning(f"Konnte hochskaliertes Bild nicht im Cache speichern: {e}")
+        os.remove(temp_path)
+    else:
+        cache.commit(key, temp_path, 'image/png')
+    finally:
+        buffer.seek(0)
+
+
+def prepare_upload_image(image_path, target_size, input_dpi, settings, timer=None):
+    """Skaliert das Bild lokal hoch (LANCZOS) und kodiert es als PNG in einen Puffer.
+
+    Die CPU-lastige Arbeit läuft im Prozess-Pool aus get_upscale_pool(); der Worker schreibt das PNG
+    direkt in eine Datei im lokalen Temp-Ordner (nie im Ausgabeordner, der oft ein Netzlaufwerk ist),
+    die als Puffer zurückgegeben wird. Ohne Pool bleibt der Puffer bis upload_spool_max_mb im RAM und
+    wird darüber in den Temp-Ordner ausgelagert. Ergebnisse werden im Upscaling-Cache abgelegt, ein
+    Treffer wird direkt als Datei aus dem Cache zurückgegeben.
+    Gibt das zurückgespulte Dateiobjekt zurück oder None bei Fehlern (dann wird das Originalbild verwendet).
+    Stufenzeiten und Cache-Treffer werden in `timer` (JobTimer) eingetragen.
+    """
+    timer = timer or JobTimer()
+    spool_max_bytes = int(float(settings.get('upload_spool_max_mb') or 0) * 1024 * 1024)
+    tiled_min_px = float(settings.get('tiled_upscale_min_mpx') or 0) * 1e6
+    tile_rows = max(16, int(settings.get('upscale_tile_rows') or 256))
+
+    # Gleiches Quellbild mit gleicher Zielgröße bereits hochskaliert (z. B. nur andere API-Parameter)?
+    cache = get_upscale_cache(settings)
+    cache_key = None
+    if cache is not None:
+        try:
+            with timer.measure('hash'), open(image_path, 'rb') as source:
+                source_digest = hash_file(source)
+        except OSError as e:
+            logging.error(f"Fehler beim Upscaling: {e}. Verwende Originalbild.")
+            return None
+        tiled = tiled_min_px > 0 and target_size[0] * target_size[1] >= tiled_min_px
+        cache_key = upscale_key(source_digest, target_size, input_dpi, tiled)
+        cached = cache.open(cache_key)
+        timer.info['upscale_cache_hit'] = cached is not None
+        if cached is not None:
+            logging.info(f"Hochskaliertes Bild aus Cache verwendet ({cache_key[:12]})")
+            return cached[0]
+
+    temp_dir = settings.get('local_temp_folder') or None
+    buffer = None
+    try:
+        pool = get_upscale_pool(settings)
+        timings = {}
+        started = time.perf_counter()
+        if pool is not None:
+            try:
+                buffer, timings = encode_upload_image_pooled(pool, image_path, target_size, input_dpi,
+                                                             tiled_min_px, tile_rows, temp_dir)
+                buffer.seek(0, os.SEEK_END)
+            except concurrent.futures.process.BrokenProcessPool:
+                # Abgestürzter Worker (z. B. Speichermangel): Pool neu aufbauen, dieses Bild im Thread kodieren
+                logging.warning("Upscaling-Prozesspool abgebrochen, kodiere im aktuellen Thread")
+                _reset_upscale_pool(pool)
+        in_memory = buffer is None
+        if buffer is None:
+            buffer = tempfile.SpooledTemporaryFile(max_size=spool_max_bytes, suffix='.png', dir=temp_dir)
+            encode_upload_image(image_path, target_size, input_dpi, buffer, tiled_min_px, tile_rows, timings)
+        for stage, seconds in timings.items():
+            timer.add(stage, seconds)
+        if pool is not None:
+            # Warten auf einen freien Worker (inkl. Prozessstart)
+            timer.add('upscale_wait', max(0.0, time.perf_counter() - started - sum(timings.values())))
+        size = buffer.tell()
+        buffer.seek(0)
+        in_memory = in_memory and size <= spool_max_bytes
+        logging.info(f"Hochskaliertes Bild kodiert: {size / 1e6:.1f} MB ({'RAM' if in_memory else 'Datei'})")
+        if cache is not None:
+            store_upscaled(cache, cache_key, buffer)
+        return buffer
+    except Exception as e:
+        if buffer is not None:
+            buffer.close()
+        logging.error(f"Fehler beim Upscaling: {e}. Verwende Originalbild.")
+        return None
+
+
+def resolve_palette(settings, script_dir=SCRIPT_DIR):
+    """Bestimmt die an die API zu sendende Palette. Gibt (palette_str, anzahl_farben) zurück."""
+    palette_str = settings.get('palette', '').strip()
+    gpl_path = settings.get('gpl_file_path', '').strip()
+    if palette_str:
+        # Bereinige die Palette (entferne Leerzeichen, normalisiere Trennzeichen)
+        palette_str = '; '.join([color.strip() for color in palette_str.split(';') if color.strip()])
+        if palette_str:
+            num_colors = len(palette_str.split(';'))
+            logging.info(f"Verwende manuelle Palette mit {num_colors} Farben")
+            return palette_str, num_colors
+    elif gpl_path:
+        # Prüfe ob Datei existiert, sonst suche im Skript-Verzeichnis
+        if not os.path.exists(gpl_path):
+            local_gpl_path = os.path.join(script_dir, os.path.basename(gpl_path))
+            if os.path.exists(local_gpl_path):
+                logging.info(f"GPL-Datei unter absolutem Pfad nicht gefunden, verwende lokale Datei: {local_gpl_path}")
+                gpl_path = local_gpl_path
             else:
-                min_area_px = max(0.125, base_min_area_px)
+                logging.warning(f"GPL-Datei nicht gefunden: {gpl_path} (auch nicht in {local_gpl_path})")
+
+        if os.path.exists(gpl_path):
+            compiled = get_compiled_palette(gpl_path, settings.get('skin_tone_count', ''))
+            if compiled is not None:
+                num_colors = len(compiled.hex_colors)
+                logging.info(f"Verwende GPL-Palette mit {num_colors} Farben aus: {gpl_path}")
+                return compiled.payload, num_colors
+            logging.warning(f"GPL-Datei konnte nicht geladen werden: {gpl_path}")
+    else:
+        # Wenn weder eine Palette noch eine GPL-Datei angegeben ist, wird keine Palette gesendet
+        logging.info("Keine Palette angegeben - API verwendet Standard-Farbverarbeitung")
+    return '', 0
+
+
+def image_color_distribution(image_path, max_size=256, bits=5):
+    """Farbverteilung eines Bildes als (farben, anzahl); farben ist ein (N, 3) float32-Array.
+
+    Das Bild wird verkleinert und auf `bits` Bit pro Kanal quantisiert (Bin-Mitte), damit die
+    Anzahl unterschiedlicher Farben klein bleibt.
+    """
+    img = open_reduced_image(image_path, max_size).convert('RGB')
+    img.thumbnail((max_size, max_size), resample_method)
+    pixels = np.asarray(img, dtype=np.uint8).reshape(-1, 3)
+    shift = 8 - bits
+    codes = ((pixels[:, 0].astype(np.uint32) >> shift) << (2 * bits)) | \
+            ((pixels[:, 1].astype(np.uint32) >> shift) << bits) | (pixels[:, 2].astype(np.uint32) >> shift)
+    codes, counts = np.unique(codes, return_counts=True)
+    mask = (1 << bits) - 1
+    colors = np.stack([codes >> (2 * bits), (codes >> bits) & mask, codes & mask], axis=1)
+    colors = (colors << shift).astype(np.float32) + (1 << shift) / 2.0
+    return colors, counts
+
+
+def prune_palette(hex_colors, image_path, margin=30.0, min_keep=0, min_share=0.0005):
+    """Reduziert eine Palette auf die Farben, die für das Bild als nächster Treffer in Frage kommen.
+
+    Behalten wird jede Palettenfarbe, deren Abstand zu einer Bildfarbe höchstens um `margin` über dem
+    Abstand der nächsten Palettenfarbe liegt. Berücksichtigt werden nur Bildfarben mit mindestens
+    `min_share` Anteil an den Pixeln, damit Rauschen, JPEG-Artefakte und Kantenglättung nicht fast
+    die ganze Palette halten. Sind das weniger als `min_keep`, werden die insgesamt nächsten Farben
+    ergänzt. Die Reihenfolge (Skin Tones am Ende) bleibt erhalten. Gibt die reduzierte Liste zurück.
+    """
+    palette = np.array([[int(h[1:3], 16), int(h[3:5], 16), int(h[5:7], 16)] for h in hex_colors], dtype=np.float32)
+    colors, counts = image_color_distribution(image_path)
+    significant = counts >= min_share * counts.sum()
+    if significant.any():
+        colors = colors[significant]
+
+    keep = np.zeros(len(palette), dtype=bool)
+    best = np.full(len(palette), np.inf, dtype=np.float32)
+    for start in range(0, len(colors), 4096):
+        block = colors[start:start + 4096]
+        # Euklidische Abstände Bildfarben x Palette
+        dist = np.sqrt(((block[:, None, :] - palette[None, :, :]) ** 2).sum(axis=2))
+        nearest = dist.min(axis=1, keepdims=True)
+        keep |= (dist <= nearest + margin).any(axis=0)
+        best = np.minimum(best, dist.min(axis=0))
+
+    if keep.sum() < min_keep:
+        for index in np.argsort(best, kind='stable')[:min_keep]:
+            keep[index] = True
+    return [hex_color for hex_color, kept in zip(hex_colors, keep) if kept]
+
+
+def apply_palette_pruning(palette_str, image_path, settings):
+    """Reduziert processing.palette für ein Bild, wenn in den Einstellungen aktiviert.
+
+    Gibt (palette_str, anzahl_farben) zurück; bei Fehlern oder ohne numpy bleibt die Palette unverändert.
+    """
+    hex_colors = [color.strip() for color in palette_str.split(';') if color.strip()]
+    if str(settings.get('palette_prune', '')).strip().lower() not in ('1', 'true', 'yes', 'ja'):
+        return palette_str, len(hex_colors)
+    if np is None:
+        logging.warning("Palette-Reduktion benötigt 'numpy', sende vollständige Palette.")
+        return palette_str, len(hex_colors)
+    try:
+        margin = float(settings.get('palette_prune_margin') or 30)
+        min_share = float(settings.get('palette_prune_min_share') or 0) / 100
+        min_keep = int(settings.get('processing.max_colors') or 0)
+        pruned = prune_palette(hex_colors, image_path, margin, min_keep, min_share)
+    except Exception as e:
+        logging.warning(f"Palette-Reduktion fehlgeschlagen, sende vollständige Palette: {e}")
+        return palette_str, len(hex_colors)
+    logging.info(f"Palette für dieses Bild reduziert: {len(hex_colors)} -> {len(pruned)} Farben (Toleranz {margin})")
+    return '; '.join(pruned), len(pruned)
+
+
+LUT_BITS = 5
+_palette_luts = {}
+_palette_luts_lock = threading.Lock()
+
+
+def get_palette_lut(hex_colors):
+    """3D-Lookup-Tabelle (32x32x32) Farbe -> Index der nächsten Palettenfarbe.
+
+    Bei gleichem Abstand gewinnt der kleinere Index, d.h. die Farbe weiter vorne in der gesendeten
+    Reihenfolge; die ans Ende verschobenen Skin Tones werden also zuletzt verwendet.
+    Gibt (palette als (N, 3) uint8, lut als uint16-Array der Länge 32768) zurück.
+    """
+    key = tuple(hex_colors)
+    with _palette_luts_lock:
+        cached = _palette_luts.get(key)
+    if cached is not None:
+        return cached
+
+    palette = np.array([[int(h[1:3], 16), int(h[3:5], 16), int(h[5:7], 16)] for h in hex_colors], dtype=np.uint8)
+    palette_f = palette.astype(np.float32)
+    size = 1 << LUT_BITS
+    step = 256 // size
+    axis = np.arange(size, dtype=np.float32) * step + step / 2.0
+    grid = np.stack(np.meshgrid(axis, axis, axis, indexing='ij'), axis=-1).reshape(-1, 3)
+    # |g - p|^2 = |g|^2 - 2 g.p + |p|^2; |g|^2 ist pro Zeile konstant und entfällt für argmin.
+    # Alle Werte sind ganz- bzw. halbzahlig und klein genug, um in float32 exakt zu bleiben.
+    lut = np.empty(len(grid), dtype=np.uint16)
+    palette_norm = (palette_f ** 2).sum(axis=1)
+    for start in range(0, len(grid), 4096):
+        block = grid[start:start + 4096]
+        dist = palette_norm[None, :] - 2.0 * (block @ palette_f.T)
+        lut[start:start + 4096] = dist.argmin(axis=1)  # argmin liefert bei Gleichstand den ersten Index
+
+    with _palette_luts_lock:
+        if len(_palette_luts) > 8:
+            _palette_luts.clear()
+        _palette_luts[key] = (palette, lut)
+    return palette, lut
+
+
+def quantize_to_palette(image_path, hex_colors, max_colors=0, max_size=800):
+    """Lokale Vorschau der strikten Palette-Zuordnung.
+
+    Das Bild wird auf `max_size` verkleinert und jeder Pixel über die LUT der nächsten Palettenfarbe
+    zugeordnet. Mit `max_colors` bleiben nur die meistgenutzten Farben (bei Gleichstand die weiter
+    vorne stehenden); die übrigen Pixel werden auf die nächste verbliebene Farbe abgebildet.
+    Gibt (PIL-Bild, Liste der verwendeten Hex-Farben) zurück.
+    """
+    palette, lut = get_palette_lut(hex_colors)
+    img = open_reduced_image(image_path, max_size).convert('RGB')
+    img.thumbnail((max_size, max_size), resample_method)
+    pixels = np.asarray(img, dtype=np.uint8)
+    height, width = pixels.shape[:2]
+    shift = 8 - LUT_BITS
+    codes = ((pixels[..., 0].astype(np.uint32) >> shift) << (2 * LUT_BITS)) | \
+            ((pixels[..., 1].astype(np.uint32) >> shift) << LUT_BITS) | (pixels[..., 2].astype(np.uint32) >> shift)
+    indices = lut[codes]
+
+    counts = np.bincount(indices.ravel(), minlength=len(palette))
+    used = np.flatnonzero(counts)
+    if max_colors and len(used) > max_colors:
+        # Meistgenutzte Farben behalten; stabile Sortierung bevorzugt bei Gleichstand kleinere Indizes
+        order = np.argsort(-counts, kind='stable')
+        kept = np.sort(order[:max_colors])
+        kept_colors = palette[kept].astype(np.float32)
+        remap = np.arange(len(palette))
+        dropped = np.setdiff1d(used, kept)
+        dist = ((palette[dropped].astype(np.float32)[:, None, :] - kept_colors[None, :, :]) ** 2).sum(axis=2)
+        remap[dropped] = kept[dist.argmin(axis=1)]
+        indices = remap[indices]
+        used = np.unique(indices)
+
+    result = Image.fromarray(palette[indices].reshape(height, width, 3), 'RGB')
+    return result, [hex_colors[i] for i in used]
+
+
+def build_api_data(settings, params, palette_str=''):
+    """Stellt den Data-Payload für die API zusammen."""
+    output_format = settings['output.file_format']
+    data = {
+        'output.file_format': output_format,
+        'mode': settings['mode'],
+        'processing.strict_palette': 'true',
+        'output.size.width': str(params['width_cm']),
+        'output.size.height': str(params['height_cm']),
+        'output.size.unit': 'cm',
+        'output.size.input_dpi': str(params['input_dpi']),
+        'output.size.output_dpi': str(params['output_dpi']),
+        'output.curves.line_fit_tolerance': settings['line_fit_tolerance'],
+        'output.curves.allowed.quadratic_bezier': 'false',
+        'output.curves.allowed.cubic_bezier': 'false',
+        'processing.shapes.min_area_px': str(params['min_area_px'])  # Statischer Wert
+    }
+
+    # Anti-Aliasing-Parameter nur bei PNG hinzufügen
+    if output_format.lower() == 'png':
+        data['output.bitmap.anti_aliasing_mode'] = settings['anti_aliasing_mode']
+
+    # Maximale Farben hinzufügen, wenn angegeben
+    if settings.get('processing.max_colors'):
+        data['processing.max_colors'] = settings['processing.max_colors']
+
+    if palette_str:
+        data['processing.palette'] = palette_str
+    return data
+
+
+def build_output_path(output_folder, image_path, folder_number, output_format):
+    """Bestimmt den Ausgabe-Dateinamen (Ordnernummer oder <name>_vectorized)."""
+    if folder_number:
+        output_filename = f"{folder_number}.{output_format}"
+    else:
+        name, ext = os.path.splitext(os.path.basename(image_path))
+        output_filename = f"{name}_vectorized.{output_format}"
+    return os.path.join(output_folder, output_filename)
+
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def check_response_status(response):
+    """Wirft ApiError, wenn die API keinen Erfolg (200) meldet. Gibt den Content-Type zurück."""
+    if response.status_code != 200:
+        logging.error(f"API Fehler: {response.status_code} - {response.text}")
+        raise ApiError(f"Fehler: {response.status_code}\n{response.text}")
+
+    content_type = response.headers.get('Content-Type', '')
+    logging.debug(f"Erhaltener Content-Type: {content_type}")
+    return content_type
+
+
+def _looks_like(kind, head):
+    """Prüft anhand der ersten Bytes, ob der Inhalt ein SVG bzw. PNG ist."""
+    if kind == 'png':
+        return head.startswith(PNG_SIGNATURE)
+    head = head.lstrip().lower()
+    return head.startswith(b'<?xml') or head.startswith(b'<svg') or (head.startswith(b'<!') and b'<svg' in head)
+
+
+def _write_error_response(output_folder, head, chunks):
+    temp_error_path = os.path.join(output_folder, 'error_response.txt')
+    with open(temp_error_path, 'wb') as temp_file:
+        temp_file.write(head)
+        for chunk in chunks:
+            temp_file.write(chunk)
+    return temp_error_path
+
+
+# umask des Prozesses (einmal beim Import gelesen, os.umask() lässt sich nur setzend abfragen)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def published_file_mode(target_path):
+    """Dateirechte für eine neu veröffentlichte Ausgabedatei: wie die bestehende Datei, sonst 0666 & ~umask.
+
+    mkstemp() legt Temp-Dateien mit 0600 an; ohne Anpassung wären Ergebnisse auf dem Share nur für
+    den eigenen Benutzer lesbar.
+    """
+    try:
+        return os.stat(target_path).st_mode & 0o7777
+    except OSError:
+        return 0o666 & ~_UMASK
+
+
+def store_result(chunks, content_type, output_path, output_folder, output_format, mode, tee=None, timer=None):
+    """Speichert ein gestreamtes Vektorisierungsergebnis atomar. Gibt den tatsächlichen Ausgabepfad zurück.
+
+    Die Blöcke werden in eine temporäre Datei neben dem Ziel geschrieben und erst nach vollständigem
+    Empfang per os.replace() umbenannt, sodass nie eine halb geschriebene Ausgabedatei sichtbar ist.
+    Der Inhaltstyp wird anhand der ersten Bytes geprüft. Optional werden alle Blöcke zusätzlich in
+    `tee` (Dateiobjekt) geschrieben. Wirft ApiError bei unerwartetem Inhalt.
+    Die Schreibzeit ins Ziel (inkl. Umbenennen) wird in `timer` als Stufe 'write' erfasst.
+    """
+    timer = timer or JobTimer()
+    chunks = iter(chunks)
+    # Erste Bytes für die Prüfung sammeln
+    head = b''
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= 512:
+            break
+
+    # Im Preview-Modus wird das Ausgabeformat auf 'png' gesetzt
+    if mode == 'preview':
+        output_format = 'png'
+
+    if output_format == 'svg' and 'svg' not in content_type.lower():
+        # Inhalt der Antwort speichern und anzeigen
+        temp_error_path = _write_error_response(output_folder, head, chunks)
+        logging.error(f"Ungültige Antwort erhalten: {content_type} - Inhalt wurde in {temp_error_path} gespeichert.")
+        raise ApiError(f"Fehlerhafte Antwort erhalten. Der Inhalt ist kein gültiges SVG.\nDie Antwort wurde gespeichert unter: {temp_error_path}")
+
+    # Ziel anhand des Content-Type bestimmen
+    if 'image/svg+xml' in content_type.lower():
+        kind, target_path = 'svg', output_path
+    elif 'image/png' in content_type.lower():
+        kind, target_path = 'png', output_path
+        if not output_path.lower().endswith('.png'):
+            target_path = os.path.splitext(output_path)[0] + '.png'
+    else:
+        # Unerwarteter Inhaltstyp
+        temp_error_path = _write_error_response(output_folder, head, chunks)
+        logging.error(f"Unerwarteter Inhaltstyp erhalten: {content_type} - Inhalt wurde in {temp_error_path} gespeichert.")
+        raise ApiError(f"Unerwarteter Inhaltstyp erhalten: {content_type}\nDie Antwort wurde gespeichert unter: {temp_error_path}")
+
+    if not _looks_like(kind, head):
+        temp_error_path = _write_error_response(output_folder, head, chunks)
+        logging.error(f"Inhalt passt nicht zum Content-Type {content_type} - Inhalt wurde in {temp_error_path} gespeichert.")
+        raise ApiError(f"Fehlerhafte Antwort erhalten. Der Inhalt ist kein gültiges {kind.upper()}.\nDie Antwort wurde gespeichert unter: {temp_error_path}")
+
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(target_path)}.", suffix='.part',
+                                     dir=os.path.dirname(target_path) or None)
+    size = 0
+    try:
+        with os.fdopen(fd, 'wb') as output_file:
+            for chunk in itertools.chain([head], chunks):
+                with timer.measure('write'):
+                    output_file.write(chunk)
+                if tee is not None:
+                    tee.write(chunk)
+                size += len(chunk)
+            started = time.perf_counter()
+        # Schließen (Flush) und Umbenennen gehören noch zum Schreiben
+        os.chmod(temp_path, published_file_mode(target_path))
+        os.replace(temp_path, target_path)
+        timer.add('write', time.perf_counter() - started)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    logging.debug(f"{kind.upper()}-Datei gespeichert unter: {target_path} ({size} Bytes)")
+    return target_path
+
+
+def request_result(client, upload_file, upload_filename, image_digest, data, settings, deadline=None,
+                   progress=None, on_wait=None):
+    """Holt das Ergebnis von der API und gibt die (gestreamte) Antwort zurück.
+
+    Production-Aufrufe, zu denen ein Preview mit denselben processing.*-Parametern aufbewahrt wurde,
+    werden über /download ohne erneuten Upload geladen. Preview-Aufrufe werden mit
+    policy.retention_days gesendet und ihr Image-Token gespeichert. `on_wait` erhält die Wartezeiten
+    der Ratenbegrenzung und Wiederholungen (siehe RetryScheduler.run()).
+    """
+    try:
+        retention_days = float(settings.get('retention_days') or 0)
+    except ValueError:
+        retention_days = 0
+    token_store = get_token_store(settings) if retention_days > 0 else None
+    token_key = PreviewTokenStore.make_key(image_digest, data) if token_store is not None else None
+
+    if token_store is not None and data.get('mode') == 'production':
+        token = token_store.get(token_key)
+        if token is not None:
+            output_data = {k: v for k, v in data.items() if k.startswith('output.')}
+            logging.info(f"Production aus aufbewahrtem Preview laden (Token {token['image_token'][:8]}...), kein Upload")
+            response = client.download(token['image_token'], token['receipt'], output_data, deadline=deadline,
+                                       on_wait=on_wait)
+            if response.status_code == 200:
+                return response
+            logging.warning(f"Download über Image-Token fehlgeschlagen ({response.status_code}), lade Bild erneut hoch")
+            response.close()
+            token_store.discard(token_key)
+
+    if token_store is not None and data.get('mode') == 'preview':
+        data = dict(data)
+        data['policy.retention_days'] = str(int(retention_days)) if retention_days.is_integer() else str(retention_days)
+
+    upload_progress = None
+    if progress is not None:
+        def upload_progress(sent, total):
+            progress('upload', sent * 100 // total if total else None, sent, total)
+            if sent >= total:
+                # Upload fertig, jetzt rechnet die API
+                progress('api')
+    response = client.vectorize(upload_file, data, upload_filename, deadline=deadline, progress=upload_progress,
+                                on_wait=on_wait)
+    image_token = response.headers.get('X-Image-Token')
+    if token_store is not None and response.status_code == 200 and data.get('mode') == 'preview' and image_token:
+        token_store.put(token_key, image_token, response.headers.get('X-Receipt', ''), retention_days)
+        logging.debug(f"Preview-Token gespeichert: {image_token[:8]}...")
+    return response
+
+
+def report_download(chunks, progress, total=None):
+    """Reicht Download-Blöcke durch und meldet dabei den Fortschritt (Stufe 'download')."""
+    received = 0
+    for chunk in chunks:
+        received += len(chunk)
+        progress('download', received * 100 // total if total else None, received, total)
+        yield chunk
+
+
+# Stufen eines Jobs in Ablaufreihenfolge (Timing-Log und Zusammenfassung)
+TIMING_STAGES = ('upscale_wait', 'decode', 'upscale', 'encode', 'palette', 'hash', 'queue_wait', 'upload', 'server',
+                 'download', 'write')
+
+
+class JobTimer:
+    """Sammelt Dauer pro Stufe (ms) und Kennzahlen (Pixel, Bytes, Cache-Treffer) eines Jobs."""
 
-            logging.info(f"min_area_px an API: {min_area_px}")
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages_ms = {}
+        self.info = {}
 
-        except ValueError as ve:
-            messagebox.showerror("Fehler", f"Ungültiger Wert: {ve}")
-            logging.error(f"Ungültige Eingabewerte: {ve}")
-            self.progress_label.config(text="")
-            return
-        except Exception as e:
-            messagebox.showerror("Fehler", f"Fehler bei der Berechnung: {e}")
-            logging.error(f"Fehler bei der Berechnung: {e}")
-            self.progress_label.config(text="")
-            return
+    def add(self, stage, seconds):
+        self.stages_ms[stage] = self.stages_ms.get(stage, 0.0) + seconds * 1000
 
-        # ---------------------------------------------------------
-        # INTELLIGENTES UPSCALING (Lokal)
-        # Wenn Zielgröße > Originalgröße, skalieren wir das Bild lokal hoch.
-        # Das zwingt die API, auf einer höheren Auflösung zu arbeiten -> Mehr Details bleiben erhalten.
-        # ---------------------------------------------------------
-        image_to_send = image_path
-        temp_upscaled_path = None
-        
+    @contextlib.contextmanager
+    def measure(self, stage):
+        started = time.perf_counter()
         try:
-            # Ziel-Dimensionen in Pixeln berechnen (für Upscaling)
-            # WICHTIG: Seitenverhältnis des Originals beibehalten, um Verzerrung zu vermeiden!
-            req_width_px = int((width_cm / 2.54) * input_dpi)
-            req_height_px = int((height_cm / 2.54) * input_dpi)
-            
-            target_width_px = req_width_px
-            target_height_px = req_height_px
-            
-            # Skalierungsfaktor berechnen
-            scale_factor = 1.0
-
-            if self.original_image_width_px and self.original_image_height_px > 0:
-                # Berechne Skalierungsfaktoren für beide Dimensionen
-                scale_x = req_width_px / self.original_image_width_px
-                scale_y = req_height_px / self.original_image_height_px
-                
-                # Wir nutzen den GRÖSSEREN Faktor, damit das Bild mindestens die gewünschten Maße hat (Cover-Strategie),
-                # oder den Faktor, der vom User impliziert wird.
-                # Um Verzerrung zu vermeiden, nutzen wir denselben Faktor für beide Seiten.
-                # Wir nehmen hier den Durchschnitt oder Max? Nehmen wir Max für maximale Details.
-                scale_factor = max(scale_x, scale_y)
-                
-                # Neuberechnung der Zielpixel ohne Verzerrung
-                target_width_px = int(self.original_image_width_px * scale_factor)
-                target_height_px = int(self.original_image_height_px * scale_factor)
-                
-                logging.info(f"Zielgröße korrigiert (Seitenverhältnis): {target_width_px}x{target_height_px} (Faktor: {scale_factor:.2f})")
-
-            # Maximale Dimension für Upscaling begrenzen (z.B. 8000px)
-            MAX_DIMENSION = 8000
-            
-            # Nur skalieren, wenn Originalgröße bekannt und Faktor > 1.1
-            if self.original_image_width_px and scale_factor > 1.1:
-                if target_width_px > MAX_DIMENSION or target_height_px > MAX_DIMENSION:
-                    scale_down = MAX_DIMENSION / max(target_width_px, target_height_px)
-                    target_width_px = int(target_width_px * scale_down)
-                    target_height_px = int(target_height_px * scale_down)
-                    scale_factor *= scale_down # Faktor korrigieren
-                    logging.warning(f"Zielgröße für Upload limitiert auf {MAX_DIMENSION}px")
-
-                logging.info(f"Upscaling aktiv: {self.original_image_width_px}x{self.original_image_height_px} -> {target_width_px}x{target_height_px}")
-                
-                with Image.open(image_path) as img:
-                    # Konvertiere zu RGB falls nötig
-                    if img.mode in ['P', 'RGBA']:
-                        img = img.convert('RGB')
-                        
-                    # Hochwertiges Resampling (LANCZOS)
-                    img_resized = img.resize((target_width_px, target_height_px), Image.Resampling.LANCZOS)
-                    
-                    # Temporär speichern
-                    base_name = os.path.splitext(os.path.basename(image_path))[0]
-                    temp_upscaled_path = os.path.join(self.output_folder.get(), f"temp_upload_{base_name}.png")
-                    
-                    # DPI im Header setzen
-                    img_resized.save(temp_upscaled_path, format='PNG', dpi=(input_dpi, input_dpi))
-                    image_to_send = temp_upscaled_path
-                    logging.info(f"Temporäres hochskaliertes Bild erstellt: {temp_upscaled_path}")
-                    
-                # WICHTIG: min_area_px ANPASSEN!
-                # Da das Bild jetzt viel mehr Pixel hat (Faktor^2 mehr Fläche), 
-                # müssen wir min_area_px NICHT erhöhen, sondern wir lassen es entweder gleich (für relative Verfeinerung)
-                # oder passen es an, wenn wir exakt denselben Look wie beim Original wollten.
-                # ABER: Der User will MEHR Details ("Zu große Flächen").
-                # Das bedeutet: Wir sollten min_area_px NICHT mit dem Skalierungsfaktor wachsen lassen.
-                # Im Gegenteil: Wir lassen min_area_px auf dem Basiswert (z.B. 50).
-                # Da 50 Pixel in einem 4000px Bild viel kleiner sind als in einem 1000px Bild,
-                # entstehen automatisch viel kleinere Flächen -> MEHR Details.
-                
-                # Falls das immer noch zu grob ist, können wir min_area_px sogar noch weiter reduzieren.
-                # Wir gehen sicherheitshalber auf Nummer sicher und lassen es beim Basiswert,
-                # stellen aber sicher, dass er nicht versehentlich hochskaliert wurde.
-                
-            else:
-                logging.info("Kein Upscaling nötig (Faktor <= 1.1)")
-                
-        except Exception as e:
-            logging.error(f"Fehler beim Upscaling: {e}. Verwende Originalbild.")
-            image_to_send = image_path
-            temp_upscaled_path = None
-
-        # min_area_px final setzen (Basiswert verwenden, max 100)
-        if base_min_area_px > 100:
-             min_area_px = 100.0
-        else:
-             min_area_px = max(0.125, base_min_area_px)
-             
-        logging.info(f"Sende min_area_px: {min_area_px} an API (bei Bildgröße {target_width_px}x{target_height_px})")
-
-        # Data payload für die API
-        data = {
-            'output.file_format': output_format,
-            'mode': mode,
-            'processing.strict_palette': 'true',
-            'output.size.width': str(width_cm),
-            'output.size.height': str(height_cm),
-            'output.size.unit': 'cm',
-            'output.size.input_dpi': str(input_dpi),
-            'output.size.output_dpi': str(output_dpi),
-            'output.curves.line_fit_tolerance': self.line_fit_tolerance.get(),
-            'output.curves.allowed.quadratic_bezier': 'false',
-            'output.curves.allowed.cubic_bezier': 'false',
-            'processing.shapes.min_area_px': str(min_area_px)  # Statischer Wert
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - started)
+
+    def record(self, **fields):
+        """Datensatz für das Timing-Log (eine JSON-Zeile)."""
+        stages = {stage: round(self.stages_ms[stage], 1) for stage in TIMING_STAGES if stage in self.stages_ms}
+        return {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            **fields,
+            'total_ms': round((time.perf_counter() - self.started) * 1000, 1),
+            'stages_ms': stages,
+            **self.info,
         }
 
-        # Anti-Aliasing-Parameter nur bei PNG hinzufügen
-        if output_format.lower() == 'png':
-            data['output.bitmap.anti_aliasing_mode'] = self.anti_aliasing_mode.get()
-
-        # Maximale Farben hinzufügen, wenn angegeben
-        if self.max_colors.get():
-            data['processing.max_colors'] = self.max_colors.get()
 
-        # Bestimmen des Ausgabe-Dateinamens mit Ordnernummer
-        folder_number = self.folder_number.get().strip()
-        if folder_number:
-            output_filename = f"{folder_number}.{output_format}"
-        else:
-            base_filename = os.path.basename(image_path)
-            name, ext = os.path.splitext(base_filename)
-            output_filename = f"{name}_vectorized.{output_format}"
-
-        output_path = os.path.join(self.output_folder.get(), output_filename)
-        self.output_path = output_path
-
-        # Daten für die Palette verarbeiten
-        palette_str = ''
-        num_colors_sent = 0  # Anzahl der Farben, die an die API gesendet werden
-        if self.palette.get().strip():
-            palette_str = self.palette.get().strip()
-            # Bereinige die Palette (entferne Leerzeichen, normalisiere Trennzeichen)
-            palette_str = '; '.join([color.strip() for color in palette_str.split(';') if color.strip()])
+class TimingStats:
+    """Zusammenfassung der Stufenzeiten (p50/p95) über viele Jobs, z. B. für die Batch-Auswertung."""
+
+    def __init__(self, max_samples=10000):
+        self._lock = threading.Lock()
+        self._samples = collections.defaultdict(lambda: collections.deque(maxlen=max_samples))
+        self.jobs = 0
+        self.failed = 0
+
+    def add(self, record):
+        with self._lock:
+            self.jobs += 1
+            if record.get('status') != 'ok':
+                self.failed += 1
+            for stage, ms in record.get('stages_ms', {}).items():
+                self._samples[stage].append(ms)
+            if 'total_ms' in record:
+                self._samples['total'].append(record['total_ms'])
+
+    @classmethod
+    def from_file(cls, path, last=0):
+        """Liest ein Timing-Log (JSON-Zeilen); mit `last` nur die letzten Jobs."""
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = collections.deque(f, maxlen=last or None)
+        stats = cls()
+        for line in lines:
+            try:
+                stats.add(json.loads(line))
+            except ValueError:
+                continue
+        return stats
+
+    def summary(self):
+        """{stufe: (anzahl, p50_ms, p95_ms)} in Ablaufreihenfolge, zuletzt 'total'."""
+        with self._lock:
+            return {stage: (len(self._samples[stage]), percentile(self._samples[stage], 50),
+                            percentile(self._samples[stage], 95))
+                    for stage in TIMING_STAGES + ('total',) if self._samples.get(stage)}
+
+    def format(self):
+        lines = [f"Stufenzeiten über {self.jobs} Jobs ({self.failed} fehlgeschlagen), p50 / p95 in ms:"]
+        for stage, (count, p50, p95) in self.summary().items():
+            lines.append(f"  {stage:<9} {p50:>9.1f} {p95:>9.1f}  ({count} Jobs)")
+        return '\n'.join(lines)
+
+
+_job_timings = TimingStats()
+_timing_log_lock = threading.Lock()
+
+
+def timing_log_path(settings):
+    return settings.get('timing_log_file') or os.path.join(SCRIPT_DIR, 'cache', 'job_timings.jsonl')
+
+
+def write_job_timing(settings, record):
+    """Hängt einen Job-Datensatz an das Timing-Log an und nimmt ihn in die Prozess-Zusammenfassung auf."""
+    _job_timings.add(record)
+    path = timing_log_path(settings)
+    line = json.dumps(record, ensure_ascii=False)
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with _timing_log_lock, open(path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+    except OSError as e:
+        logging.warning(f"Timing-Log konnte nicht geschrieben werden ({path}): {e}")
+    stages = ', '.join(f"{stage} {ms:.0f}" for stage, ms in record['stages_ms'].items())
+    logging.info(f"Zeiten {record['job']} ({record['status']}): {record['total_ms']:.0f} ms gesamt; {stages} ms")
+
+
+def vectorize_file(image_path, output_path, settings, original_size=None, script_dir=SCRIPT_DIR, client=None,
+                   progress=None, source_path=None):
+    """Kompletter Ablauf für ein Bild: Größenberechnung, Upscaling, Palette, API-Aufruf, Speichern.
+
+    `settings` ist ein Dict wie DEFAULT_SETTINGS plus 'width_cm' und 'height_cm'.
+    Gibt ein Dict mit 'output_path', 'num_colors_sent' und 'cache_hit' zurück.
+    Wirft ValueError bei ungültigen Parametern und ApiError bei API-Fehlern.
+    Ohne `client` wird der gemeinsame Client aus get_client() verwendet.
+    `progress(stufe, prozent=None, bytes_fertig=None, bytes_gesamt=None)` wird aus dem aufrufenden
+    Thread mit den Stufen 'upscale', 'upload', 'api', 'download' und 'done' aufgerufen.
+    `source_path` ist optional eine lokale Kopie von `image_path`, aus der die Pixel gelesen werden
+    (z. B. vom OrderPrefetcher); Dateinamen werden weiterhin aus `image_path` gebildet.
+    Zeiten und Bytes pro Stufe werden – auch bei Fehlern – mit write_job_timing() protokolliert.
+    """
+    timer = JobTimer()
+    fields = {'job': os.path.basename(output_path), 'image': image_path,
+              'mode': settings.get('mode'), 'format': settings.get('output.file_format')}
+    try:
+        result = _vectorize_file(image_path, output_path, settings, original_size, script_dir, client,
+                                 progress, source_path or image_path, timer)
+    except BaseException as e:
+        message = str(e).splitlines()[0] if str(e) else type(e).__name__
+        write_job_timing(settings, timer.record(**fields, status='error', error=message))
+        raise
+    write_job_timing(settings, timer.record(**fields, status='ok'))
+    return result
+
+
+def _vectorize_file(image_path, output_path, settings, original_size, script_dir, client, progress, source_path,
+                    timer):
+    if progress is None:
+        def progress(stage, percent=None, bytes_done=None, bytes_total=None):
+            pass
+    if client is None:
+        client = get_client(settings)
+    job_deadline_s = float(settings.get('job_deadline_s') or 0)
+    deadline = time.monotonic() + job_deadline_s if job_deadline_s > 0 else None
+    params = parse_job_parameters(settings)
+    if original_size is None:
+        original_size = read_original_size(source_path, params)
+    original_width_px, original_height_px = original_size[0], original_size[1]
+    with contextlib.suppress(OSError):
+        timer.info['source_bytes'] = os.path.getsize(source_path)
+
+    # ---------------------------------------------------------
+    # INTELLIGENTES UPSCALING (Lokal)
+    # Wenn Zielgröße > Originalgröße, skalieren wir das Bild lokal hoch.
+    # Das zwingt die API, auf einer höheren Auflösung zu arbeiten -> Mehr Details bleiben erhalten.
+    # min_area_px bleibt dabei auf dem Basiswert: 50 Pixel in einem 4000px Bild sind viel kleiner
+    # als in einem 1000px Bild, es entstehen automatisch kleinere Flächen -> MEHR Details.
+    # ---------------------------------------------------------
+    target_width_px, target_height_px, upscale = compute_upscale_target(original_width_px, original_height_px, params)
+    timer.info.update(source_px=[int(original_width_px), int(original_height_px)], upscaled=upscale,
+                      upload_px=[target_width_px, target_height_px] if upscale
+                      else [int(original_width_px), int(original_height_px)])
+    upload_file = None
+    upload_filename = os.path.basename(image_path)
+    if upscale:
+        logging.info(f"Upscaling aktiv: {original_width_px}x{original_height_px} -> {target_width_px}x{target_height_px}")
+        progress('upscale')
+        upload_file = prepare_upload_image(source_path, (target_width_px, target_height_px), params['input_dpi'], settings,
+                                           timer)
+        upload_filename = f"upload_{os.path.splitext(upload_filename)[0]}.png"
+    else:
+        logging.info(f"Kein Upscaling nötig (Faktor <= {UPSCALE_THRESHOLD})")
+    if upload_file is None:
+        upload_file = open(source_path, 'rb')
+        upload_filename = os.path.basename(image_path)
+
+    logging.info(f"Sende min_area_px: {params['min_area_px']} an API (bei Bildgröße {target_width_px}x{target_height_px})")
+
+    with upload_file:
+        with timer.measure('palette'):
+            palette_str, num_colors_sent = resolve_palette(settings, script_dir)
             if palette_str:
-                num_colors_sent = len(palette_str.split(';'))
-                data['processing.palette'] = palette_str
-                logging.info(f"Verwende manuelle Palette mit {num_colors_sent} Farben")
-        elif self.gpl_file_path.get().strip():
-            gpl_path = self.gpl_file_path.get().strip()
-            # Prüfe ob Datei existiert, sonst suche im Skript-Verzeichnis
-            if not os.path.exists(gpl_path):
-                local_gpl_path = os.path.join(self.script_dir, os.path.basename(gpl_path))
-                if os.path.exists(local_gpl_path):
-                    logging.info(f"GPL-Datei unter absolutem Pfad nicht gefunden, verwende lokale Datei: {local_gpl_path}")
-                    gpl_path = local_gpl_path
-                else:
-                    logging.warning(f"GPL-Datei nicht gefunden: {gpl_path} (auch nicht in {local_gpl_path})")
-            
-            if os.path.exists(gpl_path):
-                palette_str = self.create_palette_from_gpl(gpl_path)
-                if palette_str:
-                    num_colors_sent = len(palette_str.split(';'))
-                    data['processing.palette'] = palette_str
-                    logging.info(f"Verwende GPL-Palette mit {num_colors_sent} Farben aus: {gpl_path}")
-                else:
-                    logging.warning(f"GPL-Datei konnte nicht geladen werden: {gpl_path}")
-        else:
-            # Wenn weder eine Palette noch eine GPL-Datei angegeben ist, wird keine Palette gesendet
-            logging.info("Keine Palette angegeben - API verwendet Standard-Farbverarbeitung")
+                palette_str, num_colors_sent = apply_palette_pruning(palette_str, source_path, settings)
+        timer.info['palette_colors'] = num_colors_sent
+        data = build_api_data(settings, params, palette_str)
 
         # Logging der gesendeten Daten hinzufügen (ohne sensible Daten)
         log_data = {k: v for k, v in data.items() if 'palette' not in k.lower() or not v}
@@ -695,401 +2262,903 @@ class VectorizerApp(tk.Tk):
         logging.debug(f"Vollständige API Daten: {data}")
         logging.debug(f"Bildpfad: {image_path}")
 
-        # API-Anfrage senden
-        try:
-            with open(image_to_send, 'rb') as image_file:
-                files = {'image': image_file}
-                response = requests.post(
-                    'https://de.vectorizer.ai/api/v1/vectorize',
-                    files=files,
-                    data=data,
-                    auth=(api_key, api_secret),
-                    stream=True
-                )
-
-            # Aufräumen: Temporäres Bild löschen
-            if temp_upscaled_path and os.path.exists(temp_upscaled_path):
-                try:
-                    os.remove(temp_upscaled_path)
-                    logging.debug(f"Temporäres Bild gelöscht: {temp_upscaled_path}")
-                except Exception as e:
-                    logging.warning(f"Konnte temporäres Bild nicht löschen: {e}")
+        # Identisches Bild mit identischen Parametern bereits vektorisiert?
+        with timer.measure('hash'):
+            image_digest = hash_file(upload_file)
+        upload_file.seek(0, os.SEEK_END)
+        timer.info['upload_bytes'] = upload_file.tell()
+        upload_file.seek(0)
+        cache = get_result_cache(settings)
+        cache_key = cached = None
+        if cache is not None:
+            cache_key = cache.make_key(image_digest, data)
+            cached = cache.open(cache_key)
+        timer.info['result_cache_hit'] = cached is not None
+
+        if cached is None:
+            # Anfragedauer aufteilen: Warten auf Ratenbegrenzung/Wiederholungen, Senden des Bildes
+            # (je Versuch vom Start bis zum letzten Byte) und der Rest als Warten auf die API
+            waits = []
+            uploads = []
+            attempt_started = [time.perf_counter()]
+
+            def on_wait(seconds):
+                waits.append(seconds)
+                attempt_started[0] = time.perf_counter()
+
+            def timed_progress(stage, percent=None, bytes_done=None, bytes_total=None):
+                if stage == 'api':
+                    uploads.append(time.perf_counter() - attempt_started[0])
+                progress(stage, percent, bytes_done, bytes_total)
+
+            # API-Anfrage senden (Production ggf. ohne Upload aus aufbewahrtem Preview)
+            request_started = time.perf_counter()
+            response = request_result(client, upload_file, upload_filename, image_digest, data, settings, deadline,
+                                      timed_progress, on_wait)
+            elapsed = time.perf_counter() - request_started
+            timer.add('queue_wait', sum(waits))
+            timer.add('upload', sum(uploads))
+            timer.add('server', max(0.0, elapsed - sum(waits) - sum(uploads)))
+
+    if cached is not None:
+        cached_file, content_type = cached
+        logging.info(f"Ergebnis aus Cache verwendet ({cache_key[:12]}), kein API-Aufruf")
+        with cached_file:
+            final_path = store_result(iter(lambda: cached_file.read(DOWNLOAD_CHUNK_SIZE), b''), content_type,
+                                      output_path, settings['output_folder'], settings['output.file_format'], settings['mode'],
+                                      timer=timer)
+    else:
+        with response:
+            content_type = check_response_status(response)
+            # Ergebnis gestreamt speichern und dabei gleichzeitig in den Cache schreiben
+            cache_file, cache_temp_path = cache.create_temp_file() if cache is not None else (None, None)
+            try:
+                with cache_file or contextlib.nullcontext():
+                    total = int(response.headers.get('Content-Length') or 0) or None
+                    chunks = report_download(response.iter_content(DOWNLOAD_CHUNK_SIZE), progress, total)
+                    # Download = Empfangsdauer ohne die Zeit für das Schreiben ins Ziel
+                    download_started = time.perf_counter()
+                    write_before = timer.stages_ms.get('write', 0.0)
+                    final_path = store_result(chunks, content_type, output_path, settings['output_folder'],
+                                              settings['output.file_format'], settings['mode'], tee=cache_file,
+                                              timer=timer)
+                    timer.add('download', time.perf_counter() - download_started
+                              - (timer.stages_ms.get('write', 0.0) - write_before) / 1000)
+            except BaseException:
+                if cache_temp_path:
+                    os.remove(cache_temp_path)
+                raise
+        if cache is not None:
+            cache.commit(cache_key, cache_temp_path, content_type)
+    if cache is not None:
+        logging.debug(f"Ergebnis-Cache: {cache.stats()}")
+    with contextlib.suppress(OSError):
+        timer.info['result_bytes'] = os.path.getsize(final_path)
+    logging.info("Vektorisierung erfolgreich abgeschlossen.")
+    progress('done', 100)
+    return {'output_path': final_path, 'num_colors_sent': num_colors_sent, 'cache_hit': cached is not None}
+
+
+def percentile(values, q):
+    """q-Perzentil (0-100, nächster Rang) einer Liste von Zahlen; None bei leerer Liste."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, -(-len(ordered) * q // 100) - 1))]
+
+
+# GUI-Ereignisse: Abfrageintervall, Zeitbudget pro Durchlauf und Schwelle für Warnungen (ms)
+UI_POLL_INTERVAL_MS = 30
+UI_DRAIN_BUDGET_MS = 20
+UI_STALL_WARNING_MS = 250
+
+ProgressEvent = collections.namedtuple('ProgressEvent', 'job stage percent bytes_done bytes_total')
+
+
+class UiEventBus:
+    """Threadsichere Ereignis-Warteschlange zwischen Worker-Threads und dem Tk-Thread.
+
+    Worker-Threads rufen nur post() bzw. call() auf; der Tk-Thread leert die Warteschlange per after()
+    und ruft die Handler auf. ProgressEvents desselben Jobs werden pro Durchlauf zusammengefasst.
+    Nebenbei wird gemessen, wie stark sich die Ereignisschleife verspätet (Loop-Lag) und wie lange
+    Ereignisse auf ihre Verarbeitung warten.
+    """
+
+    def __init__(self, root, interval_ms=UI_POLL_INTERVAL_MS, budget_ms=UI_DRAIN_BUDGET_MS):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.budget_ms = budget_ms
+        self._queue = queue.SimpleQueue()
+        self._handlers = {}
+        self._after_id = None
+        self._expected = None
+        self.loop_lag_ms = collections.deque(maxlen=2000)
+        self.event_delay_ms = collections.deque(maxlen=2000)
+
+    def subscribe(self, event_type, handler):
+        self._handlers.setdefault(event_type, []).append(handler)
+
+    def post(self, event):
+        """Stellt ein Ereignis zu (aus beliebigem Thread); Handler laufen im Tk-Thread."""
+        self._queue.put((time.perf_counter(), event))
+
+    def call(self, func, *args, **kwargs):
+        """Führt `func` im Tk-Thread aus (aus beliebigem Thread aufrufbar)."""
+        self.post(functools.partial(func, *args, **kwargs))
+
+    def start(self):
+        self._expected = time.perf_counter() + self.interval_ms / 1000
+        self._after_id = self.root.after(self.interval_ms, self._drain)
+
+    def stop(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _drain(self):
+        now = time.perf_counter()
+        lag_ms = max(0.0, (now - self._expected) * 1000)
+        self.loop_lag_ms.append(lag_ms)
+        if lag_ms > UI_STALL_WARNING_MS:
+            logging.warning(f"GUI-Ereignisschleife {lag_ms:.0f} ms blockiert")
+
+        # Ereignisse bis zum Zeitbudget abholen, Fortschritt je Job auf den letzten Stand reduzieren
+        deadline = now + self.budget_ms / 1000
+        events = []
+        progress_index = {}  # Job -> Position seines letzten ProgressEvents in `events`
+        while time.perf_counter() < deadline:
+            try:
+                posted, event = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self.event_delay_ms.append((time.perf_counter() - posted) * 1000)
+            if isinstance(event, ProgressEvent):
+                if event.job in progress_index:
+                    events[progress_index[event.job]] = None
+                progress_index[event.job] = len(events)
+            events.append(event)
+
+        for event in events:
+            if event is None:
+                continue
+            try:
+                if isinstance(event, functools.partial):
+                    event()
+                else:
+                    for handler in self._handlers.get(type(event), []):
+                        handler(event)
+            except Exception as e:
+                logging.error(f"Fehler bei der Verarbeitung eines GUI-Ereignisses: {e}")
+
+        self._expected = time.perf_counter() + self.interval_ms / 1000
+        self._after_id = self.root.after(self.interval_ms, self._drain)
+
+    def latency_stats(self):
+        """p50/p95/Maximum von Loop-Lag und Ereignis-Wartezeit in ms."""
+        lags, delays = list(self.loop_lag_ms), list(self.event_delay_ms)
+        return {
+            'loop_lag_p50': percentile(lags, 50),
+            'loop_lag_p95': percentile(lags, 95),
+            'loop_lag_max': max(lags, default=None),
+            'event_delay_p50': percentile(delays, 50),
+            'event_delay_p95': percentile(delays, 95),
+            'events': len(delays),
+        }
 
-            response_content = response.content
 
-            if response.status_code == 200:
-                content_type = response.headers.get('Content-Type', '')
-                logging.debug(f"Erhaltener Content-Type: {content_type}")
-
-                # Im Preview-Modus wird das Ausgabeformat auf 'png' gesetzt
-                if mode == 'preview':
-                    output_format = 'png'
-
-                if output_format == 'svg' and 'svg' not in content_type.lower():
-                    # Inhalt der Antwort speichern und anzeigen
-                    temp_error_path = os.path.join(self.output_folder.get(), 'error_response.txt')
-                    with open(temp_error_path, 'wb') as temp_file:
-                        temp_file.write(response_content)
-                    error_message = f"Fehlerhafte Antwort erhalten. Der Inhalt ist kein gültiges SVG.\nDie Antwort wurde gespeichert unter: {temp_error_path}"
-                    messagebox.showerror("API Fehler", error_message)
-                    logging.error(f"Ungültige Antwort erhalten: {response.status_code} - Inhalt wurde in {temp_error_path} gespeichert.")
-                    return
-
-                # Speichere die Antwort basierend auf dem Content-Type
-                if 'image/svg+xml' in content_type.lower():
-                    # Speichere die Antwort als SVG
-                    with open(output_path, 'wb') as output_file:
-                        output_file.write(response_content)
-                    logging.debug(f"SVG-Datei gespeichert unter: {output_path}")
-                elif 'image/png' in content_type.lower():
-                    # Speichere die Antwort als PNG
-                    png_output_path = output_path
-                    if not output_path.lower().endswith('.png'):
-                        png_output_path = os.path.splitext(output_path)[0] + '.png'
-                    with open(png_output_path, 'wb') as output_file:
-                        output_file.write(response_content)
-                    logging.debug(f"PNG-Datei gespeichert unter: {png_output_path}")
-                    # Setze output_path auf die PNG-Datei
-                    self.output_path = png_output_path
-                else:
-                    # Unerwarteter Inhaltstyp
-                    temp_error_path = os.path.join(self.output_folder.get(), 'error_response.txt')
-                    with open(temp_error_path, 'wb') as temp_file:
-                        temp_file.write(response_content)
-                    error_message = f"Unerwarteter Inhaltstyp erhalten: {content_type}\nDie Antwort wurde gespeichert unter: {temp_error_path}"
-                    messagebox.showerror("API Fehler", error_message)
-                    logging.error(f"Unerwarteter Inhaltstyp erhalten: {content_type} - Inhalt wurde in {temp_error_path} gespeichert.")
-                    return
-
-                # Anzeige der Anzahl der gesendeten Farben
-                messagebox.showinfo("Erfolg", f"Die Vektorisierung war erfolgreich.\nAnzahl der an die API gesendeten Farbcodes: {num_colors_sent}")
-                logging.info("Vektorisierung erfolgreich abgeschlossen.")
-                # Ergebnisbild anzeigen
-                self.display_image_on_canvas(self.output_path, original=False)
+# Anzeige: größte gespeicherte Stufe (längste Seite) und Wartezeit nach dem letzten Resize bis zur scharfen Darstellung
+DISPLAY_MAX_SIZE = 2048
+DISPLAY_MIN_SIZE = 64
+DISPLAY_REFINE_DELAY_MS = 150
+# SVG-Vorschauen werden in Stufen dieser Größe gerastert, damit kleine Resizes den Cache treffen
+SVG_RENDER_STEP = 256
+SVG_RENDER_CACHE_ENTRIES = 8
+
+_svg_renders = collections.OrderedDict()  # (pfad, mtime, größe) -> PIL-Bild
+_svg_renders_lock = threading.Lock()
+
+
+def svg_render_size(canvas_size):
+    """Rastergröße (längste Seite) für eine Canvas-Größe, aufgerundet auf SVG_RENDER_STEP."""
+    steps = max(1, -(-int(canvas_size) // SVG_RENDER_STEP))
+    return min(DISPLAY_MAX_SIZE, steps * SVG_RENDER_STEP)
+
+
+def _svg_length(value):
+    match = re.fullmatch(r'\s*([0-9.]+)\s*([a-z]*)\s*', value or '')
+    return (float(match.group(1)), match.group(2)) if match else (None, None)
+
+
+def svg_aspect_ratio(svg_path):
+    """Seitenverhältnis (Breite/Höhe) aus width/height bzw. viewBox des Wurzelelements, sonst None."""
+    try:
+        for _, element in ElementTree.iterparse(svg_path, events=('start',)):
+            width, width_unit = _svg_length(element.get('width'))
+            height, height_unit = _svg_length(element.get('height'))
+            if width and height and width_unit == height_unit:
+                return width / height
+            view_box = (element.get('viewBox') or '').replace(',', ' ').split()
+            if len(view_box) == 4 and float(view_box[3]) > 0:
+                return float(view_box[2]) / float(view_box[3])
+            return None
+    except (ElementTree.ParseError, OSError, ValueError):
+        return None
+
+
+def render_svg(svg_path, max_size):
+    """Rastert ein SVG direkt so, dass die längste Seite `max_size` Pixel hat (statt in Originalgröße)."""
+    ratio = svg_aspect_ratio(svg_path)
+    size_args = {'output_height': max_size} if ratio is not None and ratio < 1 else {'output_width': max_size}
+    # Verbesserte Behandlung von UNC-Pfaden
+    normalized_path = os.path.normpath(svg_path)
+    if normalized_path.startswith('\\\\'):
+        # UNC-Pfad korrekt formatieren
+        file_url = 'file:' + normalized_path.replace('\\', '/')
+    else:
+        # Lokaler Pfad
+        file_url = 'file:///' + normalized_path.replace('\\', '/')
+    try:
+        logging.debug(f"Versuche SVG zu laden von: {file_url}")
+        png_data = cairosvg.svg2png(url=file_url, **size_args)
+    except Exception as e:
+        logging.error(f"Fehler beim Konvertieren der SVG-Datei: {e}")
+        # Alternative: Datei direkt lesen
+        with open(svg_path, 'rb') as svg_file:
+            png_data = cairosvg.svg2png(bytestring=svg_file.read(), **size_args)
+        logging.info("SVG erfolgreich mit alternativer Methode geladen")
+    img = Image.open(BytesIO(png_data))
+    img.load()
+    return img
+
+
+def get_svg_render(svg_path, mtime, max_size):
+    """render_svg() mit LRU-Cache je (Datei, mtime, Größe); threadsicher, läuft im Hintergrund-Thread."""
+    key = (svg_path, mtime, max_size)
+    with _svg_renders_lock:
+        img = _svg_renders.get(key)
+        if img is not None:
+            _svg_renders.move_to_end(key)
+            return img
+    started = time.perf_counter()
+    img = render_svg(svg_path, max_size)
+    logging.debug(f"SVG gerastert ({img.width}x{img.height}) in {(time.perf_counter() - started) * 1000:.0f} ms")
+    with _svg_renders_lock:
+        _svg_renders[key] = img
+        while len(_svg_renders) > SVG_RENDER_CACHE_ENTRIES:
+            _svg_renders.popitem(last=False)
+    return img
+
+
+class DisplayPyramid:
+    """Einmal dekodiertes Bild in mehreren Auflösungen (jeweils halbiert) für die Canvas-Anzeige.
+
+    Beim Resize wird die kleinste Stufe gewählt, die mindestens so groß wie das Ziel ist,
+    sodass auch die schnelle Skalierung (bilinear) scharf genug bleibt und nie das ganze
+    Originalbild angefasst werden muss.
+    """
+
+    def __init__(self, img, max_size=DISPLAY_MAX_SIZE):
+        if img.mode not in ('RGB', 'RGBA', 'L'):
+            img = img.convert('RGBA' if 'transparency' in img.info or img.mode in ('LA', 'PA') else 'RGB')
+        if max(img.size) > max_size:
+            img = img.copy()
+            img.thumbnail((max_size, max_size), resample_method)
+        self.levels = [img]
+        while min(img.size) >= 2 * DISPLAY_MIN_SIZE:
+            img = img.reduce(2)
+            self.levels.append(img)
+
+    @property
+    def size(self):
+        return self.levels[0].size
+
+    def level_for(self, size):
+        """Kleinste Stufe, die in beiden Richtungen mindestens `size` groß ist (sonst die größte)."""
+        for level in reversed(self.levels):
+            if level.width >= size[0] and level.height >= size[1]:
+                return level
+        return self.levels[0]
+
+    def render(self, size, fast=False):
+        level = self.level_for(size)
+        if level.size == tuple(size):
+            return level
+        return level.resize(size, fast_resample_method if fast else resample_method)
+
+
+def next_folder_numbers(folder_number, count):
+    """Die nächsten `count` Ordnernummern nach `folder_number` (führende Nullen bleiben erhalten)."""
+    number = folder_number.split('-')[0].strip()
+    if not number.isdigit():
+        return []
+    return [str(int(number) + step).zfill(len(number)) for step in range(1, count + 1)]
+
+
+PrefetchedOrder = collections.namedtuple(
+    'PrefetchedOrder', 'folder image_path local_path source_state dimensions pyramid nbytes')
+
+
+class OrderPrefetcher:
+    """Lädt die auf eine Auftragsnummer folgenden Aufträge im Hintergrund vor.
+
+    Pro Nummer wird der Ordner aufgelöst, input.png in einen lokalen Temp-Ordner kopiert und daraus
+    die Maße sowie die DisplayPyramid berechnet. Die Pyramiden zusammen bleiben unter `max_bytes`;
+    verdrängt werden zuerst Aufträge, die nicht mehr zu den nächsten Nummern gehören. Springt der
+    Bediener zu einer anderen Nummer, werden noch nicht begonnene Vorladeaufträge verworfen.
+    """
+
+    def __init__(self, settings, depth=3, max_bytes=256 * 1024 * 1024):
+        self.settings = settings
+        self.depth = depth
+        self.max_bytes = max_bytes
+        self.folder = os.path.join(settings.get('local_temp_folder') or tempfile.gettempdir(), 'vectorizer_prefetch')
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()  # ordnernummer -> PrefetchedOrder
+        self._total_bytes = 0
+        self._local_copies = collections.OrderedDict()  # bildpfad -> PrefetchedOrder bereits übernommener Aufträge
+        self._wanted = set()  # Nummern der letzten prefetch()-Anfrage
+        self._generation = 0
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(settings, int(settings.get('prefetch_depth') or 0),
+                   int(float(settings.get('prefetch_max_mb') or 0) * 1024 * 1024))
+
+    def prefetch(self, input_base, folder_number):
+        """Plant das Vorladen der nächsten Nummern nach `folder_number` ein."""
+        if self.depth <= 0 or self.max_bytes <= 0:
+            return
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            self._wanted = set(next_folder_numbers(folder_number, self.depth))
+            numbers = [n for n in sorted(self._wanted) if n not in self._entries]
+        for number in numbers:
+            self._executor.submit(self._load, input_base, number, generation)
+
+    def _load(self, input_base, number, generation):
+        if generation != self._generation:
+            return
+        try:
+            folders = find_order_folders(input_base, number, self.settings)
+            if len(folders) != 1:
+                # Keine oder mehrdeutige Treffer brauchen ohnehin eine Auswahl im GUI
+                return
+            image_path = os.path.join(input_base, folders[0], 'input.png')
+            stat = os.stat(image_path)
+            os.makedirs(self.folder, exist_ok=True)
+            local_path = os.path.join(
+                self.folder, hashlib.sha1(image_path.encode('utf-8')).hexdigest() + os.path.splitext(image_path)[1])
+            shutil.copy2(image_path, local_path)
+            dimensions = calculate_dimensions_cm(local_path)
+            pyramid = DisplayPyramid(open_reduced_image(local_path, DISPLAY_MAX_SIZE))
+        except (OSError, ValueError, sqlite3.Error) as e:
+            logging.debug(f"Vorladen von {number} übersprungen: {e}")
+            return
+        nbytes = sum(level.width * level.height * len(level.getbands()) for level in pyramid.levels)
+        entry = PrefetchedOrder(folders[0], image_path, local_path, (stat.st_mtime, stat.st_size),
+                                dimensions, pyramid, nbytes)
+        evicted = []
+        with self._lock:
+            old = self._entries.pop(number, None)
+            if old is not None:
+                self._total_bytes -= old.nbytes
+                evicted.append(old)
+            # Zuerst Aufträge verdrängen, die nicht mehr zu den nächsten Nummern gehören (älteste zuerst)
+            for stale in [n for n in self._entries if n not in self._wanted]:
+                if self._total_bytes + nbytes <= self.max_bytes:
+                    break
+                evicted.append(self._entries.pop(stale))
+                self._total_bytes -= evicted[-1].nbytes
+            # Nähere Nummern werden zuerst geladen und haben Vorrang vor dieser
+            stored = not self._entries or self._total_bytes + nbytes <= self.max_bytes
+            if stored:
+                self._entries[number] = entry
+                self._total_bytes += nbytes
             else:
-                error_message = f"Fehler: {response.status_code}\n{response.text}"
-                messagebox.showerror("API Fehler", error_message)
-                logging.error(f"API Fehler: {response.status_code} - {response.text}")
-        except Exception as e:
-            messagebox.showerror("Fehler", f"Ein Fehler ist aufgetreten:\n{e}")
-            logging.error(f"Fehlerdetails: {e}")
-        finally:
-            self.progress_label.config(text="")
-            # Modus zurücksetzen, wenn er auf 'production' war
-            if self.mode.get() == 'production':
-                self.mode.set('test')
-                logging.info("Modus wurde nach Vektorisierung von 'production' auf 'test' zurückgesetzt.")
-
-    def create_palette_from_gpl(self, gpl_path):
-        """Erstellt eine Palette-String aus einer GPL-Datei mit optionaler Reorganisation (Skin Tones ans Ende)."""
-        palette = self.read_gpl_file(gpl_path)
-        if not palette:
-            logging.warning(f"Keine Farben aus GPL-Datei gelesen: {gpl_path}")
+                evicted.append(entry)
+        for old in evicted:
+            if old.local_path != entry.local_path or not stored:
+                self._remove_local(old)
+        if stored:
+            logging.debug(f"Auftrag {number} vorgeladen ({nbytes / 1e6:.1f} MB Vorschau)")
+        else:
+            logging.debug(f"Auftrag {number} nicht vorgehalten: Speichergrenze für Vorschauen erreicht")
+
+    @staticmethod
+    def _remove_local(entry):
+        try:
+            os.remove(entry.local_path)
+        except OSError as e:
+            logging.debug(f"Lokale Kopie nicht gelöscht ({entry.local_path}): {e}")
+
+    def take(self, folder_number):
+        """Gibt den vorgeladenen Auftrag zu einer Nummer zurück, sofern input.png unverändert ist, sonst None.
+
+        Die lokale Kopie bleibt erhalten (siehe local_copy()); die Pyramide übernimmt der Aufrufer.
+        """
+        number = folder_number.split('-')[0].strip()
+        with self._lock:
+            entry = self._entries.pop(number, None)
+            if entry is not None:
+                self._total_bytes -= entry.nbytes
+        if entry is not None and self._source_state(entry.image_path) == entry.source_state:
+            self.hits += 1
+            with self._lock:
+                self._local_copies.pop(entry.image_path, None)
+                self._local_copies[entry.image_path] = entry
+                # Nur die zuletzt geöffneten Kopien behalten (laufende Vektorisierungen lesen ggf. noch daraus)
+                stale = []
+                while len(self._local_copies) > self.depth + 1:
+                    stale.append(self._local_copies.popitem(last=False)[1])
+            for old in stale:
+                self._remove_local(old)
+            return entry
+        self.misses += 1
+        return None
+
+    @staticmethod
+    def _source_state(image_path):
+        try:
+            stat = os.stat(image_path)
+        except OSError:
             return None
-        
-        # Nur die Hex-Werte verwenden und validieren
-        hex_colors = []
-        for color_tuple in palette:
-            if color_tuple and len(color_tuple) > 0:
-                hex_color = color_tuple[0].strip()
-                # Validiere Hex-Format (#rrggbb oder #rrggbbaa)
-                if hex_color.startswith('#') and len(hex_color) in [7, 9]:
-                    hex_colors.append(hex_color.lower())
-                else:
-                    logging.warning(f"Ungültiges Hex-Format übersprungen: {hex_color}")
-        if not hex_colors:
-            logging.error(f"Keine gültigen Hex-Farben in GPL-Datei gefunden: {gpl_path}")
+        return stat.st_mtime, stat.st_size
+
+    def local_copy(self, image_path):
+        """Pfad der lokalen Kopie von `image_path`, wenn sie noch dem Original entspricht, sonst None."""
+        with self._lock:
+            entry = self._local_copies.get(image_path)
+        if entry is None or not os.path.exists(entry.local_path) \
+                or self._source_state(image_path) != entry.source_state:
             return None
-        
-        # Reorganisiere Palette: Skin Tones ans Ende verschieben
+        return entry.local_path
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+
+
+# ---------------------------------------------------------
+# BATCH-MODUS (ohne GUI)
+# ---------------------------------------------------------
+
+def resolve_batch_jobs(input_base, selectors, settings=None):
+    """Löst Ordnernummern bzw. Glob-Muster zu Jobs auf.
+
+    Gibt (jobs, fehler) zurück; jobs ist eine Liste von (name, input_png_pfad),
+    fehler eine Liste von (selektor, meldung).
+    """
+    jobs = []
+    errors = []
+    seen = set()
+    for selector in selectors:
+        if any(ch in selector for ch in '*?['):
+            # Glob-Muster relativ zum Input Basisordner; Ausgabename = Ordnername
+            folders = sorted(os.path.basename(p) for p in glob.glob(os.path.join(input_base, selector)) if os.path.isdir(p))
+            if not folders:
+                errors.append((selector, "Kein passender Ordner gefunden"))
+            candidates = [(folder, folder) for folder in folders]
+        else:
+            try:
+                folders = find_order_folders(input_base, selector, settings)
+            except OSError as e:
+                errors.append((selector, f"Fehler beim Durchsuchen des Input Basisordners: {e}"))
+                continue
+            if not folders:
+                errors.append((selector, f"Kein Unterordner mit der Nummer {selector.split('-')[0]} gefunden"))
+                continue
+            if len(folders) > 1:
+                # Ohne GUI keine Auswahl möglich
+                errors.append((selector, f"Mehrere Ordner gefunden: {', '.join(sorted(folders))}"))
+                continue
+            candidates = [(selector, folders[0])]
+
+        for name, folder in candidates:
+            input_image_path = os.path.join(input_base, folder, 'input.png')
+            if input_image_path in seen:
+                continue
+            seen.add(input_image_path)
+            if not os.path.exists(input_image_path):
+                errors.append((name, f"Die Datei 'input.png' wurde im Ordner {folder} nicht gefunden"))
+                continue
+            jobs.append((name, input_image_path))
+    return jobs, errors
+
+
+def run_batch_job(name, image_path, settings, store=None, job_key=None):
+    """Verarbeitet einen Batch-Job. Gibt (name, ok, meldung, dauer_s) zurück.
+
+    Mit `store` und `job_key` wird der Zustand des Jobs im JobStore mitgeführt.
+    """
+    started = time.perf_counter()
+    progress = job_progress(store, job_key) if store is not None else None
+    try:
+        job_settings = dict(settings)
+        width_cm, height_cm, width_px, height_px, dpi = calculate_dimensions_cm(image_path)
+        job_settings.setdefault('width_cm', str(width_cm))
+        job_settings.setdefault('height_cm', str(height_cm))
+        output_path = build_output_path(settings['output_folder'], image_path, name, settings['output.file_format'])
+        result = vectorize_file(image_path, output_path, job_settings, original_size=(width_px, height_px, dpi),
+                                progress=progress)
+        if store is not None:
+            store.update(job_key, 'done', output_path=result['output_path'])
+        return name, True, result['output_path'], time.perf_counter() - started
+    except Exception as e:
+        logging.error(f"Batch-Job {name} fehlgeschlagen: {e}")
+        if store is not None:
+            store.update(job_key, 'failed', error=str(e))
+        return name, False, str(e), time.perf_counter() - started
+
+
+def register_jobs(jobs, settings, store, force=False, origin='batch'):
+    """Trägt (name, bildpfad)-Jobs mit Herkunft `origin` in den JobStore ein.
+
+    Gibt (auszuführen, erledigt, laufend) zurück; auszuführen enthält (name, bildpfad, einstellungen, schlüssel),
+    erledigt die Namen der Jobs, die mit denselben Parametern bereits abgeschlossen sind, laufend die
+    Namen der Jobs, die ein anderer Prozess gerade bearbeitet.
+    """
+    runnable, finished, running = [], [], []
+    for name, image_path in jobs:
+        if store is None:
+            runnable.append((name, image_path, settings, None))
+            continue
+        key = JobStore.make_key(name, image_path, settings)
+        state = store.add(key, name, image_path, settings, origin)
+        if state == 'running':
+            running.append(name)
+            continue
+        if state == 'done' and not force:
+            finished.append(name)
+            continue
+        if force:
+            store.update(key, 'queued')
+        runnable.append((name, image_path, settings, key))
+    return runnable, finished, running
+
+
+def resume_jobs(settings, store, include_failed=False, origins=None):
+    """Unterbrochene Jobs aus dem JobStore mit ihren gespeicherten Parametern (Zugangsdaten aus `settings`).
+
+    `origins` wie bei JobStore.unfinished().
+    """
+    return [(name, image_path, {**settings, **params}, key)
+            for key, name, image_path, params in store.unfinished(include_failed, origins)]
+
+
+def run_batch(jobs, settings, workers=4, store=None):
+    """Verarbeitet alle Jobs mit begrenzter Parallelität und gibt die Anzahl fehlgeschlagener Jobs zurück.
+
+    `jobs` enthält (name, bildpfad) oder (name, bildpfad, einstellungen, job_schlüssel) aus register_jobs().
+    """
+    total = len(jobs)
+    failed = 0
+    started = time.perf_counter()
+    logging.info(f"Batch gestartet: {total} Jobs, {workers} Worker")
+    jobs = [job if len(job) == 4 else (job[0], job[1], settings, None) for job in jobs]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_batch_job, name, path, job_settings, store, key)
+                   for name, path, job_settings, key in jobs]
+        for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+            name, ok, message, duration = future.result()
+            if not ok:
+                failed += 1
+            status = "OK" if ok else "FEHLER"
+            queue = get_client(settings).scheduler.stats()
+            print(f"[{done}/{total}] {name}: {status} ({duration:.1f}s) {message} "
+                  f"[API wartend: {queue['waiting']}, aktiv: {queue['in_flight']}, Wiederholungen: {queue['retries']}]",
+                  flush=True)
+
+    elapsed = time.perf_counter() - started
+    throughput = total / elapsed * 3600 if elapsed > 0 else 0.0
+    summary = (f"Batch beendet: {total - failed} erfolgreich, {failed} fehlgeschlagen, "
+               f"{elapsed:.1f}s gesamt, {throughput:.0f} Jobs/Stunde")
+    stats = get_client(settings).scheduler.stats()
+    summary += (f"\nAPI-Aufrufe: {stats['attempts']} Versuche, {stats['retries']} Wiederholungen "
+                f"({stats['rate_limited']}x 429, {stats['server_errors']}x 5xx, "
+                f"{stats['connection_errors']}x Verbindung), {stats['gave_up']} aufgegeben")
+    cache = get_result_cache(settings)
+    if cache is not None:
+        stats = cache.stats()
+        summary += (f"\nErgebnis-Cache: {stats['hits']} Treffer, {stats['misses']} Fehlschläge "
+                    f"({stats['hit_rate']:.0%}), {stats['entries']} Einträge, {stats['bytes'] / 1e6:.1f} MB")
+    cache = get_upscale_cache(settings)
+    if cache is not None and cache.hits + cache.misses:
+        stats = cache.stats()
+        summary += (f"\nUpscaling-Cache: {stats['hits']} Treffer, {stats['misses']} Fehlschläge "
+                    f"({stats['hit_rate']:.0%}), {stats['entries']} Einträge, {stats['bytes'] / 1e6:.1f} MB")
+    if store is not None:
+        counts = store.counts()
+        summary += "\nJob-Liste: " + ", ".join(f"{state} {counts.get(state, 0)}"
+                                             for state in JOB_UNFINISHED_STATES + ('done', 'failed'))
+    if _job_timings.jobs:
+        summary += "\n" + _job_timings.format()
+    print(summary, flush=True)
+    logging.info(summary, extra=LOG_FILE_ONLY)
+    return failed
+
+
+def add_common_arguments(parser):
+    """Gemeinsame Optionen von Batch- und Überwachungsmodus."""
+    parser.add_argument('--workers', type=int, default=4, help="Anzahl paralleler Jobs (Standard: 4)")
+    parser.add_argument('--config', default='config.ini', help="Pfad zur config.ini")
+    parser.add_argument('--mode', choices=['preview', 'production'], help="Modus überschreiben")
+    parser.add_argument('--format', choices=['png', 'svg'], dest='output_format', help="Ausgabeformat überschreiben")
+    parser.add_argument('--output-folder', help="Ausgabeordner überschreiben")
+    parser.add_argument('--upscale-processes', type=int,
+                        help="Prozesse für Upscaling/Kodierung (0 = automatisch, höchstens 4; 1 = ohne Prozesspool)")
+
+
+def settings_from_arguments(parser, args):
+    """Lädt config.ini, übernimmt die Überschreibungen aus der Kommandozeile und prüft sie."""
+    settings = load_settings_from_config(args.config)
+    if args.mode:
+        settings['mode'] = args.mode
+    if args.output_format:
+        settings['output.file_format'] = args.output_format
+    if args.output_folder:
+        settings['output_folder'] = args.output_folder
+    if args.upscale_processes is not None:
+        settings['upscale_processes'] = str(args.upscale_processes)
+    if settings['mode'] not in ('preview', 'production'):
+        settings['mode'] = 'preview'
+    # Im Preview-Modus liefert die API nur PNG
+    if settings['mode'] == 'preview':
+        settings['output.file_format'] = 'png'
+
+    if not settings['input_base_folder'] or not settings['output_folder']:
+        parser.error("Input Basisordner und Ausgabeordner müssen in der config.ini festgelegt sein.")
+    if args.workers < 1:
+        parser.error("--workers muss mindestens 1 sein.")
+    # Pool mindestens so groß wie die Anzahl Worker, damit kein Job auf eine Verbindung wartet
+    settings['http_pool_size'] = str(max(int(settings['http_pool_size'] or 1), args.workers))
+    return settings
+
+
+def batch_main(argv):
+    parser = argparse.ArgumentParser(
+        prog='vectorizer_ai.py batch',
+        description="Vektorisiert mehrere Auftragsordner ohne GUI mit den Einstellungen aus config.ini.")
+    parser.add_argument('selectors', nargs='*', help="Ordnernummern oder Glob-Muster relativ zum Input Basisordner")
+    add_common_arguments(parser)
+    parser.add_argument('--resume', action='store_true',
+                        help="Unterbrochene Jobs aus der Job-Liste fortsetzen (auch ohne Selektoren)")
+    parser.add_argument('--retry-failed', action='store_true', help="Mit --resume auch fehlgeschlagene Jobs wiederholen")
+    parser.add_argument('--force', action='store_true', help="Bereits erledigte Jobs erneut verarbeiten")
+    args = parser.parse_args(argv)
+    if not args.selectors and not args.resume:
+        parser.error("Mindestens ein Selektor oder --resume angeben.")
+    settings = settings_from_arguments(parser, args)
+    store = get_job_store(settings)
+
+    jobs, errors = resolve_batch_jobs(settings['input_base_folder'], args.selectors, settings)
+    for selector, message in errors:
+        print(f"{selector}: übersprungen - {message}", flush=True)
+        logging.warning(f"Batch: {selector} übersprungen - {message}", extra=LOG_FILE_ONLY)
+
+    runnable = resume_jobs(settings, store, args.retry_failed) if args.resume and store is not None else []
+    resumed = {job[3] for job in runnable}
+    new_jobs, finished, running = register_jobs(jobs, settings, store, args.force)
+    runnable += [job for job in new_jobs if job[3] is None or job[3] not in resumed]
+    for name in finished:
+        print(f"{name}: übersprungen - bereits mit diesen Parametern erledigt (--force zum Wiederholen)", flush=True)
+    for name in running:
+        print(f"{name}: übersprungen - wird gerade von einem anderen Prozess bearbeitet", flush=True)
+    if resumed:
+        print(f"{len(resumed)} unterbrochene Jobs werden fortgesetzt", flush=True)
+
+    failed = 0
+    if runnable:
+        get_client(settings).prewarm(min(args.workers, len(runnable)))
+        failed = run_batch(runnable, settings, args.workers, store)
+    return 1 if failed or errors else 0
+
+
+class HotFolderWatcher:
+    """Erkennt neue oder geänderte input.png-Dateien in den Unterordnern des Input Basisordners.
+
+    Abfrage per os.scandir: input.png wird nur in Ordnern neu geprüft, deren mtime sich geändert hat
+    (neue Ordner, neu hineinkopierte Dateien) oder die noch auf eine stabile Datei warten. Ein
+    Überschreiben an Ort und Stelle ändert die mtime des Ordners nicht; solche Dateien findet der
+    vollständige Durchlauf über alle Ordner, der nur alle `full_scan_s` Sekunden läuft (auf einem
+    Netzlaufwerk mit vielen Ordnern ist jeder stat ein Netzwerkzugriff; 0 = nie). Eine Datei gilt als
+    fertig, wenn Größe und mtime bei zwei aufeinanderfolgenden Abfragen gleich sind, damit nicht halb
+    kopierte Bilder verarbeitet werden.
+    """
+
+    def __init__(self, input_base, include_existing=False, full_scan_s=300):
+        self.input_base = input_base
+        self.full_scan_s = full_scan_s
+        self._folders = {}  # ordner -> mtime
+        self._last_full_scan = time.monotonic()
+        self._seen = {}  # ordner -> (mtime, größe) des zuletzt gemeldeten input.png
+        self._pending = {}  # ordner -> (mtime, größe) aus der letzten Abfrage, noch nicht stabil
+        self._initialized = include_existing
+
+    def _input_state(self, folder):
         try:
-            skin_tone_count = int(self.skin_tone_count.get()) if self.skin_tone_count.get() else 0
-            if skin_tone_count > 0 and skin_tone_count < len(hex_colors):
-                # Erste N Farben sind Skin Tones -> ans Ende verschieben
-                skin_tones = hex_colors[:skin_tone_count]
-                other_colors = hex_colors[skin_tone_count:]
-                # Neue Reihenfolge: Andere Farben zuerst, dann Skin Tones
-                hex_colors = other_colors + skin_tones
-                logging.info(f"Palette reorganisiert: {skin_tone_count} Skin Tones ans Ende verschoben (von {len(hex_colors)} Farben)")
-            elif skin_tone_count > 0:
-                logging.warning(f"Skin Tone Count ({skin_tone_count}) >= Gesamtanzahl ({len(hex_colors)}), keine Reorganisation")
-        except ValueError:
-            logging.warning(f"Ungültiger Skin Tone Count Wert: {self.skin_tone_count.get()}, verwende Original-Reihenfolge")
-        
-        palette_str = '; '.join(hex_colors)
-        logging.debug(f"Palette aus GPL erstellt: {len(hex_colors)} Farben")
-        return palette_str
-
-    def read_gpl_file(self, file_path):
-        """Liest eine GIMP Palette (.gpl) Datei und gibt eine Liste von (hex_color, name) Tupeln zurück."""
-        palette = []
+            stat = os.stat(os.path.join(self.input_base, folder, 'input.png'))
+        except OSError:
+            return None
+        return stat.st_mtime, stat.st_size
+
+    def poll(self):
+        """Gibt die Ordner zurück, deren input.png seit der letzten Meldung neu oder geändert und stabil ist."""
+        changed = set(self._pending)
+        folders = {}
+        with os.scandir(self.input_base) as entries:
+            for entry in entries:
+                if not entry.is_dir():
+                    continue
+                mtime = entry.stat().st_mtime
+                folders[entry.name] = mtime
+                if self._folders.get(entry.name) != mtime:
+                    changed.add(entry.name)
+        self._folders = folders
+        if self.full_scan_s > 0 and time.monotonic() - self._last_full_scan >= self.full_scan_s:
+            self._last_full_scan = time.monotonic()
+            changed.update(folders)
+
+        if not self._initialized:
+            # Erster Durchlauf: bestehende Aufträge nur als bekannt merken
+            self._initialized = True
+            for folder in folders:
+                state = self._input_state(folder)
+                if state is not None:
+                    self._seen[folder] = state
+            logging.info(f"Überwachung gestartet: {len(folders)} Ordner, {len(self._seen)} mit input.png")
+            return []
+
+        ready = []
+        for folder in sorted(changed):
+            state = self._input_state(folder) if folder in folders else None
+            if state is None or state == self._seen.get(folder):
+                self._pending.pop(folder, None)
+                continue
+            if self._pending.get(folder) == state:
+                del self._pending[folder]
+                self._seen[folder] = state
+                ready.append(folder)
+            else:
+                self._pending[folder] = state
+        return ready
+
+
+def watch_main(argv):
+    parser = argparse.ArgumentParser(
+        prog='vectorizer_ai.py watch',
+        description="Überwacht den Input Basisordner und vektorisiert neue Aufträge automatisch.")
+    add_common_arguments(parser)
+    parser.add_argument('--interval', type=float, help="Abfrageintervall in Sekunden (Standard: watch_interval_s)")
+    parser.add_argument('--include-existing', action='store_true',
+                        help="Beim Start auch bereits vorhandene Aufträge verarbeiten")
+    args = parser.parse_args(argv)
+    settings = settings_from_arguments(parser, args)
+    interval = args.interval if args.interval is not None else float(settings.get('watch_interval_s') or 5)
+
+    watcher = HotFolderWatcher(settings['input_base_folder'], args.include_existing,
+                               float(settings.get('watch_full_scan_s') or 0))
+    store = get_job_store(settings)
+    get_client(settings).prewarm(args.workers)
+    in_flight = {}  # Future -> ordner
+    rerun = set()  # während der Verarbeitung erneut geänderte Ordner
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=args.workers)
+
+    def submit(folder):
+        image_path = os.path.join(settings['input_base_folder'], folder, 'input.png')
         try:
-            if not os.path.exists(file_path):
-                logging.error(f"GPL-Datei nicht gefunden: {file_path}")
-                return None
-            
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = f.readlines()
-            
-            for line_num, line in enumerate(lines, 1):
-                line = line.strip()
-                # Überspringe Kommentare und leere Zeilen
-                if not line or line.startswith('#'):
+            runnable, finished, running = register_jobs([(folder, image_path)], settings, store, origin='watch')
+        except OSError as e:
+            logging.warning(f"Überwachung: {folder} nicht lesbar: {e}")
+            return
+        if finished:
+            logging.info(f"Überwachung: {folder} bereits mit diesen Parametern erledigt")
+            return
+        if running:
+            logging.info(f"Überwachung: {folder} wird gerade von einem anderen Prozess bearbeitet")
+            return
+        for name, path, job_settings, key in runnable:
+            in_flight[executor.submit(run_batch_job, name, path, job_settings, store, key)] = folder
+        logging.info(f"Überwachung: {folder} eingereiht")
+
+    # Nach einem Absturz oder Neustart unterbrochene Jobs zuerst fortsetzen; in der GUI gestartete
+    # Jobs nicht unbeaufsichtigt wiederholen (kosten Credits), die setzt nur "batch --resume" fort
+    resumed = resume_jobs(settings, store, origins=('batch', 'watch')) if store is not None else []
+    for name, path, job_settings, key in resumed:
+        in_flight[executor.submit(run_batch_job, name, path, job_settings, store, key)] = name
+    print(f"Überwache {settings['input_base_folder']} alle {interval:g}s mit {args.workers} Workern "
+          f"(Strg+C zum Beenden)" + (f", {len(resumed)} unterbrochene Jobs werden fortgesetzt" if resumed else ""),
+          flush=True)
+    next_poll = time.monotonic()
+    try:
+        while True:
+            ready = []
+            if time.monotonic() >= next_poll:
+                next_poll = time.monotonic() + interval
+                try:
+                    ready = watcher.poll()
+                except OSError as e:
+                    logging.error(f"Überwachung: Input Basisordner nicht lesbar: {e}")
+            for folder in ready:
+                if folder in in_flight.values():
+                    rerun.add(folder)
                     continue
-                # Überspringe Header-Zeilen
-                if line.startswith('GIMP Palette') or line.startswith('Name:') or line.startswith('Columns:'):
+                submit(folder)
+
+            for future, folder in list(in_flight.items()):
+                if not future.done():
                     continue
-                
-                # Versuchen, die ersten drei Teile in Zahlen umzuwandeln
-                parts = line.split(None, 3)
-                if len(parts) >= 3:
-                    try:
-                        r, g, b = parts[:3]
-                        r = int(r)
-                        g = int(g)
-                        b = int(b)
-                        
-                        # Validiere RGB-Werte (0-255)
-                        if not (0 <= r <= 255 and 0 <= g <= 255 and 0 <= b <= 255):
-                            logging.warning(f"Zeile {line_num}: RGB-Werte außerhalb des gültigen Bereichs (0-255): {r}, {g}, {b}")
-                            continue
-                        
-                        color_hex = '#{:02x}{:02x}{:02x}'.format(r, g, b).lower()
-                        color_name = parts[3].strip() if len(parts) > 3 else ''
-                        palette.append((color_hex, color_name))
-                    except ValueError as ve:
-                        logging.warning(f"Zeile {line_num} übersprungen (keine gültigen Farbdaten): {line} - {ve}")
-                        continue
-            
-            if not palette:
-                logging.warning(f"Keine Farben in GPL-Datei gefunden: {file_path}")
+                del in_flight[future]
+                name, ok, message, duration = future.result()
+                print(f"{name}: {'OK' if ok else 'FEHLER'} ({duration:.1f}s) {message}", flush=True)
+                if folder in rerun and folder not in in_flight.values():
+                    rerun.discard(folder)
+                    submit(folder)
+
+            # Bis zur nächsten Abfrage warten, fertige Jobs aber sofort melden
+            timeout = max(0.0, next_poll - time.monotonic())
+            if in_flight:
+                concurrent.futures.wait(list(in_flight), timeout=timeout,
+                                        return_when=concurrent.futures.FIRST_COMPLETED)
             else:
-                logging.info(f"GPL-Datei erfolgreich gelesen: {len(palette)} Farben aus {file_path}")
-            
-            return palette
-        except FileNotFoundError:
-            logging.error(f"GPL-Datei nicht gefunden: {file_path}")
-            return None
-        except PermissionError:
-            logging.error(f"Keine Berechtigung zum Lesen der GPL-Datei: {file_path}")
-            return None
-        except Exception as e:
-            logging.error(f"Fehler beim Lesen der GPL-Datei {file_path}: {e}")
-            return None
+                time.sleep(timeout)
+    except KeyboardInterrupt:
+        print("Überwachung beendet, warte auf laufende Jobs...", flush=True)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        if _job_timings.jobs:
+            summary = _job_timings.format()
+            print(summary, flush=True)
+            logging.info(summary, extra=LOG_FILE_ONLY)
+    return 0
+
+
+def timings_main(argv):
+    """Zusammenfassung (p50/p95 pro Stufe) aus dem Timing-Log."""
+    parser = argparse.ArgumentParser(prog='vectorizer_ai.py timings',
+                                     description="Stufenzeiten der Vektorisierungsjobs aus dem Timing-Log auswerten.")
+    parser.add_argument('--config', default='config.ini', help="Pfad zur config.ini")
+    parser.add_argument('--file', default=None, help="Timing-Log (Standard: timing_log_file bzw. cache/job_timings.jsonl)")
+    parser.add_argument('--last', type=int, default=0, help="Nur die letzten N Jobs auswerten")
+    args = parser.parse_args(argv)
+    settings = load_settings_from_config(args.config)
+    path = args.file or timing_log_path(settings)
+    try:
+        stats = TimingStats.from_file(path, args.last)
+    except OSError as e:
+        parser.error(f"Timing-Log nicht lesbar: {e}")
+    print(stats.format())
+    return 0
+
+
+def main(argv=None):
+    import_ms = (time.perf_counter() - STARTUP_STARTED) * 1000
+    argv = sys.argv[1:] if argv is None else argv
+    setup_logging()
+    logging.debug(f"Import des Skripts: {import_ms:.0f} ms")
+    if argv and argv[0] == 'batch':
+        return batch_main(argv[1:])
+    if argv and argv[0] == 'watch':
+        return watch_main(argv[1:])
+    if argv and argv[0] == 'timings':
+        return timings_main(argv[1:])
+
+    # tkinter erst hier laden: Batch, Überwachung und Worker-Prozesse laufen auch ohne Display.
+    # Als Skript gestartet ist dieses Modul __main__; vectorizer_gui soll dieselbe Instanz verwenden.
+    sys.modules.setdefault('vectorizer_ai', sys.modules[__name__])
+    from vectorizer_gui import VectorizerApp
+
+    app = VectorizerApp(startup_timings={'import': import_ms})
+    app.protocol("WM_DELETE_WINDOW", app.on_closing)
+    app.mainloop()
+    return 0
 
-    def open_images_in_new_window(self):
-        # Neues Fenster erstellen
-        new_window = tk.Toplevel(self)
-        new_window.title("Original und Vektorisierte Bilder")
-        new_window.geometry("800x600")
-
-        # Frames für Original- und Ergebnisbilder
-        original_frame = ttk.Frame(new_window)
-        original_frame.pack(side='left', fill='both', expand=True, padx=5, pady=5)
-
-        original_label = ttk.Label(original_frame, text="Originalbild:")
-        original_label.pack(anchor='w')
-
-        original_canvas = tk.Canvas(original_frame, bg='grey')
-        original_canvas.pack(fill='both', expand=True)
-
-        result_frame = ttk.Frame(new_window)
-        result_frame.pack(side='left', fill='both', expand=True, padx=5, pady=5)
-
-        result_label = ttk.Label(result_frame, text="Vektorisierte Ausgabe:")
-        result_label.pack(anchor='w')
-
-        result_canvas = tk.Canvas(result_frame, bg='grey')
-        result_canvas.pack(fill='both', expand=True)
-
-        # Bilder auf den Canvas-Elementen anzeigen
-        if self.image_path.get() and os.path.exists(self.image_path.get()):
-            self.display_image_on_canvas(self.image_path.get(), original=True, canvas=original_canvas)
-        if hasattr(self, 'output_path') and os.path.exists(self.output_path):
-            self.display_image_on_canvas(self.output_path, original=False, canvas=result_canvas)
-
-        # Bildanpassung bei Größenänderung
-        original_canvas.bind("<Configure>", lambda event: self.resize_image(event, original=True, canvas=original_canvas))
-        result_canvas.bind("<Configure>", lambda event: self.resize_image(event, original=False, canvas=result_canvas))
-
-    def open_settings_window(self):
-        settings_window = tk.Toplevel(self)
-        settings_window.title("Einstellungen")
-        settings_window.geometry("500x600")  # Erhöhte Höhe für zusätzliche Felder
-        settings_frame = ttk.Frame(settings_window)
-        settings_frame.pack(padx=10, pady=10, fill='both', expand=True)
-
-        lbl_api_key = ttk.Label(settings_frame, text="API Key:")
-        lbl_api_key.grid(row=0, column=0, padx=5, pady=5, sticky='w')
-        entry_api_key = ttk.Entry(settings_frame, textvariable=self.api_key, show='*')
-        entry_api_key.grid(row=0, column=1, padx=5, pady=5, sticky='ew')
-
-        lbl_api_secret = ttk.Label(settings_frame, text="API Secret:")
-        lbl_api_secret.grid(row=1, column=0, padx=5, pady=5, sticky='w')
-        entry_api_secret = ttk.Entry(settings_frame, textvariable=self.api_secret, show='*')
-        entry_api_secret.grid(row=1, column=1, padx=5, pady=5, sticky='ew')
-
-        lbl_input_folder = ttk.Label(settings_frame, text="Input Basisordner:")
-        lbl_input_folder.grid(row=2, column=0, padx=5, pady=5, sticky='w')
-        frame_input_folder = ttk.Frame(settings_frame)
-        frame_input_folder.grid(row=2, column=1, padx=5, pady=5, sticky='ew')
-        entry_input_folder = ttk.Entry(frame_input_folder, textvariable=self.input_base_folder)
-        entry_input_folder.pack(side='left', padx=5, pady=5, fill='x', expand=True)
-        btn_browse_input = ttk.Button(frame_input_folder, text="Durchsuchen", command=self.browse_input_folder)
-        btn_browse_input.pack(side='left', padx=5, pady=5)
-
-        lbl_output_folder = ttk.Label(settings_frame, text="Ausgabeordner:")
-        lbl_output_folder.grid(row=3, column=0, padx=5, pady=5, sticky='w')
-        frame_output_folder = ttk.Frame(settings_frame)
-        frame_output_folder.grid(row=3, column=1, padx=5, pady=5, sticky='ew')
-        entry_output_folder = ttk.Entry(frame_output_folder, textvariable=self.output_folder)
-        entry_output_folder.pack(side='left', padx=5, pady=5, fill='x', expand=True)
-        btn_browse_output = ttk.Button(frame_output_folder, text="Durchsuchen", command=self.browse_output_folder)
-        btn_browse_output.pack(side='left', padx=5, pady=5)
-
-        lbl_palette = ttk.Label(settings_frame, text="Farbpalette (optional):")
-        lbl_palette.grid(row=4, column=0, padx=5, pady=5, sticky='w')
-        entry_palette = ttk.Entry(settings_frame, textvariable=self.palette)
-        entry_palette.grid(row=4, column=1, padx=5, pady=5, sticky='ew')
-
-        lbl_gpl_file = ttk.Label(settings_frame, text="GIMP Palette (.gpl) Datei:")
-        lbl_gpl_file.grid(row=5, column=0, padx=5, pady=5, sticky='w')
-        frame_gpl = ttk.Frame(settings_frame)
-        frame_gpl.grid(row=5, column=1, padx=5, pady=5, sticky='ew')
-        entry_gpl = ttk.Entry(frame_gpl, textvariable=self.gpl_file_path)
-        entry_gpl.pack(side='left', padx=5, pady=5, fill='x', expand=True)
-        btn_browse_gpl = ttk.Button(frame_gpl, text="Durchsuchen", command=self.browse_gpl_file)
-        btn_browse_gpl.pack(side='left', padx=5, pady=5)
-
-        # Einstellungen für Detailgrad und Glättung
-        lbl_line_fit_tolerance = ttk.Label(settings_frame, text="Standard Detailgrad (line_fit_tolerance):")
-        lbl_line_fit_tolerance.grid(row=6, column=0, padx=5, pady=5, sticky='w')
-
-        entry_line_fit_tolerance = ttk.Entry(settings_frame, textvariable=self.line_fit_tolerance)
-        entry_line_fit_tolerance.grid(row=6, column=1, padx=5, pady=5, sticky='ew')
-
-        lbl_anti_aliasing_mode = ttk.Label(settings_frame, text="Standard Glättung (anti_aliasing_mode):")
-        lbl_anti_aliasing_mode.grid(row=7, column=0, padx=5, pady=5, sticky='w')
-
-        combo_anti_aliasing_mode = ttk.Combobox(settings_frame, textvariable=self.anti_aliasing_mode, values=['anti_aliased', 'aliased'])
-        combo_anti_aliasing_mode.grid(row=7, column=1, padx=5, pady=5, sticky='ew')
-        combo_anti_aliasing_mode.current(0)  # Standardwert: 'anti_aliased'
-
-        # Eingabe- und Ausgabe-DPI in den Einstellungen
-        lbl_input_dpi = ttk.Label(settings_frame, text="Input DPI:")
-        lbl_input_dpi.grid(row=8, column=0, padx=5, pady=5, sticky='w')
-        entry_input_dpi = ttk.Entry(settings_frame, textvariable=self.input_dpi)
-        entry_input_dpi.grid(row=8, column=1, padx=5, pady=5, sticky='ew')
-
-        lbl_output_dpi = ttk.Label(settings_frame, text="Output DPI:")
-        lbl_output_dpi.grid(row=9, column=0, padx=5, pady=5, sticky='w')
-        entry_output_dpi = ttk.Entry(settings_frame, textvariable=self.output_dpi)
-        entry_output_dpi.grid(row=9, column=1, padx=5, pady=5, sticky='ew')
-
-        # Button zum Speichern der Einstellungen
-        btn_save_settings = ttk.Button(settings_frame, text="Einstellungen speichern", command=self.save_settings)
-        btn_save_settings.grid(row=10, column=0, columnspan=2, pady=20)
-        settings_frame.columnconfigure(1, weight=1)
-
-    def browse_input_folder(self):
-        folder_path = filedialog.askdirectory()
-        if folder_path:
-            self.input_base_folder.set(folder_path)
-
-    def browse_output_folder(self):
-        folder_path = filedialog.askdirectory()
-        if folder_path:
-            self.output_folder.set(folder_path)
-
-    def browse_gpl_file(self):
-        file_path = filedialog.askopenfilename(filetypes=[("GIMP Palette Dateien", "*.gpl")])
-        if file_path:
-            self.gpl_file_path.set(file_path)
-
-    def load_settings(self):
-        if os.path.exists(self.config_file):
-            self.config.read(self.config_file)
-            if 'API' in self.config:
-                self.api_key.set(self.config['API'].get('api_key', ''))
-                self.api_secret.set(self.config['API'].get('api_secret', ''))
-            if 'Settings' in self.config:
-                self.input_base_folder.set(self.config['Settings'].get('input_base_folder', ''))
-                self.output_folder.set(self.config['Settings'].get('output_folder', ''))
-                self.palette.set(self.config['Settings'].get('palette', ''))
-                self.mode.set(self.config['Settings'].get('mode', 'test'))
-                self.output_format.set(self.config['Settings'].get('output.file_format', 'png'))
-                self.gpl_file_path.set(self.config['Settings'].get('gpl_file_path', ''))
-                # Neue Einstellungen laden
-                self.line_fit_tolerance.set(self.config['Settings'].get('line_fit_tolerance', '0.1'))
-                self.anti_aliasing_mode.set(self.config['Settings'].get('anti_aliasing_mode', 'anti_aliased'))
-                self.input_dpi.set(self.config['Settings'].get('input_dpi', '96'))
-                self.output_dpi.set(self.config['Settings'].get('output_dpi', '96'))
-                self.max_colors.set(self.config['Settings'].get('processing.max_colors', '36'))  # Standardwert auf 36 gesetzt
-                self.min_area_px.set(self.config['Settings'].get('processing.shapes.min_area_px', '50'))  # Einstellungen laden
-                self.skin_tone_count.set(self.config['Settings'].get('skin_tone_count', '549'))  # Standard: bis CH
-        else:
-            # Standardwerte setzen
-            self.line_fit_tolerance.set('0.1')
-            self.anti_aliasing_mode.set('anti_aliased')
-            self.input_dpi.set('96')
-            self.output_dpi.set('96')
-            self.max_colors.set('36')  # Standardwert auf 36 gesetzt
-            self.min_area_px.set('50')  # Standardwert setzen
-            self.skin_tone_count.set('549')  # Standard: bis CH (alle Farben bis auf die letzten 3)
-        logging.info("Einstellungen geladen.")
-
-    def save_settings(self):
-        self.config['API'] = {
-            'api_key': self.api_key.get(),
-            'api_secret': self.api_secret.get()
-        }
-        self.config['Settings'] = {
-            'input_base_folder': self.input_base_folder.get(),
-            'output_folder': self.output_folder.get(),
-            'palette': self.palette.get(),
-            'mode': self.mode.get(),
-            'output.file_format': self.output_format.get(),
-            'gpl_file_path': self.gpl_file_path.get(),
-            # Neue Einstellungen speichern
-            'line_fit_tolerance': self.line_fit_tolerance.get(),
-            'anti_aliasing_mode': self.anti_aliasing_mode.get(),
-            'input_dpi': self.input_dpi.get(),
-            'output_dpi': self.output_dpi.get(),
-            'processing.max_colors': self.max_colors.get(),  # Neue Einstellung speichern
-            'processing.shapes.min_area_px': self.min_area_px.get(),  # Einstellungen speichern
-            'skin_tone_count': self.skin_tone_count.get()  # Skin Tone Count speichern
-        }
-        try:
-            with open(self.config_file, 'w', encoding='utf-8') as configfile:
-                self.config.write(configfile)
-            messagebox.showinfo("Einstellungen gespeichert", "Die Einstellungen wurden erfolgreich gespeichert.")
-            logging.info("Einstellungen gespeichert.")
-        except Exception as e:
-            messagebox.showerror("Fehler", f"Fehler beim Speichern der Einstellungen:\n{e}")
-            logging.error(f"Fehler beim Speichern der Einstellungen: {e}")
-
-    def on_closing(self):
-        if messagebox.askyesno("Beenden", "Möchten Sie das Programm wirklich beenden?"):
-            logging.info("VectorizerApp wird beendet.")
-            self.destroy()
-
-    def on_mode_change(self, *args):
-        current_mode = self.mode.get()
-        logging.debug(f"Modus geändert zu: {current_mode}")
-
-        if current_mode == 'preview':
-            # Ausgabeformat auf 'png' setzen und Radiobuttons entsprechend deaktivieren
-            self.output_format.set('png')
-            if 'svg' in self.rb_output_formats:
-                self.rb_output_formats['svg'].configure(state='disabled')
-            logging.info("Modus ist 'preview'. Ausgabeformat auf 'png' gesetzt und 'svg' deaktiviert.")
-        else:
-            # Radiobuttons wieder aktivieren
-            if 'svg' in self.rb_output_formats:
-                self.rb_output_formats['svg'].configure(state='normal')
-            logging.info(f"Modus ist '{current_mode}'. Ausgabeformat-Radiobuttons wieder aktiviert.")
 
 if __name__ == '__main__':
-    app = VectorizerApp()
-    app.protocol("WM_DELETE_WINDOW", app.on_closing)
-    app.mainloop()
+    # Als eingefrorene Windows-exe würde sonst jeder Worker des Upscaling-Prozesspools die App neu starten
+    multiprocessing.freeze_support()
+    sys.exit(main())
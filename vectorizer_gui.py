@@ -0,0 +1,973 @@
+"""GUI des Vectorizer AI Tools (tkinter).
+
+Wird nur von vectorizer_ai.main() geladen, wenn kein Unterbefehl angegeben ist; Batch, Überwachung
+und die Upscale-Prozesse importieren tkinter daher nie.
+"""
+import concurrent.futures
+import configparser
+import itertools
+import logging
+import os
+import sqlite3
+import threading
+import time
+import tkinter as tk
+from tkinter import filedialog, ttk, messagebox
+
+from vectorizer_ai import (
+    ADVANCED_SETTING_KEYS, DEFAULT_SETTINGS, DISPLAY_MAX_SIZE, DISPLAY_REFINE_DELAY_MS, SCRIPT_DIR,
+    STARTUP_STARTED, ApiError, DisplayPyramid, JobStore, OrderPrefetcher, ProgressEvent, UiEventBus,
+    _job_timings, build_output_path, cairosvg, calculate_dimensions_cm, find_order_folders, get_client,
+    get_folder_index, get_job_store, get_svg_render, job_progress, np, open_reduced_image,
+    parse_job_parameters, quantize_to_palette, read_original_size, resolve_palette, svg_render_size,
+    vectorize_file,
+)
+
+
+class VectorizerApp(tk.Tk):
+    def __init__(self, startup_timings=None):
+        super().__init__()
+        # Startzeit-Bericht (ms je Phase), wird nach dem ersten Zeichnen ins Log geschrieben
+        self.startup_timings = dict(startup_timings or {})
+        self.title("Vectorizer AI Tool")
+        self.geometry("1200x800")
+        self.config_file = 'config.ini'
+        self.config = configparser.ConfigParser()
+
+        logging.info("VectorizerApp gestartet.")
+
+        # Variablen
+        self.api_key = tk.StringVar()
+        self.api_secret = tk.StringVar()
+        self.image_path = tk.StringVar()
+        self.palette = tk.StringVar()
+        self.mode = tk.StringVar(value='preview')  # Standardmodus von 'test' zu 'preview' geändert
+        self.output_format = tk.StringVar(value='png')  # Voreinstellung auf 'PNG'
+        self.gpl_file_path = tk.StringVar()
+        self.width_cm = tk.StringVar()
+        self.height_cm = tk.StringVar()
+        self.input_dpi = tk.StringVar(value='96')  # Standardwert für Input DPI
+        self.output_dpi = tk.StringVar(value='96')  # Standardwert für Output DPI
+        self.input_base_folder = tk.StringVar()
+        self.output_folder = tk.StringVar()
+        self.folder_number = tk.StringVar()
+        self.display_image = None
+        self.result_image = None
+        self.offline_preview_image = None  # Ergebnis der Offline-Vorschau (DisplayPyramid)
+        self.display_pyramids = {}  # Bildpfad -> (mtime, DisplayPyramid), nur aktuelles Original und Ergebnis
+        self._refine_jobs = {}  # Canvas -> after()-ID der verzögerten scharfen Darstellung
+        # SVG-Rasterung außerhalb des Tk-Threads
+        self.render_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self._pending_renders = set()
+        # Worker-Threads sprechen die GUI nur über diese Warteschlange an
+        self.ui_events = UiEventBus(self)
+        self.ui_events.subscribe(ProgressEvent, self.on_progress)
+        self._job_ids = itertools.count(1)
+        self.script_dir = SCRIPT_DIR
+        self.progress_label = None
+        # Speichere ursprüngliche Bildgröße für Skalierung
+        self.original_image_width_px = None
+        self.original_image_height_px = None
+        self.original_image_dpi = None
+
+        # Variablen für Detailgrad, Glättung und maximale Farben in der Hauptoberfläche
+        self.line_fit_tolerance = tk.StringVar()
+        self.anti_aliasing_mode = tk.StringVar()
+        self.max_colors = tk.StringVar(value='36')  # Standardwert auf 36 gesetzt
+        self.min_area_px = tk.StringVar(value='50')  # Standardwert auf 50 gesetzt
+        self.skin_tone_count = tk.StringVar(value='549')  # Anzahl der Skin Tones am Anfang der Palette (Standard: bis CH)
+        # Einstellungen ohne GUI-Feld (nur config.ini)
+        self.advanced_settings = {key: DEFAULT_SETTINGS[key] for key in ADVANCED_SETTING_KEYS}
+
+        started = time.perf_counter()
+        self.load_settings()
+        self.prefetcher = OrderPrefetcher.from_settings(self.advanced_settings)
+        self.startup_timings['config'] = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        self.create_gui()
+
+        # Trace für Mode-Änderungen hinzufügen
+        self.mode.trace_add('write', self.on_mode_change)
+        self.startup_timings['gui'] = (time.perf_counter() - started) * 1000
+
+        self.ui_events.start()
+        # Alles, was nicht zum ersten Bild gehört, erst danach starten
+        self.after_idle(self.after_first_draw)
+
+    def after_first_draw(self):
+        self.startup_timings['first_draw'] = (time.perf_counter() - STARTUP_STARTED) * 1000
+        timings = self.startup_timings
+        logging.info(f"Startzeit: Import {timings.get('import', 0):.0f} ms, Konfiguration {timings['config']:.0f} ms, "
+                     f"GUI-Aufbau {timings['gui']:.0f} ms; erstes Bild nach {timings['first_draw']:.0f} ms")
+
+        # API-Verbindungen im Hintergrund vorwärmen (lädt dabei requests)
+        if self.api_key.get():
+            settings = self.collect_settings()
+            threading.Thread(target=lambda: get_client(settings).prewarm(), daemon=True).start()
+
+    def create_gui(self):
+        main_frame = ttk.Frame(self)
+        main_frame.pack(fill='both', expand=True)
+
+        # Obere Frames für Bedienelemente
+        top_frame = ttk.Frame(main_frame)
+        top_frame.pack(side='top', fill='x')
+
+        # Bedienelemente links
+        controls_frame = ttk.Frame(top_frame)
+        controls_frame.pack(side='left', fill='x', expand=True, padx=5, pady=5)
+
+        self.progress_label = ttk.Label(top_frame, text="")
+        self.progress_label.pack(side='left', padx=10)
+
+        # Untere Frames für Bilder
+        bottom_frame = ttk.Frame(main_frame)
+        bottom_frame.pack(side='top', fill='both', expand=True)
+
+        # Eingabe- und Ausgabebilder nebeneinander
+        original_frame = ttk.Frame(bottom_frame)
+        original_frame.pack(side='left', fill='both', expand=True, padx=5, pady=5)
+
+        original_label = ttk.Label(original_frame, text="Originalbild:")
+        original_label.pack(anchor='w')
+
+        self.original_canvas = tk.Canvas(original_frame, bg='grey')
+        self.original_canvas.pack(fill='both', expand=True)
+
+        result_frame = ttk.Frame(bottom_frame)
+        result_frame.pack(side='left', fill='both', expand=True, padx=5, pady=5)
+
+        result_label = ttk.Label(result_frame, text="Vektorisierte Ausgabe:")
+        result_label.pack(anchor='w')
+
+        self.result_canvas = tk.Canvas(result_frame, bg='grey')
+        self.result_canvas.pack(fill='both', expand=True)
+
+        # Bedienelemente erstellen
+        self.create_controls(controls_frame)
+
+        # Bildanpassung bei Größenänderung
+        self.original_canvas.bind("<Configure>", lambda event: self.resize_image(event, original=True))
+        self.result_canvas.bind("<Configure>", lambda event: self.resize_image(event, original=False))
+
+    def create_controls(self, parent):
+        # Bildauswahl
+        frame_manual = ttk.LabelFrame(parent, text="Bildauswahl")
+        frame_manual.pack(padx=5, pady=5, fill='x')
+
+        lbl_image = ttk.Label(frame_manual, text="Bilddatei:")
+        lbl_image.grid(row=0, column=0, padx=5, pady=5, sticky='w')
+
+        entry_image = ttk.Entry(frame_manual, textvariable=self.image_path)
+        entry_image.grid(row=0, column=1, padx=5, pady=5, sticky='ew')
+
+        btn_browse = ttk.Button(frame_manual, text="Durchsuchen", command=self.browse_image)
+        btn_browse.grid(row=0, column=2, padx=5, pady=5)
+
+        frame_manual.columnconfigure(1, weight=1)
+
+        # Ordnernummer
+        frame_number = ttk.LabelFrame(parent, text="Bild aus Ordner laden")
+        frame_number.pack(padx=5, pady=5, fill='x')
+
+        lbl_number = ttk.Label(frame_number, text="Ordnernummer:")
+        lbl_number.grid(row=0, column=0, padx=5, pady=5, sticky='w')
+
+        entry_number = ttk.Entry(frame_number, textvariable=self.folder_number)
+        entry_number.grid(row=0, column=1, padx=5, pady=5, sticky='w')
+        entry_number.bind("<Return>", lambda event: self.load_image_by_number())
+
+        btn_load = ttk.Button(frame_number, text="Laden", command=self.load_image_by_number)
+        btn_load.grid(row=0, column=2, padx=5, pady=5)
+
+        # Parameter
+        frame_parameters = ttk.LabelFrame(parent, text="Parameter")
+        frame_parameters.pack(padx=5, pady=5, fill='x')
+
+        # Maßeingabe
+        lbl_width = ttk.Label(frame_parameters, text="Breite (cm):")
+        lbl_width.grid(row=0, column=0, padx=5, pady=5, sticky='w')
+
+        entry_width = ttk.Entry(frame_parameters, textvariable=self.width_cm)
+        entry_width.grid(row=0, column=1, padx=5, pady=5, sticky='ew')
+
+        lbl_height = ttk.Label(frame_parameters, text="Höhe (cm):")
+        lbl_height.grid(row=1, column=0, padx=5, pady=5, sticky='w')
+
+        entry_height = ttk.Entry(frame_parameters, textvariable=self.height_cm)
+        entry_height.grid(row=1, column=1, padx=5, pady=5, sticky='ew')
+
+        # Output Format
+        lbl_output_format = ttk.Label(frame_parameters, text="Ausgabeformat:")
+        lbl_output_format.grid(row=2, column=0, padx=5, pady=5, sticky='w')
+
+        frame_output_format = ttk.Frame(frame_parameters)
+        frame_output_format.grid(row=2, column=1, padx=5, pady=5, sticky='w')
+
+        formats = [("PNG", "png"), ("SVG", "svg")]
+        self.rb_output_formats = {}  # Dictionary zur Speicherung der Radiobutton-Referenzen
+        for text, value in formats:
+            rb_format = ttk.Radiobutton(frame_output_format, text=text, variable=self.output_format, value=value)
+            rb_format.pack(side='left', padx=5)
+            self.rb_output_formats[value] = rb_format  # Speichern der Referenz
+
+        # Mode Selection
+        lbl_mode = ttk.Label(frame_parameters, text="Modus:")
+        lbl_mode.grid(row=3, column=0, padx=5, pady=5, sticky='w')
+
+        frame_mode = ttk.Frame(frame_parameters)
+        frame_mode.grid(row=3, column=1, padx=5, pady=5, sticky='w')
+
+        modes = [("Preview", "preview"), ("Production", "production")]  # "Test" Modus entfernt
+        for text, value in modes:
+            rb_mode = ttk.Radiobutton(frame_mode, text=text, variable=self.mode, value=value)
+            rb_mode.pack(side='left', padx=5)
+
+        # Detailgrad
+        lbl_line_fit_tolerance = ttk.Label(frame_parameters, text="Detailgrad (line_fit_tolerance):")
+        lbl_line_fit_tolerance.grid(row=4, column=0, padx=5, pady=5, sticky='w')
+
+        entry_line_fit_tolerance = ttk.Entry(frame_parameters, textvariable=self.line_fit_tolerance)
+        entry_line_fit_tolerance.grid(row=4, column=1, padx=5, pady=5, sticky='ew')
+
+        # Glättung (Anti-Aliasing)
+        lbl_anti_aliasing_mode = ttk.Label(frame_parameters, text="Glättung (anti_aliasing_mode):")
+        lbl_anti_aliasing_mode.grid(row=5, column=0, padx=5, pady=5, sticky='w')
+
+        combo_anti_aliasing_mode = ttk.Combobox(frame_parameters, textvariable=self.anti_aliasing_mode, values=['anti_aliased', 'aliased'])
+        combo_anti_aliasing_mode.grid(row=5, column=1, padx=5, pady=5, sticky='ew')
+        combo_anti_aliasing_mode.current(0)  # Standardwert: 'anti_aliased'
+
+        # Mindestfläche hinzufügen
+        lbl_min_area = ttk.Label(frame_parameters, text="Mindestfläche (px):")
+        lbl_min_area.grid(row=6, column=0, padx=5, pady=5, sticky='w')
+
+        entry_min_area = ttk.Entry(frame_parameters, textvariable=self.min_area_px)
+        entry_min_area.grid(row=6, column=1, padx=5, pady=5, sticky='ew')
+        # Die folgende Zeile entfernen, da der Wert bereits im __init__ gesetzt wird
+        # entry_min_area.insert(0, '50')
+
+        # Maximale Farben
+        lbl_max_colors = ttk.Label(frame_parameters, text="Maximale Farben:")
+        lbl_max_colors.grid(row=7, column=0, padx=5, pady=5, sticky='w')
+
+        entry_max_colors = ttk.Entry(frame_parameters, textvariable=self.max_colors)
+        entry_max_colors.grid(row=7, column=1, padx=5, pady=5, sticky='ew')
+
+        # Skin Tone Count (Anzahl der Skin Tones am Anfang der Palette)
+        lbl_skin_tone = ttk.Label(frame_parameters, text="Skin Tones (Anzahl am Anfang):")
+        lbl_skin_tone.grid(row=8, column=0, padx=5, pady=5, sticky='w')
+
+        entry_skin_tone = ttk.Entry(frame_parameters, textvariable=self.skin_tone_count)
+        entry_skin_tone.grid(row=8, column=1, padx=5, pady=5, sticky='ew')
+
+        frame_parameters.columnconfigure(1, weight=1)
+
+        # Buttons in einer Zeile
+        button_frame = ttk.Frame(parent)
+        button_frame.pack(padx=5, pady=10, fill='x')
+
+        btn_start = ttk.Button(button_frame, text="Vektorisieren", command=self.start_vectorization_thread)
+        btn_start.pack(side='left', padx=5, pady=5)
+
+        btn_offline_preview = ttk.Button(button_frame, text="Offline-Vorschau", command=self.show_offline_preview)
+        btn_offline_preview.pack(side='left', padx=5, pady=5)
+
+        btn_settings = ttk.Button(button_frame, text="Einstellungen", command=self.open_settings_window)
+        btn_settings.pack(side='left', padx=5, pady=5)
+
+        btn_open_images = ttk.Button(button_frame, text="Bilder in neuem Fenster öffnen", command=self.open_images_in_new_window)
+        btn_open_images.pack(side='left', padx=5, pady=5)
+
+    def browse_image(self):
+        file_path = filedialog.askopenfilename(filetypes=[("Bilddateien", "*.bmp;*.gif;*.jpeg;*.jpg;*.png;*.tiff;*.svg")])
+        if file_path:
+            self.image_path.set(file_path)
+            self.display_image_on_canvas(file_path, original=True)
+            self.calculate_image_dimensions(file_path)
+
+    def calculate_image_dimensions(self, image_path, dimensions=None):
+        """Übernimmt die Bildmaße in die GUI; `dimensions` wie calculate_dimensions_cm() (z. B. aus dem Ordnerindex)."""
+        try:
+            width_cm, height_cm, width_px, height_px, dpi = dimensions or calculate_dimensions_cm(image_path)
+            # Ursprüngliche Bildgröße in Pixeln speichern
+            self.original_image_width_px = width_px
+            self.original_image_height_px = height_px
+            self.original_image_dpi = dpi
+            self.width_cm.set(str(width_cm))
+            self.height_cm.set(str(height_cm))
+            logging.debug(f"Berechnete Maße: {width_cm} cm x {height_cm} cm")
+            logging.debug(f"Ursprüngliche Bildgröße: {width_px}px x {height_px}px @ {dpi} DPI")
+        except Exception as e:
+            logging.error(f"Fehler beim Berechnen der Bildmaße: {e}")
+
+    def get_display_pyramid(self, image_path, min_size=0, on_ready=None):
+        """Gibt die DisplayPyramid zu einem Pfad zurück; dekodiert nur, wenn sich die Datei geändert hat.
+
+        SVGs werden im Hintergrund passend zu `min_size` gerastert; bis dahin wird die vorhandene
+        (ggf. kleinere) Fassung oder None zurückgegeben und `on_ready` aufgerufen, sobald das Raster
+        vorliegt. Pyramiden anderer Bilder als dem aktuellen Original und Ergebnis werden freigegeben.
+        """
+        mtime = os.path.getmtime(image_path)
+        cached = self.display_pyramids.get(image_path)
+        if cached is not None and cached[0] != mtime:
+            cached = None
+        if not image_path.lower().endswith('.svg'):
+            if cached is not None:
+                return cached[1]
+            self.store_display_pyramid(image_path, mtime, DisplayPyramid(open_reduced_image(image_path, DISPLAY_MAX_SIZE)))
+            return self.display_pyramids[image_path][1]
+
+        if cairosvg is None:
+            self.show_message_later(messagebox.showwarning, "Warnung",
+                                    "Die Anzeige von SVG-Dateien erfordert das 'cairosvg' Modul.")
+            logging.warning("SVG-Datei angezeigt, aber 'cairosvg' ist nicht installiert.")
+            return None
+        render_size = svg_render_size(min_size)
+        if cached is None or max(cached[1].size) < render_size:
+            self.request_svg_render(image_path, mtime, render_size, on_ready)
+        return cached[1] if cached is not None else None
+
+    def store_display_pyramid(self, image_path, mtime, pyramid):
+        current = {self.image_path.get(), getattr(self, 'output_path', ''), image_path}
+        self.display_pyramids = {path: entry for path, entry in self.display_pyramids.items() if path in current}
+        self.display_pyramids[image_path] = (mtime, pyramid)
+
+    def request_svg_render(self, image_path, mtime, render_size, on_ready=None):
+        """Rastert ein SVG im Hintergrund-Thread; das Ergebnis wird im Tk-Thread übernommen."""
+        key = (image_path, mtime, render_size)
+        if key in self._pending_renders:
+            return
+        self._pending_renders.add(key)
+        future = self.render_executor.submit(get_svg_render, image_path, mtime, render_size)
+
+        def finish():
+            self._pending_renders.discard(key)
+            try:
+                img = future.result()
+            except Exception as e:
+                logging.error(f"Fehler beim Konvertieren der SVG-Datei: {e}")
+                self.show_message_later(messagebox.showerror, "Fehler", f"Fehler beim Konvertieren der SVG-Datei:\n{e}")
+                return
+            cached = self.display_pyramids.get(image_path)
+            if image_path not in (self.image_path.get(), getattr(self, 'output_path', '')):
+                return
+            # Ein größeres Raster derselben Datei nicht durch ein kleineres ersetzen
+            if cached is None or cached[0] != mtime or max(cached[1].size) < max(img.size):
+                self.store_display_pyramid(image_path, mtime, DisplayPyramid(img))
+            if on_ready is not None:
+                on_ready()
+
+        future.add_done_callback(lambda _: self.ui_events.call(finish))
+
+    def display_image_on_canvas(self, image_path, original=True, canvas=None, photo_holder=None, fast=False):
+        try:
+            target = canvas or (self.original_canvas if original else self.result_canvas)
+
+            def redraw():
+                if target.winfo_exists():
+                    self.display_image_on_canvas(image_path, original, canvas, photo_holder)
+
+            # Während des Ziehens keine neuen SVG-Raster anfordern, erst bei der scharfen Darstellung
+            min_size = 0 if fast else max(target.winfo_width(), target.winfo_height())
+            pyramid = self.get_display_pyramid(image_path, min_size, on_ready=redraw)
+            if pyramid is not None:
+                self.show_image_on_canvas(pyramid, original=original, canvas=canvas, photo_holder=photo_holder,
+                                          fast=fast)
+        except Exception as e:
+            self.show_message_later(messagebox.showerror, "Fehler", f"Fehler beim Anzeigen des Bildes:\n{e}")
+            logging.error(f"Fehler beim Anzeigen des Bildes: {e}")
+
+    def show_image_on_canvas(self, img, original=True, canvas=None, photo_holder=None, fast=False):
+        """Zeigt ein bereits geladenes Bild (PIL-Bild oder DisplayPyramid) skaliert auf dem Canvas an.
+
+        Mit `fast` wird bilinear statt LANCZOS skaliert (während laufender Größenänderungen).
+        """
+        try:
+            if not isinstance(img, DisplayPyramid):
+                img = DisplayPyramid(img)
+            if not canvas:
+                canvas = self.original_canvas if original else self.result_canvas
+            canvas_width = canvas.winfo_width()
+            canvas_height = canvas.winfo_height()
+            if canvas_width <= 1 or canvas_height <= 1:
+                self.update_idletasks()
+                canvas_width = canvas.winfo_width()
+                canvas_height = canvas.winfo_height()
+            img_ratio = img.width / img.height
+            canvas_ratio = canvas_width / canvas_height
+            if img_ratio > canvas_ratio:
+                new_width = canvas_width
+                new_height = int(new_width / img_ratio)
+            else:
+                new_height = canvas_height
+                new_width = int(new_height * img_ratio)
+
+            # Sicherstellen, dass die neuen Dimensionen größer als 0 sind
+            if new_width <= 0 or new_height <= 0:
+                logging.error("Fehler beim Anzeigen des Bildes: Berechnete Bildgröße ist ungültig.")
+                return
+
+            from PIL import ImageTk  # nur in der GUI benötigt
+            photo = ImageTk.PhotoImage(img.render((new_width, new_height), fast=fast))
+            if photo_holder is not None:
+                if original:
+                    photo_holder.original_photo = photo
+                else:
+                    photo_holder.result_photo = photo
+            else:
+                if original:
+                    self.display_image = photo
+                else:
+                    self.result_image = photo
+            canvas.delete("all")
+            canvas.create_image(canvas_width / 2, canvas_height / 2, image=photo)
+            canvas.image = photo  # Referenz speichern
+        except Exception as e:
+            self.show_message_later(messagebox.showerror, "Fehler", f"Fehler beim Anzeigen des Bildes:\n{e}")
+            logging.error(f"Fehler beim Anzeigen des Bildes: {e}")
+
+    def resize_image(self, event, original=True, canvas=None):
+        """Zeigt das Bild während der Größenänderung schnell skaliert an und stellt es erst scharf dar,
+        wenn für DISPLAY_REFINE_DELAY_MS keine weitere Änderung kam."""
+        target = canvas or (self.original_canvas if original else self.result_canvas)
+        pending = self._refine_jobs.pop(target, None)
+        if pending is not None:
+            self.after_cancel(pending)
+        self.redraw_canvas(original, canvas, fast=True)
+        self._refine_jobs[target] = self.after(
+            DISPLAY_REFINE_DELAY_MS, lambda: self._refine_canvas(target, original, canvas))
+
+    def _refine_canvas(self, target, original, canvas):
+        self._refine_jobs.pop(target, None)
+        # Fenster kann inzwischen geschlossen worden sein
+        if target.winfo_exists():
+            self.redraw_canvas(original, canvas)
+
+    def redraw_canvas(self, original=True, canvas=None, fast=False):
+        if not original and self.offline_preview_image is not None:
+            self.show_image_on_canvas(self.offline_preview_image, original=False, canvas=canvas, fast=fast)
+            return
+        image_path = self.image_path.get() if original else getattr(self, 'output_path', '')
+        if image_path and os.path.exists(image_path):
+            self.display_image_on_canvas(image_path, original=original, canvas=canvas, fast=fast)
+
+    def load_image_by_number(self):
+        folder_number = self.folder_number.get().strip()
+        input_base = self.input_base_folder.get().strip()
+        if not folder_number:
+            messagebox.showerror("Fehler", "Bitte geben Sie eine Ordnernummer ein.")
+            logging.error("Keine Ordnernummer eingegeben.")
+            return
+        if not input_base:
+            messagebox.showerror("Fehler", "Bitte legen Sie den Input Basisordner in den Einstellungen fest.")
+            logging.error("Input Basisordner nicht festgelegt.")
+            return
+
+        # Amazon-Bestellnummern verarbeiten
+        folder_number_processed = folder_number.split('-')[0]  # Ignoriere alles nach dem ersten '-'
+
+        # Im Hintergrund vorgeladener Auftrag: Ordner, Maße und Vorschau liegen schon bereit
+        prefetched = self.prefetcher.take(folder_number)
+        if prefetched is not None and prefetched.image_path != os.path.join(input_base, prefetched.folder, 'input.png'):
+            prefetched = None
+        try:
+            if prefetched is not None:
+                matching_folders = [prefetched.folder]
+            else:
+                matching_folders = find_order_folders(input_base, folder_number, self.advanced_settings)
+        except Exception as e:
+            messagebox.showerror("Fehler", f"Fehler beim Durchsuchen des Input Basisordners:\n{e}")
+            logging.error(f"Fehler beim Durchsuchen des Input Basisordners: {e}")
+            return
+        if not matching_folders:
+            messagebox.showerror("Fehler", f"Kein Unterordner mit der Nummer {folder_number_processed} gefunden.")
+            logging.error(f"Kein Unterordner mit der Nummer {folder_number_processed} gefunden.")
+            return
+
+        # Wenn mehrere Ordner gefunden wurden, Auswahl anzeigen
+        if len(matching_folders) > 1:
+            selected_folder = self.select_folder_dialog(matching_folders)
+            if not selected_folder:
+                logging.info("Keine Ordnerauswahl getroffen.")
+                return
+        else:
+            selected_folder = matching_folders[0]
+
+        target_folder = os.path.join(input_base, selected_folder)
+        input_image_path = os.path.join(target_folder, 'input.png')
+        index = get_folder_index(self.advanced_settings)
+        try:
+            if prefetched is not None:
+                dimensions = prefetched.dimensions
+                self.store_display_pyramid(input_image_path, prefetched.source_state[0], prefetched.pyramid)
+            else:
+                dimensions = index.input_info(input_base, selected_folder) if index is not None else None
+        except (sqlite3.Error, OSError) as e:
+            logging.warning(f"Ordnerindex: Maße von {input_image_path} nicht verfügbar: {e}")
+            dimensions = None
+        if dimensions is None and not os.path.exists(input_image_path):
+            messagebox.showerror("Fehler", f"Die Datei 'input.png' wurde im Ordner {target_folder} nicht gefunden.")
+            logging.error(f"Die Datei 'input.png' wurde im Ordner {target_folder} nicht gefunden.")
+            return
+        self.image_path.set(input_image_path)
+        self.display_image_on_canvas(input_image_path, original=True)
+        self.calculate_image_dimensions(input_image_path, dimensions)
+        self.prefetcher.prefetch(input_base, folder_number)
+
+    def select_folder_dialog(self, folders):
+        selection_window = tk.Toplevel(self)
+        selection_window.title("Ordner auswählen")
+        selection_window.geometry("400x300")
+        ttk.Label(selection_window, text="Mehrere Ordner gefunden. Bitte wählen Sie einen Ordner aus:").pack(pady=10)
+
+        folder_var = tk.StringVar(value=folders[0])
+
+        listbox = tk.Listbox(selection_window, listvariable=tk.StringVar(value=folders), height=10)
+        listbox.pack(fill='both', expand=True, padx=10, pady=10)
+        listbox.selection_set(0)
+
+        def select_and_close():
+            index = listbox.curselection()
+            if index:
+                folder_var.set(folders[index[0]])
+                selection_window.destroy()
+            else:
+                messagebox.showwarning("Warnung", "Bitte wählen Sie einen Ordner aus.")
+
+        btn_select = ttk.Button(selection_window, text="Auswählen", command=select_and_close)
+        btn_select.pack(pady=10)
+
+        self.wait_window(selection_window)
+        selected_folder = folder_var.get()
+        return selected_folder
+
+    def show_offline_preview(self):
+        """Zeigt eine lokale Palette-Quantisierung als grobe Vorschau, ohne die API aufzurufen.
+
+        Palette und Quantisierung laufen im render_executor; das Ergebnis wird im Tk-Thread übernommen.
+        """
+        image_path = self.image_path.get()
+        if not image_path or not os.path.exists(image_path):
+            messagebox.showerror("Fehler", "Bitte zuerst ein Bild auswählen.")
+            return
+        if np is None:
+            messagebox.showwarning("Warnung", "Die Offline-Vorschau erfordert das 'numpy' Modul.")
+            return
+        settings = self.collect_settings()
+        canvas_size = max(self.result_canvas.winfo_width(), self.result_canvas.winfo_height(), 256)
+        script_dir = self.script_dir
+
+        def compute():
+            palette_str, _ = resolve_palette(settings, script_dir)
+            if not palette_str:
+                return None
+            max_colors = int(settings['processing.max_colors'] or 0)
+            started = time.perf_counter()
+            img, used_colors = quantize_to_palette(
+                image_path, [c.strip() for c in palette_str.split(';') if c.strip()], max_colors, canvas_size)
+            return DisplayPyramid(img), len(used_colors), (time.perf_counter() - started) * 1000
+
+        future = self.render_executor.submit(compute)
+        self.progress_label.config(text="Offline-Vorschau wird berechnet...")
+
+        def finish():
+            self.progress_label.config(text="")
+            if image_path != self.image_path.get():
+                return  # inzwischen ein anderes Bild gewählt
+            try:
+                result = future.result()
+            except Exception as e:
+                self.show_message_later(messagebox.showerror, "Fehler", f"Fehler bei der Offline-Vorschau:\n{e}")
+                logging.error(f"Fehler bei der Offline-Vorschau: {e}")
+                return
+            if result is None:
+                self.show_message_later(messagebox.showwarning, "Warnung",
+                                        "Für die Offline-Vorschau wird eine Palette oder GPL-Datei benötigt.")
+                return
+            self.offline_preview_image, used_count, elapsed_ms = result
+            self.show_image_on_canvas(self.offline_preview_image, original=False)
+            self.progress_label.config(text=f"Offline-Vorschau: {used_count} Farben ({elapsed_ms:.0f} ms)")
+            logging.info(f"Offline-Vorschau: {used_count} Farben in {elapsed_ms:.0f} ms")
+
+        future.add_done_callback(lambda _: self.ui_events.call(finish))
+
+    def start_vectorization_thread(self):
+        # Tk-Variablen und Attribute nur im Tk-Thread lesen; der Worker bekommt eine Momentaufnahme
+        original_size = None
+        if self.original_image_width_px is not None and self.original_image_height_px is not None:
+            original_size = (self.original_image_width_px, self.original_image_height_px)
+        thread = threading.Thread(target=self.vectorize_image, args=(
+            next(self._job_ids), self.image_path.get(), self.collect_settings(), self.folder_number.get().strip(),
+            original_size))
+        thread.start()
+
+    def show_message_later(self, show, title, message):
+        """Zeigt einen (modalen) messagebox-Dialog erst nach dem aktuellen Ereignis-Durchlauf an.
+
+        Ein Dialog direkt in einem Handler würde UiEventBus._drain() blockieren, bis er geschlossen wird.
+        """
+        self.after(0, show, title, message)
+
+    def remember_original_size(self, width_px, height_px, dpi):
+        """Übernimmt die vom Worker ermittelte Originalgröße (läuft im Tk-Thread)."""
+        self.original_image_width_px = width_px
+        self.original_image_height_px = height_px
+        self.original_image_dpi = dpi
+
+    STAGE_LABELS = {
+        'upscale': "Upscaling",
+        'upload': "Upload",
+        'api': "Warte auf API",
+        'download': "Download",
+        'done': "Fertig",
+    }
+
+    def on_progress(self, event):
+        """Zeigt ein ProgressEvent im Statuslabel an (läuft im Tk-Thread)."""
+        text = f"Job {event.job}: {self.STAGE_LABELS.get(event.stage, event.stage)}"
+        if event.percent is not None and event.stage != 'done':
+            text += f" {event.percent}%"
+        if event.bytes_done is not None:
+            text += f" ({event.bytes_done / 1e6:.1f}"
+            text += f"/{event.bytes_total / 1e6:.1f} MB)" if event.bytes_total else " MB)"
+        self.progress_label.config(text=text)
+
+    def collect_settings(self):
+        """Sammelt die aktuellen GUI-Werte in einem Dict (Schlüssel wie DEFAULT_SETTINGS)."""
+        return {
+            'api_key': self.api_key.get(),
+            'api_secret': self.api_secret.get(),
+            'input_base_folder': self.input_base_folder.get(),
+            'output_folder': self.output_folder.get(),
+            'palette': self.palette.get(),
+            'mode': self.mode.get(),
+            'output.file_format': self.output_format.get(),
+            'gpl_file_path': self.gpl_file_path.get(),
+            'line_fit_tolerance': self.line_fit_tolerance.get(),
+            'anti_aliasing_mode': self.anti_aliasing_mode.get(),
+            'input_dpi': self.input_dpi.get(),
+            'output_dpi': self.output_dpi.get(),
+            'processing.max_colors': self.max_colors.get(),
+            'processing.shapes.min_area_px': self.min_area_px.get(),
+            'skin_tone_count': self.skin_tone_count.get(),
+            'width_cm': self.width_cm.get(),
+            'height_cm': self.height_cm.get(),
+            **self.advanced_settings,
+        }
+
+    def vectorize_image(self, job_id, image_path, settings, folder_number, original_size=None):
+        """Läuft im Worker-Thread; alle GUI-Zugriffe gehen über self.ui_events.
+
+        `original_size` ist die beim Start bekannte Originalgröße (Breite, Höhe) in Pixeln oder None.
+        """
+        ui = self.ui_events
+        ui.call(self.progress_label.config, text="Vektorisierung läuft...")
+
+        try:
+            params = parse_job_parameters(settings)
+            logging.info(f"min_area_px an API: {params['min_area_px']}")
+
+            # Ursprüngliche Bildgröße in Pixeln ermitteln
+            if original_size is None:
+                # Falls nicht gespeichert, versuche es aus dem Bild zu lesen
+                width_px, height_px, dpi = read_original_size(image_path, params)
+                original_size = (width_px, height_px)
+                ui.call(self.remember_original_size, width_px, height_px, dpi)
+        except ValueError as ve:
+            ui.call(self.show_message_later, messagebox.showerror, "Fehler", f"Ungültiger Wert: {ve}")
+            logging.error(f"Ungültige Eingabewerte: {ve}")
+            ui.call(self.progress_label.config, text="")
+            return
+        except Exception as e:
+            ui.call(self.show_message_later, messagebox.showerror, "Fehler", f"Fehler bei der Berechnung: {e}")
+            logging.error(f"Fehler bei der Berechnung: {e}")
+            ui.call(self.progress_label.config, text="")
+            return
+
+        # Bestimmen des Ausgabe-Dateinamens mit Ordnernummer
+        output_path = build_output_path(settings['output_folder'], image_path,
+                                        folder_number, settings['output.file_format'])
+
+        # Job in der persistenten Job-Liste mitführen (Fortsetzen z. B. per "batch --resume")
+        store = get_job_store(settings)
+        job_key = None
+        if store is not None:
+            job_name = folder_number or os.path.splitext(os.path.basename(image_path))[0]
+            try:
+                job_key = JobStore.make_key(job_name, image_path, settings)
+                if store.add(job_key, job_name, image_path, settings, origin='gui') == 'running':
+                    # Eintrag des anderen Prozesses nicht überschreiben
+                    logging.warning(f"Job {job_name} wird bereits von einem anderen Prozess bearbeitet")
+                    job_key = None
+            except (OSError, sqlite3.Error) as e:
+                logging.warning(f"Job konnte nicht in der Job-Liste vermerkt werden: {e}")
+                job_key = None
+        progress = job_progress(store, job_key, lambda stage, percent, bytes_done, bytes_total: ui.post(
+            ProgressEvent(job_id, stage, percent, bytes_done, bytes_total)))
+
+        try:
+            result = vectorize_file(
+                image_path, output_path, settings,
+                original_size=original_size,
+                script_dir=self.script_dir, progress=progress, source_path=self.prefetcher.local_copy(image_path))
+            if job_key is not None:
+                store.update(job_key, 'done', output_path=result['output_path'])
+            ui.call(self.show_vectorization_result, result)
+        except ApiError as e:
+            if job_key is not None:
+                store.update(job_key, 'failed', error=str(e))
+            ui.call(self.show_message_later, messagebox.showerror, "API Fehler", str(e))
+        except Exception as e:
+            if job_key is not None:
+                store.update(job_key, 'failed', error=str(e))
+            ui.call(self.show_message_later, messagebox.showerror, "Fehler", f"Ein Fehler ist aufgetreten:\n{e}")
+            logging.error(f"Fehlerdetails: {e}")
+        finally:
+            ui.call(self.finish_vectorization)
+
+    def show_vectorization_result(self, result):
+        self.output_path = result['output_path']
+        self.offline_preview_image = None
+
+        # Anzeige der Anzahl der gesendeten Farben
+        message = f"Die Vektorisierung war erfolgreich.\nAnzahl der an die API gesendeten Farbcodes: {result['num_colors_sent']}"
+        if result['cache_hit']:
+            message += "\nDas Ergebnis stammt aus dem lokalen Cache (kein API-Aufruf)."
+        # Ergebnisbild anzeigen, den Dialog erst nach dem Ereignis-Durchlauf
+        self.display_image_on_canvas(self.output_path, original=False)
+        self.show_message_later(messagebox.showinfo, "Erfolg", message)
+
+    def finish_vectorization(self):
+        self.progress_label.config(text="")
+        # Modus zurücksetzen, wenn er auf 'production' war
+        if self.mode.get() == 'production':
+            self.mode.set('test')
+            logging.info("Modus wurde nach Vektorisierung von 'production' auf 'test' zurückgesetzt.")
+
+    def open_images_in_new_window(self):
+        # Neues Fenster erstellen
+        new_window = tk.Toplevel(self)
+        new_window.title("Original und Vektorisierte Bilder")
+        new_window.geometry("800x600")
+
+        # Frames für Original- und Ergebnisbilder
+        original_frame = ttk.Frame(new_window)
+        original_frame.pack(side='left', fill='both', expand=True, padx=5, pady=5)
+
+        original_label = ttk.Label(original_frame, text="Originalbild:")
+        original_label.pack(anchor='w')
+
+        original_canvas = tk.Canvas(original_frame, bg='grey')
+        original_canvas.pack(fill='both', expand=True)
+
+        result_frame = ttk.Frame(new_window)
+        result_frame.pack(side='left', fill='both', expand=True, padx=5, pady=5)
+
+        result_label = ttk.Label(result_frame, text="Vektorisierte Ausgabe:")
+        result_label.pack(anchor='w')
+
+        result_canvas = tk.Canvas(result_frame, bg='grey')
+        result_canvas.pack(fill='both', expand=True)
+
+        # Bilder auf den Canvas-Elementen anzeigen
+        if self.image_path.get() and os.path.exists(self.image_path.get()):
+            self.display_image_on_canvas(self.image_path.get(), original=True, canvas=original_canvas)
+        if hasattr(self, 'output_path') and os.path.exists(self.output_path):
+            self.display_image_on_canvas(self.output_path, original=False, canvas=result_canvas)
+
+        # Bildanpassung bei Größenänderung
+        original_canvas.bind("<Configure>", lambda event: self.resize_image(event, original=True, canvas=original_canvas))
+        result_canvas.bind("<Configure>", lambda event: self.resize_image(event, original=False, canvas=result_canvas))
+
+    def open_settings_window(self):
+        settings_window = tk.Toplevel(self)
+        settings_window.title("Einstellungen")
+        settings_window.geometry("500x600")  # Erhöhte Höhe für zusätzliche Felder
+        settings_frame = ttk.Frame(settings_window)
+        settings_frame.pack(padx=10, pady=10, fill='both', expand=True)
+
+        lbl_api_key = ttk.Label(settings_frame, text="API Key:")
+        lbl_api_key.grid(row=0, column=0, padx=5, pady=5, sticky='w')
+        entry_api_key = ttk.Entry(settings_frame, textvariable=self.api_key, show='*')
+        entry_api_key.grid(row=0, column=1, padx=5, pady=5, sticky='ew')
+
+        lbl_api_secret = ttk.Label(settings_frame, text="API Secret:")
+        lbl_api_secret.grid(row=1, column=0, padx=5, pady=5, sticky='w')
+        entry_api_secret = ttk.Entry(settings_frame, textvariable=self.api_secret, show='*')
+        entry_api_secret.grid(row=1, column=1, padx=5, pady=5, sticky='ew')
+
+        lbl_input_folder = ttk.Label(settings_frame, text="Input Basisordner:")
+        lbl_input_folder.grid(row=2, column=0, padx=5, pady=5, sticky='w')
+        frame_input_folder = ttk.Frame(settings_frame)
+        frame_input_folder.grid(row=2, column=1, padx=5, pady=5, sticky='ew')
+        entry_input_folder = ttk.Entry(frame_input_folder, textvariable=self.input_base_folder)
+        entry_input_folder.pack(side='left', padx=5, pady=5, fill='x', expand=True)
+        btn_browse_input = ttk.Button(frame_input_folder, text="Durchsuchen", command=self.browse_input_folder)
+        btn_browse_input.pack(side='left', padx=5, pady=5)
+
+        lbl_output_folder = ttk.Label(settings_frame, text="Ausgabeordner:")
+        lbl_output_folder.grid(row=3, column=0, padx=5, pady=5, sticky='w')
+        frame_output_folder = ttk.Frame(settings_frame)
+        frame_output_folder.grid(row=3, column=1, padx=5, pady=5, sticky='ew')
+        entry_output_folder = ttk.Entry(frame_output_folder, textvariable=self.output_folder)
+        entry_output_folder.pack(side='left', padx=5, pady=5, fill='x', expand=True)
+        btn_browse_output = ttk.Button(frame_output_folder, text="Durchsuchen", command=self.browse_output_folder)
+        btn_browse_output.pack(side='left', padx=5, pady=5)
+
+        lbl_palette = ttk.Label(settings_frame, text="Farbpalette (optional):")
+        lbl_palette.grid(row=4, column=0, padx=5, pady=5, sticky='w')
+        entry_palette = ttk.Entry(settings_frame, textvariable=self.palette)
+        entry_palette.grid(row=4, column=1, padx=5, pady=5, sticky='ew')
+
+        lbl_gpl_file = ttk.Label(settings_frame, text="GIMP Palette (.gpl) Datei:")
+        lbl_gpl_file.grid(row=5, column=0, padx=5, pady=5, sticky='w')
+        frame_gpl = ttk.Frame(settings_frame)
+        frame_gpl.grid(row=5, column=1, padx=5, pady=5, sticky='ew')
+        entry_gpl = ttk.Entry(frame_gpl, textvariable=self.gpl_file_path)
+        entry_gpl.pack(side='left', padx=5, pady=5, fill='x', expand=True)
+        btn_browse_gpl = ttk.Button(frame_gpl, text="Durchsuchen", command=self.browse_gpl_file)
+        btn_browse_gpl.pack(side='left', padx=5, pady=5)
+
+        # Einstellungen für Detailgrad und Glättung
+        lbl_line_fit_tolerance = ttk.Label(settings_frame, text="Standard Detailgrad (line_fit_tolerance):")
+        lbl_line_fit_tolerance.grid(row=6, column=0, padx=5, pady=5, sticky='w')
+
+        entry_line_fit_tolerance = ttk.Entry(settings_frame, textvariable=self.line_fit_tolerance)
+        entry_line_fit_tolerance.grid(row=6, column=1, padx=5, pady=5, sticky='ew')
+
+        lbl_anti_aliasing_mode = ttk.Label(settings_frame, text="Standard Glättung (anti_aliasing_mode):")
+        lbl_anti_aliasing_mode.grid(row=7, column=0, padx=5, pady=5, sticky='w')
+
+        combo_anti_aliasing_mode = ttk.Combobox(settings_frame, textvariable=self.anti_aliasing_mode, values=['anti_aliased', 'aliased'])
+        combo_anti_aliasing_mode.grid(row=7, column=1, padx=5, pady=5, sticky='ew')
+        combo_anti_aliasing_mode.current(0)  # Standardwert: 'anti_aliased'
+
+        # Eingabe- und Ausgabe-DPI in den Einstellungen
+        lbl_input_dpi = ttk.Label(settings_frame, text="Input DPI:")
+        lbl_input_dpi.grid(row=8, column=0, padx=5, pady=5, sticky='w')
+        entry_input_dpi = ttk.Entry(settings_frame, textvariable=self.input_dpi)
+        entry_input_dpi.grid(row=8, column=1, padx=5, pady=5, sticky='ew')
+
+        lbl_output_dpi = ttk.Label(settings_frame, text="Output DPI:")
+        lbl_output_dpi.grid(row=9, column=0, padx=5, pady=5, sticky='w')
+        entry_output_dpi = ttk.Entry(settings_frame, textvariable=self.output_dpi)
+        entry_output_dpi.grid(row=9, column=1, padx=5, pady=5, sticky='ew')
+
+        # Button zum Speichern der Einstellungen
+        btn_save_settings = ttk.Button(settings_frame, text="Einstellungen speichern", command=self.save_settings)
+        btn_save_settings.grid(row=10, column=0, columnspan=2, pady=20)
+        settings_frame.columnconfigure(1, weight=1)
+
+    def browse_input_folder(self):
+        folder_path = filedialog.askdirectory()
+        if folder_path:
+            self.input_base_folder.set(folder_path)
+
+    def browse_output_folder(self):
+        folder_path = filedialog.askdirectory()
+        if folder_path:
+            self.output_folder.set(folder_path)
+
+    def browse_gpl_file(self):
+        file_path = filedialog.askopenfilename(filetypes=[("GIMP Palette Dateien", "*.gpl")])
+        if file_path:
+            self.gpl_file_path.set(file_path)
+
+    def load_settings(self):
+        if os.path.exists(self.config_file):
+            self.config.read(self.config_file)
+            if 'API' in self.config:
+                self.api_key.set(self.config['API'].get('api_key', ''))
+                self.api_secret.set(self.config['API'].get('api_secret', ''))
+            if 'Settings' in self.config:
+                self.input_base_folder.set(self.config['Settings'].get('input_base_folder', ''))
+                self.output_folder.set(self.config['Settings'].get('output_folder', ''))
+                self.palette.set(self.config['Settings'].get('palette', ''))
+                self.mode.set(self.config['Settings'].get('mode', 'test'))
+                self.output_format.set(self.config['Settings'].get('output.file_format', 'png'))
+                self.gpl_file_path.set(self.config['Settings'].get('gpl_file_path', ''))
+                # Neue Einstellungen laden
+                self.line_fit_tolerance.set(self.config['Settings'].get('line_fit_tolerance', '0.1'))
+                self.anti_aliasing_mode.set(self.config['Settings'].get('anti_aliasing_mode', 'anti_aliased'))
+                self.input_dpi.set(self.config['Settings'].get('input_dpi', '96'))
+                self.output_dpi.set(self.config['Settings'].get('output_dpi', '96'))
+                self.max_colors.set(self.config['Settings'].get('processing.max_colors', '36'))  # Standardwert auf 36 gesetzt
+                self.min_area_px.set(self.config['Settings'].get('processing.shapes.min_area_px', '50'))  # Einstellungen laden
+                self.skin_tone_count.set(self.config['Settings'].get('skin_tone_count', '549'))  # Standard: bis CH
+                for key in ADVANCED_SETTING_KEYS:
+                    self.advanced_settings[key] = self.config['Settings'].get(key, DEFAULT_SETTINGS[key])
+        else:
+            # Standardwerte setzen
+            self.line_fit_tolerance.set('0.1')
+            self.anti_aliasing_mode.set('anti_aliased')
+            self.input_dpi.set('96')
+            self.output_dpi.set('96')
+            self.max_colors.set('36')  # Standardwert auf 36 gesetzt
+            self.min_area_px.set('50')  # Standardwert setzen
+            self.skin_tone_count.set('549')  # Standard: bis CH (alle Farben bis auf die letzten 3)
+        logging.info("Einstellungen geladen.")
+
+    def save_settings(self):
+        self.config['API'] = {
+            'api_key': self.api_key.get(),
+            'api_secret': self.api_secret.get()
+        }
+        self.config['Settings'] = {
+            'input_base_folder': self.input_base_folder.get(),
+            'output_folder': self.output_folder.get(),
+            'palette': self.palette.get(),
+            'mode': self.mode.get(),
+            'output.file_format': self.output_format.get(),
+            'gpl_file_path': self.gpl_file_path.get(),
+            # Neue Einstellungen speichern
+            'line_fit_tolerance': self.line_fit_tolerance.get(),
+            'anti_aliasing_mode': self.anti_aliasing_mode.get(),
+            'input_dpi': self.input_dpi.get(),
+            'output_dpi': self.output_dpi.get(),
+            'processing.max_colors': self.max_colors.get(),  # Neue Einstellung speichern
+            'processing.shapes.min_area_px': self.min_area_px.get(),  # Einstellungen speichern
+            'skin_tone_count': self.skin_tone_count.get(),  # Skin Tone Count speichern
+            **self.advanced_settings
+        }
+        try:
+            with open(self.config_file, 'w', encoding='utf-8') as configfile:
+                self.config.write(configfile)
+            messagebox.showinfo("Einstellungen gespeichert", "Die Einstellungen wurden erfolgreich gespeichert.")
+            logging.info("Einstellungen gespeichert.")
+        except Exception as e:
+            messagebox.showerror("Fehler", f"Fehler beim Speichern der Einstellungen:\n{e}")
+            logging.error(f"Fehler beim Speichern der Einstellungen: {e}")
+
+    def on_closing(self):
+        if messagebox.askyesno("Beenden", "Möchten Sie das Programm wirklich beenden?"):
+            logging.info("VectorizerApp wird beendet.")
+            self.ui_events.stop()
+            stats = self.ui_events.latency_stats()
+            if stats['loop_lag_p50'] is not None:
+                logging.info(f"GUI-Latenz: Loop-Lag p50 {stats['loop_lag_p50']:.1f} ms, p95 {stats['loop_lag_p95']:.1f} ms, "
+                             f"max {stats['loop_lag_max']:.1f} ms; {stats['events']} Ereignisse, "
+                             f"Wartezeit p95 {stats['event_delay_p95'] or 0:.1f} ms")
+            self.render_executor.shutdown(wait=False, cancel_futures=True)
+            logging.info(f"Vorladen: {self.prefetcher.hits} Treffer, {self.prefetcher.misses} Fehlschläge")
+            if _job_timings.jobs:
+                logging.info(_job_timings.format())
+            self.prefetcher.close()
+            self.destroy()
+
+    def on_mode_change(self, *args):
+        current_mode = self.mode.get()
+        logging.debug(f"Modus geändert zu: {current_mode}")
+
+        if current_mode == 'preview':
+            # Ausgabeformat auf 'png' setzen und Radiobuttons entsprechend deaktivieren
+            self.output_format.set('png')
+            if 'svg' in self.rb_output_formats:
+                self.rb_output_formats['svg'].configure(state='disabled')
+            logging.info("Modus ist 'preview'. Ausgabeformat auf 'png' gesetzt und 'svg' deaktiviert.")
+        else:
+            # Radiobuttons wieder aktivieren
+            if 'svg' in self.rb_output_formats:
+                self.rb_output_formats['svg'].configure(state='normal')
+            logging.info(f"Modus ist '{current_mode}'. Ausgabeformat-Radiobuttons wieder aktiviert.")
@@ -0,0 +1,398 @@
+"""Lokaler Stand-in für die Vectorizer.ai API zum Testen ohne Credits.
+
+Implementiert /api/v1/vectorize (Multipart-Upload wie vectorize_image) und /api/v1/download
+(Production-Ergebnis eines aufbewahrten Bildes über image.token und receipt).
+
+Für Last- und Robustheitstests lassen sich Antwortzeiten (Verteilung), 429/5xx-Fehler und eine
+begrenzte Bandbreite simulieren; GET /stats liefert die Zähler als JSON.
+
+Start:
+    python vectorizer_stub_server.py --port 8765
+    python vectorizer_stub_server.py --latency lognormal:800:0.5 --rate-429 0.05 --rate-5xx 0.02 --bandwidth-mbit 50
+
+In der config.ini:
+    api_base_url = http://127.0.0.1:8765/api/v1
+"""
+import argparse
+import collections
+import email.parser
+import email.policy
+import hashlib
+import json
+import logging
+import math
+import random
+import struct
+import threading
+import time
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+# Größte gelieferte PNG-Kantenlänge, damit fehlerhafte Maße den Stand-in nicht lahmlegen
+MAX_PNG_SIDE = 12000
+# Blockgröße beim gedrosselten Lesen und Schreiben
+IO_CHUNK_SIZE = 64 * 1024
+UNIT_PER_INCH = {'in': 1.0, 'cm': 2.54, 'mm': 25.4, 'pt': 72.0}
+
+
+def make_png(width, height, rgb, dpi=None):
+    """Erzeugt ein einfarbiges PNG ohne externe Abhängigkeiten (optional mit pHYs für die DPI)."""
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+    row = b'\x00' + bytes(rgb) * width
+    compressor = zlib.compressobj(6)
+    idat = b''.join(compressor.compress(row) for _ in range(height)) + compressor.flush()
+    phys = b''
+    if dpi:
+        pixels_per_meter = int(round(dpi / 0.0254))
+        phys = chunk(b'pHYs', struct.pack('>IIB', pixels_per_meter, pixels_per_meter, 1))
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + phys
+            + chunk(b'IDAT', idat)
+            + chunk(b'IEND', b''))
+
+
+def output_size_px(fields):
+    """Pixelmaße des Ergebnisses aus output.size.* (wie von vectorize_image gesendet); (64, 64) ohne Angabe."""
+    try:
+        width = float(fields['output.size.width'])
+        height = float(fields['output.size.height'])
+    except (KeyError, ValueError):
+        return 64, 64
+    unit = fields.get('output.size.unit', 'px')
+    if unit in UNIT_PER_INCH:
+        dpi = float(fields.get('output.size.output_dpi') or 72)
+        width, height = width / UNIT_PER_INCH[unit] * dpi, height / UNIT_PER_INCH[unit] * dpi
+    return (min(max(int(round(width)), 1), MAX_PNG_SIDE),
+            min(max(int(round(height)), 1), MAX_PNG_SIDE))
+
+
+class LatencyModel:
+    """Antwortzeit des Stand-ins in Sekunden, beschrieben als Text.
+
+    Formate (Werte in Millisekunden): '250' (fest), 'uniform:MIN:MAX', 'normal:MITTEL:STREUUNG',
+    'lognormal:MEDIAN:SIGMA' (lange Ausläufer wie bei echten Warteschlangen), 'exp:MITTEL'.
+    """
+
+    KINDS = {'fixed': 1, 'uniform': 2, 'normal': 2, 'lognormal': 2, 'exp': 1}
+
+    def __init__(self, spec='0'):
+        kind, _, args = spec.partition(':')
+        if not args:
+            kind, args = 'fixed', kind
+        values = [float(value) for value in args.split(':')]
+        if kind not in self.KINDS or len(values) != self.KINDS[kind]:
+            raise ValueError(f"Ungültige Latenz-Angabe: {spec!r}")
+        self.spec = spec
+        self.kind = kind
+        self.values = values
+
+    def sample(self, rng):
+        if self.kind == 'fixed':
+            ms = self.values[0]
+        elif self.kind == 'uniform':
+            ms = rng.uniform(*self.values)
+        elif self.kind == 'normal':
+            ms = rng.gauss(*self.values)
+        elif self.kind == 'lognormal':
+            ms = rng.lognormvariate(math.log(max(self.values[0], 1e-3)), self.values[1])
+        else:
+            ms = rng.expovariate(1 / self.values[0]) if self.values[0] > 0 else 0
+        return max(ms, 0) / 1000
+
+
+class StubConfig:
+    """Simulierte Last- und Fehlerbedingungen des Stand-ins (Standard: keine)."""
+
+    def __init__(self, latency='0', rate_429=0.0, rate_5xx=0.0, retry_after=1, bandwidth_mbit=0.0, seed=None):
+        self.latency = LatencyModel(latency)
+        self.rate_429 = rate_429
+        self.rate_5xx = rate_5xx
+        self.retry_after = retry_after
+        # Bytes pro Sekunde je Verbindung, 0 = unbegrenzt
+        self.bandwidth = bandwidth_mbit * 1e6 / 8
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+
+    def draw(self):
+        """Zieht für eine Anfrage (Fehlerstatus oder None, Wartezeit in Sekunden)."""
+        with self.rng_lock:
+            roll = self.rng.random()
+            delay = self.latency.sample(self.rng)
+            status = self.rng.choice((500, 502, 503))
+        if roll < self.rate_429:
+            return 429, delay
+        if roll < self.rate_429 + self.rate_5xx:
+            return status, delay
+        return None, delay
+
+
+def make_svg(width, height, unit, rgb):
+    return (f'<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}{unit}" height="{height}{unit}" '
+            f'viewBox="0 0 100 100"><rect width="100" height="100" fill="#{bytes(rgb).hex()}"/></svg>\n').encode('utf-8')
+
+
+class StubState:
+    """Aufbewahrte Bilder (image.token) und Zähler des Stand-in-Servers."""
+
+    def __init__(self, config=None):
+        self.config = config or StubConfig()
+        self.lock = threading.Lock()
+        self.images = {}
+        self.requests = 0
+        self.uploads = 0
+        self.downloads = 0
+        self.upload_bytes = 0
+        self.sent_bytes = 0
+        self.injected = collections.Counter()  # Statuscode -> Anzahl simulierter Fehler
+        self.active = 0
+        self.max_active = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'uploads': self.uploads,
+                'downloads': self.downloads,
+                'upload_bytes': self.upload_bytes,
+                'sent_bytes': self.sent_bytes,
+                'injected': {str(status): count for status, count in sorted(self.injected.items())},
+                'active': self.active,
+                'max_active': self.max_active,
+            }
+
+    def retain(self, digest, params, retention_days, mode):
+        token = uuid.uuid4().hex
+        receipt = uuid.uuid4().hex if mode == 'preview' else ''
+        with self.lock:
+            self.images[token] = {
+                'digest': digest,
+                'params': params,
+                'receipt': receipt,
+                'expires': time.time() + retention_days * 86400,
+            }
+        return token, receipt
+
+    def lookup(self, token):
+        with self.lock:
+            image = self.images.get(token)
+            if image is not None and image['expires'] < time.time():
+                del self.images[token]
+                image = None
+            return image
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'VectorizerStub/1.0'
+    state = None  # wird von make_server gesetzt
+
+    def log_message(self, format, *args):
+        logging.debug("Stub: " + format % args)
+
+    def throttle(self, started, transferred):
+        """Wartet so lange, dass `transferred` Bytes seit `started` die Bandbreite nicht überschreiten."""
+        bandwidth = self.state.config.bandwidth
+        if bandwidth > 0:
+            remaining = started + transferred / bandwidth - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+
+    def send_payload(self, status, content_type, body, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command == 'HEAD':
+            return
+        started = time.monotonic()
+        view = memoryview(body)
+        for offset in range(0, len(body), IO_CHUNK_SIZE):
+            self.wfile.write(view[offset:offset + IO_CHUNK_SIZE])
+            self.throttle(started, offset + IO_CHUNK_SIZE)
+        with self.state.lock:
+            self.state.sent_bytes += len(body)
+
+    def send_error_json(self, status, message):
+        body = json.dumps({'error': {'status': status, 'message': message}}).encode('utf-8')
+        self.send_payload(status, 'application/json', body)
+
+    def do_HEAD(self):
+        self.send_payload(200, 'text/plain', b'')
+
+    def do_GET(self):
+        if self.path.rstrip('/').endswith('/stats'):
+            self.send_payload(200, 'application/json', json.dumps(self.state.stats()).encode('utf-8'))
+        else:
+            self.send_error_json(404, 'Unknown endpoint')
+
+    def read_body(self):
+        """Liest den Anfrage-Body, bei begrenzter Bandbreite blockweise."""
+        length = int(self.headers.get('Content-Length') or 0)
+        if self.state.config.bandwidth <= 0:
+            return self.rfile.read(length)
+        started = time.monotonic()
+        parts, received = [], 0
+        while received < length:
+            part = self.rfile.read(min(IO_CHUNK_SIZE, length - received))
+            if not part:
+                break
+            parts.append(part)
+            received += len(part)
+            self.throttle(started, received)
+        return b''.join(parts)
+
+    def read_form(self):
+        """Liest Formularfelder und optional die hochgeladene Bilddatei."""
+        body = self.read_body()
+        content_type = self.headers.get('Content-Type', '')
+        if content_type.startswith('multipart/form-data'):
+            message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+                b'Content-Type: ' + content_type.encode('latin-1') + b'\r\n\r\n' + body)
+            fields, image = {}, None
+            for part in message.iter_parts():
+                name = part.get_param('name', header='content-disposition')
+                payload = part.get_payload(decode=True)
+                if name == 'image':
+                    image = payload
+                else:
+                    fields[name] = payload.decode('utf-8')
+            return fields, image, len(body)
+        fields = {k: v[0] for k, v in parse_qs(body.decode('utf-8')).items()}
+        return fields, None, len(body)
+
+    def do_POST(self):
+        with self.state.lock:
+            self.state.requests += 1
+            self.state.active += 1
+            self.state.max_active = max(self.state.max_active, self.state.active)
+        try:
+            self.handle_post()
+        finally:
+            with self.state.lock:
+                self.state.active -= 1
+
+    def handle_post(self):
+        if not self.headers.get('Authorization'):
+            self.send_error_json(401, 'Missing credentials')
+            return
+        try:
+            fields, image, body_size = self.read_form()
+        except Exception as e:
+            self.send_error_json(400, f'Malformed request: {e}')
+            return
+        # Simulierte Verarbeitungszeit und Fehler erst nach dem vollständigen Upload (wie der echte Dienst)
+        status, delay = self.state.config.draw()
+        time.sleep(delay)
+        if status is not None:
+            with self.state.lock:
+                self.state.injected[status] += 1
+            if status == 429:
+                body = json.dumps({'error': {'status': 429, 'message': 'Too many requests'}}).encode('utf-8')
+                self.send_payload(429, 'application/json', body,
+                                  {'Retry-After': str(self.state.config.retry_after)})
+            else:
+                self.send_error_json(status, 'Simulated server error')
+            return
+        if self.path.rstrip('/').endswith('/vectorize'):
+            self.handle_vectorize(fields, image, body_size)
+        elif self.path.rstrip('/').endswith('/download'):
+            self.handle_download(fields)
+        else:
+            self.send_error_json(404, 'Unknown endpoint')
+
+    def handle_vectorize(self, fields, image, body_size):
+        if not image:
+            self.send_error_json(400, 'image: Required')
+            return
+        with self.state.lock:
+            self.state.uploads += 1
+            self.state.upload_bytes += body_size
+        digest = hashlib.sha256(image).hexdigest()
+        mode = fields.get('mode', 'production')
+        headers = {'X-Credits-Charged': '0.2' if mode == 'preview' else '1.0'}
+        retention_days = float(fields.get('policy.retention_days') or 0)
+        if retention_days > 0:
+            processing = {k: v for k, v in fields.items() if k.startswith('processing.')}
+            token, receipt = self.state.retain(digest, processing, retention_days, mode)
+            headers['X-Image-Token'] = token
+            if receipt:
+                headers['X-Receipt'] = receipt
+        self.send_result(digest, fields, 'png' if mode == 'preview' else fields.get('output.file_format', 'svg'), headers)
+
+    def handle_download(self, fields):
+        image = self.state.lookup(fields.get('image.token', ''))
+        if image is None:
+            self.send_error_json(404, 'image.token: Unknown or expired')
+            return
+        if image['receipt'] and fields.get('receipt') != image['receipt']:
+            self.send_error_json(400, 'receipt: Does not match image.token')
+            return
+        with self.state.lock:
+            self.state.downloads += 1
+        headers = {'X-Credits-Charged': '0.8' if image['receipt'] else '0.0'}
+        self.send_result(image['digest'], fields, fields.get('output.file_format', 'svg'), headers)
+
+    def send_result(self, digest, fields, output_format, headers):
+        # Deterministische Farbe aus dem Bild-Hash
+        rgb = bytes.fromhex(digest[:6])
+        if output_format == 'svg':
+            body = make_svg(fields.get('output.size.width', '100'), fields.get('output.size.height', '100'),
+                            fields.get('output.size.unit', 'px'), rgb)
+            self.send_payload(200, 'image/svg+xml', body, headers)
+        else:
+            width, height = output_size_px(fields)
+            dpi = float(fields.get('output.size.output_dpi') or 0) or None
+            self.send_payload(200, 'image/png', make_png(width, height, rgb, dpi), headers)
+
+
+def make_server(host='127.0.0.1', port=8765, config=None):
+    """Erstellt einen Stand-in-Server (Port 0 = freier Port). Start mit serve_forever()."""
+    handler = type('BoundStubHandler', (StubHandler,), {'state': StubState(config)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.state = handler.state
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lokaler Stand-in für die Vectorizer.ai API.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', default='0',
+                        help="Antwortzeit in ms: '250', 'uniform:100:800', 'normal:400:100', "
+                             "'lognormal:MEDIAN:SIGMA' oder 'exp:MITTEL' (Standard: 0)")
+    parser.add_argument('--rate-429', type=float, default=0.0, help="Anteil der Anfragen mit 429 (0..1)")
+    parser.add_argument('--rate-5xx', type=float, default=0.0, help="Anteil der Anfragen mit 500/502/503 (0..1)")
+    parser.add_argument('--retry-after', type=int, default=1, help="Retry-After bei 429 in Sekunden")
+    parser.add_argument('--bandwidth-mbit', type=float, default=0.0,
+                        help="Bandbreite je Verbindung in Mbit/s für Upload und Download (0 = unbegrenzt)")
+    parser.add_argument('--seed', type=int, default=None, help="Startwert für reproduzierbare Latenzen und Fehler")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        config = StubConfig(args.latency, args.rate_429, args.rate_5xx, args.retry_after, args.bandwidth_mbit, args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+    server = make_server(args.host, args.port, config)
+    logging.info(f"Vectorizer-Stand-in läuft auf http://{args.host}:{server.server_port}/api/v1 "
+                 f"(Latenz {args.latency} ms, 429: {args.rate_429:.0%}, 5xx: {args.rate_5xx:.0%}, "
+                 f"Bandbreite {args.bandwidth_mbit or 'unbegrenzt'} Mbit/s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()